@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, UserProfile, EmailVerificationToken, PasswordResetToken
+from .models import User, UserProfile, EmailVerificationToken, PasswordResetToken, QueuedEmail, RevokedToken
 
 
 @admin.register(User)
@@ -45,3 +45,19 @@ class PasswordResetTokenAdmin(admin.ModelAdmin):
     list_filter = ('is_used', 'created_at')
     search_fields = ('user__email', 'token')
 
+
+@admin.register(RevokedToken)
+class RevokedTokenAdmin(admin.ModelAdmin):
+    list_display = ('jti', 'user', 'token_type', 'expires_at', 'created_at')
+    list_filter = ('token_type', 'created_at')
+    search_fields = ('jti', 'user__email')
+    ordering = ('-created_at',)
+
+
+@admin.register(QueuedEmail)
+class QueuedEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'created_at', 'attempts', 'sent_at', 'failed_at')
+    list_filter = ('sent_at', 'failed_at', 'created_at')
+    search_fields = ('subject',)
+    readonly_fields = ('subject', 'body', 'from_email', 'to', 'created_at', 'attempts', 'last_error', 'sent_at', 'failed_at')
+    ordering = ('-created_at',)
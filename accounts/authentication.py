@@ -0,0 +1,134 @@
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import FileField
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from .models import User
+from .revocation import is_token_revoked
+import threading
+import time
+
+TOKEN_VERSION_CLAIM = 'ver'
+
+# The password hash never leaves the database; code that needs it loads it lazily
+CACHED_FIELDS = [field for field in User._meta.concrete_fields if field.attname != 'password']
+
+
+def user_cache_key(user_id):
+    return f'auth_user:{user_id}'
+
+
+class LocalUserCache:
+    """Small thread-safe LRU of user snapshots, each kept for a few seconds"""
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires, snapshot = entry
+            if expires < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return snapshot
+
+    def set(self, key, snapshot):
+        ttl = getattr(settings, 'AUTH_USER_LOCAL_TTL', 5)
+        size = getattr(settings, 'AUTH_USER_LOCAL_SIZE', 1024)
+        if not ttl or not size:
+            return
+        with self.lock:
+            self.entries[key] = (time.monotonic() + ttl, snapshot)
+            self.entries.move_to_end(key)
+            while len(self.entries) > size:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+local_users = LocalUserCache()
+
+
+def snapshot_user(user):
+    values = []
+    for field in CACHED_FIELDS:
+        value = getattr(user, field.attname)
+        if isinstance(field, FileField):
+            value = value.name  # The FieldFile itself would pickle the whole user
+        values.append(value)
+    return values
+
+
+def user_from_snapshot(snapshot):
+    """A fresh instance per request, so one request's changes never leak into another"""
+    return User.from_db(User.objects.db, [field.attname for field in CACHED_FIELDS], snapshot)
+
+
+def invalidate_cached_user(user_id):
+    key = user_cache_key(user_id)
+    local_users.delete(key)
+    cache.delete(key)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    # Other processes keep their local copy for at most AUTH_USER_LOCAL_TTL seconds
+    invalidate_cached_user(instance.pk)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWT authentication that resolves the user from cache instead of a query per request.
+
+    Tokens carry the user's token_version; a token issued before the last
+    password change no longer matches and is rejected. Individually revoked
+    tokens are screened by the in-process Bloom filter first.
+    """
+
+    def get_validated_token(self, raw_token):
+        validated_token = super().get_validated_token(raw_token)
+        if is_token_revoked(validated_token[api_settings.JTI_CLAIM]):
+            raise AuthenticationFailed('Token has been revoked', code='token_revoked')
+        return validated_token
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Token contained no recognizable user identification')
+        version = validated_token.get(TOKEN_VERSION_CLAIM, 0)
+        key = user_cache_key(user_id)
+
+        snapshot = local_users.get(key)
+        if snapshot is None:
+            snapshot = cache.get(key)
+            if snapshot is None:
+                try:
+                    user = User.objects.get(**{api_settings.USER_ID_FIELD: user_id})
+                except User.DoesNotExist:
+                    raise AuthenticationFailed('User not found', code='user_not_found')
+                snapshot = snapshot_user(user)
+                cache.set(key, snapshot, getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 300))
+            local_users.set(key, snapshot)
+
+        user = user_from_snapshot(snapshot)
+        if not user.is_active:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        if user.token_version != version:
+            raise AuthenticationFailed('Token has been revoked', code='token_revoked')
+        return user
@@ -0,0 +1,126 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher, identify_hasher, is_password_usable, make_password
+from rest_framework import status
+from rest_framework.exceptions import APIException
+import logging
+import multiprocessing
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Password hashing is deliberately slow CPU work. Running it in a bounded
+# process pool caps how many cores a login spike can take, so the other
+# requests served by the same worker keep theirs.
+
+_executor = None
+_executor_lock = threading.Lock()
+_slots = None
+
+
+class PasswordHashingBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many sign-in requests, please try again shortly.'
+    default_code = 'password_hashing_busy'
+
+
+def pool_size():
+    return getattr(settings, 'PASSWORD_HASH_WORKERS', 0)
+
+
+def get_executor():
+    """The process pool and the semaphore capping how many hashes are submitted at once"""
+    global _executor, _slots
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                workers = pool_size()
+                if _slots is None:
+                    _slots = threading.BoundedSemaphore(workers + getattr(settings, 'PASSWORD_HASH_MAX_QUEUE', workers * 4))
+                # Spawned workers never inherit locks held by the server's other threads
+                _executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+    return _executor
+
+
+def discard_executor(executor):
+    global _executor
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False)
+
+
+def run_hasher(function, *args):
+    """Run a hasher call in the pool, waiting up to PASSWORD_HASH_QUEUE_TIMEOUT for a free slot"""
+    if not pool_size():
+        return function(*args)
+
+    executor = get_executor()
+    if not _slots.acquire(timeout=getattr(settings, 'PASSWORD_HASH_QUEUE_TIMEOUT', 5)):
+        raise PasswordHashingBusy()
+    try:
+        return executor.submit(function, *args).result()
+    except BrokenProcessPool:
+        # A worker died; start a fresh pool next time and hash this one inline
+        logger.exception('Password hashing pool failed')
+        discard_executor(executor)
+        return function(*args)
+    finally:
+        _slots.release()
+
+
+def hash_password(raw_password):
+    """make_password() with the hashing done off the request thread"""
+    if raw_password is None:
+        return make_password(None)
+    hasher = get_hasher('default')
+    return run_hasher(hasher.encode, raw_password, hasher.salt())
+
+
+def set_password(user, raw_password):
+    """User.set_password() with the hashing done off the request thread"""
+    user.password = hash_password(raw_password)
+    user._password = raw_password  # Lets save() notify password validators, as set_password() does
+
+
+def check_password(user, raw_password):
+    """User.check_password() with the hashing done off the request thread.
+
+    Like Django, a correct password stored with an outdated hasher or work
+    factor is rehashed with the current one and saved.
+    """
+    encoded = user.password
+    if raw_password is None or not is_password_usable(encoded):
+        return False
+    try:
+        hasher = identify_hasher(encoded)
+    except ValueError:
+        return False
+
+    preferred = get_hasher('default')
+    hasher_changed = hasher.algorithm != preferred.algorithm
+    must_update = hasher_changed or preferred.must_update(encoded)
+    is_correct = run_hasher(hasher.verify, raw_password, encoded)
+
+    # Keep wrong guesses as slow as right ones while the work factor is being raised
+    if not is_correct and not hasher_changed and must_update:
+        run_hasher(hasher.harden_runtime, raw_password, encoded)
+
+    if is_correct and must_update:
+        user.password = run_hasher(preferred.encode, raw_password, preferred.salt())
+        user.save(update_fields=['password'])
+    return is_correct
+
+
+def authenticate(model, email, password):
+    """ModelBackend.authenticate() for email logins, with hashing done off the request thread"""
+    try:
+        user = model._default_manager.get_by_natural_key(email)
+    except model.DoesNotExist:
+        # Hash anyway so response times don't reveal which emails are registered
+        hash_password(password)
+        return None
+    if check_password(user, password) and user.is_active:
+        return user
+    return None
@@ -0,0 +1,109 @@
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+from datetime import timedelta
+from .models import QueuedEmail
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def queue_email(subject, body, recipients, from_email=None):
+    """Store an email for the worker and wake it once the caller's transaction commits"""
+    email = QueuedEmail.objects.create(
+        subject=subject,
+        body=body,
+        from_email=from_email or '',
+        to=list(recipients)
+    )
+    # Eager Celery would send here, in the request; leave it to the poller
+    if getattr(settings, 'EMAIL_QUEUE_SEND_ON_COMMIT', False) and not getattr(settings, 'CELERY_TASK_ALWAYS_EAGER', False):
+        transaction.on_commit(wake_worker)
+    return email
+
+
+def wake_worker():
+    from .tasks import send_queued_emails
+    try:
+        send_queued_emails.delay()
+    except Exception:
+        # The email is safely queued; the periodic task will send it
+        logger.exception('Could not enqueue email sending')
+
+
+def retry_delay(attempts):
+    """Exponential backoff between attempts, capped at EMAIL_QUEUE_RETRY_MAX_DELAY"""
+    base = getattr(settings, 'EMAIL_QUEUE_RETRY_BASE_DELAY', timedelta(seconds=30))
+    cap = getattr(settings, 'EMAIL_QUEUE_RETRY_MAX_DELAY', timedelta(hours=1))
+    return min(base * 2 ** (attempts - 1), cap)
+
+
+def claim_batch(batch_size):
+    """Lease a batch of due emails so other workers skip them while they are sent"""
+    lease = getattr(settings, 'EMAIL_QUEUE_LEASE', timedelta(minutes=5))
+    now = timezone.now()
+    with transaction.atomic():
+        emails = list(
+            QueuedEmail.objects.filter(sent_at__isnull=True, failed_at__isnull=True, available_at__lte=now)
+            .select_for_update(skip_locked=True)
+            .order_by('available_at', 'id')[:batch_size]
+        )
+        QueuedEmail.objects.filter(pk__in=[email.pk for email in emails]).update(available_at=now + lease)
+    return emails
+
+
+def send_batch(batch_size=None):
+    """Send one batch of queued emails over a single connection; returns how many were attempted.
+    
+    Sends are paced to EMAIL_QUEUE_RATE_LIMIT messages per second, and failed
+    messages are retried with backoff until EMAIL_QUEUE_MAX_ATTEMPTS.
+    """
+    batch_size = batch_size or getattr(settings, 'EMAIL_QUEUE_BATCH_SIZE', 50)
+    rate_limit = getattr(settings, 'EMAIL_QUEUE_RATE_LIMIT', 0)
+    max_attempts = getattr(settings, 'EMAIL_QUEUE_MAX_ATTEMPTS', 5)
+    
+    emails = claim_batch(batch_size)
+    if not emails:
+        return 0
+    
+    def record_failure(email, error):
+        email.attempts += 1
+        email.last_error = str(error)[:4000]
+        if email.attempts >= max_attempts:
+            email.failed_at = timezone.now()
+            logger.error('Giving up on queued email %s after %s attempts', email.pk, email.attempts)
+        else:
+            email.available_at = timezone.now() + retry_delay(email.attempts)
+    
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as e:
+        for email in emails:
+            record_failure(email, e)
+    else:
+        interval = 1 / rate_limit if rate_limit else 0
+        next_send = time.monotonic()
+        try:
+            for email in emails:
+                delay = next_send - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                next_send = time.monotonic() + interval
+                
+                message = EmailMessage(email.subject, email.body, email.from_email or None, email.to,
+                                       connection=connection)
+                try:
+                    connection.send_messages([message])
+                except Exception as e:
+                    record_failure(email, e)
+                else:
+                    email.attempts += 1
+                    email.sent_at = timezone.now()
+        finally:
+            connection.close()
+    
+    QueuedEmail.objects.bulk_update(emails, ['attempts', 'last_error', 'available_at', 'sent_at', 'failed_at'])
+    return len(emails)
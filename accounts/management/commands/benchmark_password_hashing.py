@@ -0,0 +1,53 @@
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from accounts import hashing
+from accounts.models import User
+import os
+import time
+
+
+class Command(BaseCommand):
+    help = 'Measure password check throughput on the request thread and in the hashing process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=200, help='Password checks per mode')
+        parser.add_argument('--concurrency', type=int, default=8, help='Concurrent request threads')
+        parser.add_argument('--workers', type=int, default=getattr(settings, 'PASSWORD_HASH_WORKERS', 0) or os.cpu_count(),
+                            help='Hashing processes for the pooled run')
+
+    def handle(self, *args, **options):
+        if options['logins'] <= 0 or options['concurrency'] <= 0 or options['workers'] <= 0:
+            raise CommandError('--logins, --concurrency and --workers must be positive')
+
+        # An unsaved user with a current hash, so only hashing is measured
+        user = User(email='benchmark@example.com')
+        with override_settings(PASSWORD_HASH_WORKERS=0):
+            hashing.set_password(user, 'benchmark-password')
+
+        self.stdout.write(f"Checking {options['logins']} passwords with {options['concurrency']} threads...")
+        cpus = os.cpu_count()
+        modes = (
+            ('request thread', 0, min(options['concurrency'], cpus)),
+            ('process pool', options['workers'], min(options['workers'], cpus)),
+        )
+        for name, workers, cores in modes:
+            queue = max(options['concurrency'], getattr(settings, 'PASSWORD_HASH_MAX_QUEUE', 0))
+            with override_settings(PASSWORD_HASH_WORKERS=workers, PASSWORD_HASH_MAX_QUEUE=queue):
+                if workers:
+                    # Start every pool process outside the timed run
+                    list(hashing.get_executor().map(time.sleep, [0.2] * workers))
+                rate = self.run(user, options['logins'], options['concurrency'])
+            self.stdout.write(
+                self.style.SUCCESS(f'{name}: {rate:,.1f} logins/s, {rate / cores:,.1f} logins/s per core ({cores} cores)')
+            )
+
+    def run(self, user, logins, concurrency):
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as threads:
+            results = list(threads.map(lambda _: hashing.check_password(user, 'benchmark-password'), range(logins)))
+        elapsed = time.perf_counter() - started
+        if not all(results):
+            raise CommandError('Password check failed')
+        return logins / elapsed
@@ -0,0 +1,51 @@
+from concurrent.futures import ThreadPoolExecutor
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from ecommerce.throttling import SlidingWindowRateThrottle
+import statistics
+import time
+
+
+class BenchmarkThrottle(SlidingWindowRateThrottle):
+    scope = 'benchmark'
+    rate = '1000000/min'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': request}
+
+
+class Command(BaseCommand):
+    help = 'Measure the latency the sliding-window throttle adds per request under concurrent load'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20000, help='Throttle checks in total')
+        parser.add_argument('--concurrency', type=int, default=16, help='Concurrent request threads')
+        parser.add_argument('--clients', type=int, default=100, help='Distinct client keys to spread checks over')
+
+    def handle(self, *args, **options):
+        if min(options['requests'], options['concurrency'], options['clients']) <= 0:
+            raise CommandError('--requests, --concurrency and --clients must be positive')
+
+        backend = type(caches['default']).__name__
+        self.stdout.write(
+            f"Running {options['requests']} throttle checks from {options['concurrency']} threads on {backend}..."
+        )
+
+        def check(i):
+            throttle = BenchmarkThrottle()
+            started = time.perf_counter()
+            throttle.allow_request(f"client-{i % options['clients']}", None)
+            return time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as threads:
+            latencies = sorted(threads.map(check, range(options['requests'])))
+        elapsed = time.perf_counter() - started
+
+        p50 = statistics.median(latencies) * 1e6
+        p99 = latencies[int(len(latencies) * 0.99) - 1] * 1e6
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{options['requests'] / elapsed:,.0f} checks/s, p50 {p50:,.0f}us, p99 {p99:,.0f}us per check"
+            )
+        )
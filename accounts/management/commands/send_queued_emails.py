@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+from accounts.mail import send_batch
+import time
+
+
+class Command(BaseCommand):
+    help = 'Send queued emails in batches over one SMTP connection, for deployments without a Celery broker'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=getattr(settings, 'EMAIL_QUEUE_BATCH_SIZE', 50),
+                            help='Emails sent per connection')
+        parser.add_argument('--interval', type=float, default=2.0, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Send due emails once and exit')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size must be positive')
+
+        batch_size = options['batch_size']
+        if options['once']:
+            total = 0
+            while True:
+                attempted = send_batch(batch_size)
+                total += attempted
+                if attempted < batch_size:
+                    break
+            self.stdout.write(self.style.SUCCESS(f'Attempted {total} queued emails'))
+            return
+
+        self.stdout.write('Sending queued emails (Ctrl+C to stop)...')
+        try:
+            while True:
+                if send_batch(batch_size) < batch_size:
+                    time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Stopped')
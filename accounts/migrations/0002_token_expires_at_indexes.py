@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='emailverificationtoken',
+            index=models.Index(fields=['expires_at'], name='accounts_em_expires_f36bd3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='passwordresettoken',
+            index=models.Index(fields=['expires_at'], name='accounts_pa_expires_01b447_idx'),
+        ),
+    ]
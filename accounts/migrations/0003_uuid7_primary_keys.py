@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:46
+
+from django.db import migrations, models
+import ecommerce.ids
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_token_expires_at_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='id',
+            field=models.UUIDField(default=ecommerce.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:01
+
+from django.db import migrations, models
+import django.utils.timezone
+import ecommerce.ids
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_uuid7_primary_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QueuedEmail',
+            fields=[
+                ('id', models.UUIDField(default=ecommerce.ids.uuid7, editable=False, primary_key=True, serialize=False)),
+                ('subject', models.CharField(max_length=255)),
+                ('body', models.TextField()),
+                ('from_email', models.CharField(blank=True, max_length=254)),
+                ('to', models.JSONField(default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('available_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('failed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('failed_at__isnull', True), ('sent_at__isnull', True)), fields=['available_at'], name='queuedemail_pending_idx'), models.Index(fields=['sent_at'], name='accounts_qu_sent_at_8e16c3_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+from django.db import migrations
+
+
+def create_missing_profiles(apps, schema_editor):
+    """Profiles are now created at registration; give existing users theirs"""
+    User = apps.get_model('accounts', 'User')
+    UserProfile = apps.get_model('accounts', 'UserProfile')
+    missing = User.objects.filter(profile__isnull=True).values_list('pk', flat=True)
+    batch = []
+    for user_id in missing.iterator(chunk_size=1000):
+        batch.append(UserProfile(user_id=user_id))
+        if len(batch) >= 1000:
+            UserProfile.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        UserProfile.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_revoked_token'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_missing_profiles, migrations.RunPython.noop),
+    ]
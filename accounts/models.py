@@ -1,12 +1,13 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 from django.utils import timezone
+from ecommerce.ids import uuid7
 import uuid
 
 
 class User(AbstractUser):
     """Custom User model with additional fields"""
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     email = models.EmailField(unique=True)
     first_name = models.CharField(max_length=30)
     last_name = models.CharField(max_length=30)
@@ -14,6 +15,7 @@ class User(AbstractUser):
     profile_picture = models.ImageField(upload_to='profile_pictures/', blank=True, null=True)
     is_verified = models.BooleanField(default=False)
     is_seller = models.BooleanField(default=False)
+    token_version = models.PositiveIntegerField(default=0)  # Bumped to revoke every issued token
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -22,6 +24,10 @@ class User(AbstractUser):
     
     def __str__(self):
         return f"{self.first_name} {self.last_name} ({self.email})"
+    
+    def revoke_tokens(self):
+        """Invalidate every token issued so far; takes effect on the next save()"""
+        self.token_version += 1
 
 
 class UserProfile(models.Model):
@@ -46,6 +52,11 @@ class EmailVerificationToken(models.Model):
     expires_at = models.DateTimeField()
     is_used = models.BooleanField(default=False)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['expires_at']),
+        ]
+    
     def is_expired(self):
         return timezone.now() > self.expires_at
     
@@ -61,9 +72,57 @@ class PasswordResetToken(models.Model):
     expires_at = models.DateTimeField()
     is_used = models.BooleanField(default=False)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['expires_at']),
+        ]
+    
     def is_expired(self):
         return timezone.now() > self.expires_at
     
     def __str__(self):
         return f"Password reset token for {self.user.email}"
 
+
+class RevokedToken(models.Model):
+    """JWT revoked before it expired, checked on every authenticated request"""
+    jti = models.CharField(max_length=255, unique=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='revoked_tokens', null=True, blank=True)
+    token_type = models.CharField(max_length=20)
+    expires_at = models.DateTimeField()  # After this the token is rejected anyway
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['expires_at']),
+            models.Index(fields=['created_at']),
+        ]
+    
+    def __str__(self):
+        return f"Revoked {self.token_type} token {self.jti}"
+
+
+class QueuedEmail(models.Model):
+    """Outgoing email waiting to be sent by the email worker"""
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254, blank=True)
+    to = models.JSONField(default=list)
+    created_at = models.DateTimeField(auto_now_add=True)
+    available_at = models.DateTimeField(default=timezone.now)  # Leased while sending, pushed back on failure
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    failed_at = models.DateTimeField(null=True, blank=True)  # Gave up after EMAIL_QUEUE_MAX_ATTEMPTS
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['available_at'], name='queuedemail_pending_idx',
+                         condition=models.Q(sent_at__isnull=True, failed_at__isnull=True)),
+            models.Index(fields=['sent_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.subject} to {', '.join(self.to)}"
+
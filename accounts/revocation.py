@@ -0,0 +1,150 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from datetime import timedelta
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import datetime_from_epoch
+from .models import RevokedToken
+import hashlib
+import math
+import threading
+import time
+
+# Rows committed slightly after a sync started still carry an earlier created_at
+SYNC_OVERLAP = timedelta(minutes=1)
+
+
+def revoked_cache_key(jti):
+    return f'revoked_token:{jti}'
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter; membership tests can give false positives but never false negatives"""
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.size = max(64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray(math.ceil(self.size / 8))
+        self.count = 0
+
+    def positions(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for position in self.positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self.positions(key))
+
+
+class RevocationFilter:
+    """Per-process Bloom filter over revoked JTIs, kept in step with the RevokedToken table.
+
+    Every TOKEN_BLOOM_SYNC_INTERVAL seconds the rows created since the last
+    sync are read from the table, so other processes' revocations are seen
+    whatever the cache backend; the filter is rebuilt from unexpired rows
+    every TOKEN_BLOOM_REBUILD_INTERVAL seconds so expired JTIs drop out.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.bloom = None
+        self.watermark = None
+        self.next_sync = 0
+        self.next_rebuild = 0
+
+    def might_contain(self, jti):
+        if time.monotonic() >= self.next_sync:
+            self.sync()
+        return jti in self.bloom
+
+    def add(self, jti):
+        if self.bloom is not None:
+            with self.lock:
+                self.bloom.add(jti)
+
+    def sync(self):
+        with self.lock:
+            now = time.monotonic()
+            if now < self.next_sync:
+                return
+            if self.bloom is None or now >= self.next_rebuild or self.bloom.count > self.bloom.capacity:
+                self.rebuild()
+            else:
+                self.load_since()
+            self.next_sync = now + getattr(settings, 'TOKEN_BLOOM_SYNC_INTERVAL', 5)
+
+    def rebuild(self):
+        started = timezone.now()
+        revoked = RevokedToken.objects.filter(expires_at__gt=started).values_list('jti', flat=True)
+        bloom = BloomFilter(
+            getattr(settings, 'TOKEN_BLOOM_CAPACITY', 100000),
+            getattr(settings, 'TOKEN_BLOOM_ERROR_RATE', 0.001)
+        )
+        for jti in revoked.iterator(chunk_size=2000):
+            bloom.add(jti)
+        self.bloom = bloom
+        self.watermark = started
+        self.next_rebuild = time.monotonic() + getattr(settings, 'TOKEN_BLOOM_REBUILD_INTERVAL', 3600)
+
+    def load_since(self):
+        started = timezone.now()
+        revoked = RevokedToken.objects.filter(created_at__gte=self.watermark - SYNC_OVERLAP, expires_at__gt=started)
+        for jti in revoked.values_list('jti', flat=True):
+            self.bloom.add(jti)
+        self.watermark = started
+
+    def reset(self):
+        with self.lock:
+            self.bloom = None
+            self.next_sync = 0
+
+
+revocations = RevocationFilter()
+
+
+def revoke_token(token, user=None):
+    """Reject the token from now on, until it would have expired anyway.
+    
+    Returns False if the token was already revoked.
+    """
+    jti = token[api_settings.JTI_CLAIM]
+    expires_at = datetime_from_epoch(token['exp'])
+    remaining = (expires_at - timezone.now()).total_seconds()
+    if remaining <= 0:
+        return True
+
+    _, created = RevokedToken.objects.get_or_create(jti=jti, defaults={
+        'user': user,
+        'token_type': token[api_settings.TOKEN_TYPE_CLAIM],
+        'expires_at': expires_at,
+    })
+    cache.set(revoked_cache_key(jti), True, math.ceil(remaining))
+    revocations.add(jti)
+    return created
+
+
+def is_token_revoked(jti):
+    """Bloom filter first; the cache and then the table are only consulted on a possible hit.
+
+    Only revocations are cached: a cached "not revoked" could outlive a
+    revocation made in another process when the cache is not shared.
+    """
+    if not revocations.might_contain(jti):
+        return False
+
+    key = revoked_cache_key(jti)
+    if cache.get(key):
+        return True
+    expires_at = RevokedToken.objects.filter(jti=jti).values_list('expires_at', flat=True).first()
+    remaining = (expires_at - timezone.now()).total_seconds() if expires_at else 0
+    if remaining <= 0:
+        return False
+    cache.set(key, True, math.ceil(remaining))
+    return True
@@ -1,8 +1,14 @@
 from rest_framework import serializers
-from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
+from django.db import transaction
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from . import hashing
+from .authentication import CachedJWTAuthentication
 from .models import User, UserProfile, EmailVerificationToken, PasswordResetToken
+from .revocation import is_token_revoked, revoke_token
 from django.utils import timezone
 from datetime import timedelta
 
@@ -23,13 +29,22 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
     
     def create(self, validated_data):
         validated_data.pop('confirm_password')
-        user = User.objects.create_user(**validated_data)
+        password = validated_data.pop('password')
+        # What create_user() does, with the password hashed off the request thread
+        validated_data['email'] = User.objects.normalize_email(validated_data['email'])
+        validated_data['username'] = User.normalize_username(validated_data['username'])
+        user = User(**validated_data)
+        hashing.set_password(user, password)
         
-        # Create email verification token
-        EmailVerificationToken.objects.create(
-            user=user,
-            expires_at=timezone.now() + timedelta(hours=24)
-        )
+        with transaction.atomic():
+            user.save()
+            UserProfile.objects.create(user=user)
+            
+            # Create email verification token
+            EmailVerificationToken.objects.create(
+                user=user,
+                expires_at=timezone.now() + timedelta(hours=24)
+            )
         
         return user
 
@@ -44,7 +59,7 @@ class UserLoginSerializer(serializers.Serializer):
         password = attrs.get('password')
         
         if email and password:
-            user = authenticate(username=email, password=password)
+            user = hashing.authenticate(User, email, password)
             if not user:
                 raise serializers.ValidationError('Invalid credentials')
             if not user.is_verified:
@@ -55,13 +70,21 @@ class UserLoginSerializer(serializers.Serializer):
             raise serializers.ValidationError('Must include email and password')
 
 
+def set_changed_fields(instance, data):
+    """Assign the values that differ from the instance and return their field names"""
+    changed = [attr for attr, value in data.items() if getattr(instance, attr) != value]
+    for attr in changed:
+        setattr(instance, attr, data[attr])
+    return changed
+
+
 class UserProfileSerializer(serializers.ModelSerializer):
     """Serializer for user profile"""
     email = serializers.EmailField(source='user.email', read_only=True)
     first_name = serializers.CharField(source='user.first_name')
     last_name = serializers.CharField(source='user.last_name')
-    mobile_phone = serializers.CharField(source='user.mobile_phone')
-    profile_picture = serializers.ImageField(source='user.profile_picture')
+    mobile_phone = serializers.CharField(source='user.mobile_phone', required=False, allow_blank=True)
+    profile_picture = serializers.ImageField(source='user.profile_picture', required=False)
     
     class Meta:
         model = UserProfile
@@ -71,20 +94,27 @@ class UserProfileSerializer(serializers.ModelSerializer):
     def update(self, instance, validated_data):
         user_data = validated_data.pop('user', {})
         user = instance.user
+        user_fields = set_changed_fields(user, user_data)
+        profile_fields = set_changed_fields(instance, validated_data)
         
-        # Update user fields
-        for attr, value in user_data.items():
-            setattr(user, attr, value)
-        user.save()
-        
-        # Update profile fields
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
+        # Write only the rows and columns that changed
+        if user_fields or profile_fields:
+            with transaction.atomic():
+                if user_fields:
+                    user.save(update_fields=user_fields + ['updated_at'])
+                if profile_fields:
+                    instance.save(update_fields=profile_fields + ['updated_at'])
         
         return instance
 
 
+class ProfileDetailsSerializer(serializers.ModelSerializer):
+    """Profile-only fields, nested in the user info response"""
+    class Meta:
+        model = UserProfile
+        fields = ('address', 'birthdate', 'city', 'country')
+
+
 class UserSerializer(serializers.ModelSerializer):
     """Basic user serializer"""
     class Meta:
@@ -93,6 +123,14 @@ class UserSerializer(serializers.ModelSerializer):
                  'profile_picture', 'is_verified', 'is_seller', 'created_at')
 
 
+class UserWithProfileSerializer(UserSerializer):
+    """User serializer with the profile nested, for a single-request account page"""
+    profile = ProfileDetailsSerializer(read_only=True)
+    
+    class Meta(UserSerializer.Meta):
+        fields = UserSerializer.Meta.fields + ('profile',)
+
+
 class PasswordChangeSerializer(serializers.Serializer):
     """Serializer for password change"""
     old_password = serializers.CharField()
@@ -106,7 +144,7 @@ class PasswordChangeSerializer(serializers.Serializer):
     
     def validate_old_password(self, value):
         user = self.context['request'].user
-        if not user.check_password(value):
+        if not hashing.check_password(user, value):
             raise serializers.ValidationError("Old password is incorrect")
         return value
 
@@ -114,19 +152,6 @@ class PasswordChangeSerializer(serializers.Serializer):
 class PasswordResetRequestSerializer(serializers.Serializer):
     """Serializer for password reset request"""
     email = serializers.EmailField()
-    
-    def validate_email(self, value):
-        try:
-            user = User.objects.get(email=value)
-            # Create password reset token
-            PasswordResetToken.objects.create(
-                user=user,
-                expires_at=timezone.now() + timedelta(hours=1)
-            )
-        except User.DoesNotExist:
-            # Don't reveal if email exists or not
-            pass
-        return value
 
 
 class PasswordResetConfirmSerializer(serializers.Serializer):
@@ -152,3 +177,43 @@ class PasswordResetConfirmSerializer(serializers.Serializer):
         
         return attrs
 
+
+class TokenRefreshSerializer(serializers.Serializer):
+    """Serializer for refreshing, and rotating, a refresh token"""
+    refresh = serializers.CharField()
+    
+    def validate(self, attrs):
+        try:
+            refresh = RefreshToken(attrs['refresh'])
+        except TokenError as e:
+            raise InvalidToken(e.args[0])
+        
+        if is_token_revoked(refresh[api_settings.JTI_CLAIM]):
+            raise AuthenticationFailed('Token has been revoked', code='token_revoked')
+        # Rejects deleted or inactive users and tokens issued before a password change
+        user = CachedJWTAuthentication().get_user(refresh)
+        
+        data = {'access': str(refresh.access_token)}
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION and not revoke_token(refresh, user):
+                # Another request rotated this token first
+                raise AuthenticationFailed('Token has been revoked', code='token_revoked')
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data['refresh'] = str(refresh)
+        return data
+
+
+class LogoutSerializer(serializers.Serializer):
+    """Serializer for logout; the refresh token is revoked along with the access token"""
+    refresh = serializers.CharField(required=False)
+    
+    def validate_refresh(self, value):
+        try:
+            refresh = RefreshToken(value)
+        except TokenError as e:
+            raise serializers.ValidationError(e.args[0])
+        if str(refresh.get(api_settings.USER_ID_CLAIM)) != str(self.context['request'].user.pk):
+            raise serializers.ValidationError('Token does not belong to this user')
+        return refresh
@@ -0,0 +1,11 @@
+from celery import shared_task
+from django.conf import settings
+from .mail import send_batch
+
+
+@shared_task(ignore_result=True)
+def send_queued_emails():
+    """Send every due queued email, one batch and connection at a time"""
+    batch_size = getattr(settings, 'EMAIL_QUEUE_BATCH_SIZE', 50)
+    while send_batch(batch_size) == batch_size:
+        pass
@@ -4,6 +4,8 @@ from . import views
 urlpatterns = [
     path('register/', views.register, name='register'),
     path('login/', views.login, name='login'),
+    path('logout/', views.logout, name='logout'),
+    path('token/refresh/', views.token_refresh, name='token_refresh'),
     path('verify-email/<uuid:token>/', views.verify_email, name='verify_email'),
     path('password-reset-request/', views.password_reset_request, name='password_reset_request'),
     path('password-reset-confirm/', views.password_reset_confirm, name='password_reset_confirm'),
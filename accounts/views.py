@@ -1,16 +1,20 @@
 from rest_framework import status, generics, permissions
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import get_user_model
-from django.core.mail import send_mail
 from django.conf import settings
 from django.utils import timezone
+from ecommerce.throttling import LoginRateThrottle, PasswordResetRateThrottle, RegisterRateThrottle
+from . import hashing
+from .authentication import TOKEN_VERSION_CLAIM
+from .mail import queue_email
+from .revocation import revoke_token
 from .models import User, UserProfile, EmailVerificationToken, PasswordResetToken
 from .serializers import (
     UserRegistrationSerializer, UserLoginSerializer, UserProfileSerializer,
     UserSerializer, PasswordChangeSerializer, PasswordResetRequestSerializer,
-    PasswordResetConfirmSerializer
+    PasswordResetConfirmSerializer, TokenRefreshSerializer, LogoutSerializer, UserWithProfileSerializer
 )
 
 User = get_user_model()
@@ -19,14 +23,25 @@ User = get_user_model()
 def get_tokens_for_user(user):
     """Generate JWT tokens for user"""
     refresh = RefreshToken.for_user(user)
+    refresh[TOKEN_VERSION_CLAIM] = user.token_version
     return {
         'refresh': str(refresh),
         'access': str(refresh.access_token),
     }
 
 
+def get_profile(user, queryset=UserProfile.objects):
+    """The user's profile; users created outside registration get theirs on first use"""
+    try:
+        return queryset.get(user=user)
+    except UserProfile.DoesNotExist:
+        profile, created = UserProfile.objects.get_or_create(user=user)
+        return profile
+
+
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
+@throttle_classes([RegisterRateThrottle])
 def register(request):
     """User registration endpoint"""
     serializer = UserRegistrationSerializer(data=request.data)
@@ -37,12 +52,11 @@ def register(request):
         verification_token = EmailVerificationToken.objects.get(user=user)
         verification_link = f"{settings.SITE_DOMAIN}/verify-email/{verification_token.token}"
         
-        send_mail(
+        queue_email(
             'Verify your email',
             f'Click the link to verify your email: {verification_link}',
-            settings.EMAIL_HOST_USER,
             [user.email],
-            fail_silently=False,
+            from_email=settings.EMAIL_HOST_USER,
         )
         
         return Response({
@@ -55,17 +69,47 @@ def register(request):
 
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
+@throttle_classes([LoginRateThrottle])
 def login(request):
     """User login endpoint"""
     serializer = UserLoginSerializer(data=request.data)
     if serializer.is_valid():
         user = serializer.validated_data['user']
         tokens = get_tokens_for_user(user)
+        user.profile = get_profile(user)
         
         return Response({
             'message': 'Login successful',
             'tokens': tokens,
-            'user': UserSerializer(user).data
+            'user': UserWithProfileSerializer(user).data
+        }, status=status.HTTP_200_OK)
+    
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['POST'])
+@permission_classes([permissions.AllowAny])
+def token_refresh(request):
+    """Exchange a refresh token for a new access token (and a rotated refresh token)"""
+    serializer = TokenRefreshSerializer(data=request.data)
+    if serializer.is_valid():
+        return Response(serializer.validated_data, status=status.HTTP_200_OK)
+    
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def logout(request):
+    """Logout endpoint; revokes the current access token and the given refresh token"""
+    serializer = LogoutSerializer(data=request.data, context={'request': request})
+    if serializer.is_valid():
+        revoke_token(request.auth, request.user)
+        if 'refresh' in serializer.validated_data:
+            revoke_token(serializer.validated_data['refresh'], request.user)
+        
+        return Response({
+            'message': 'Logged out successfully'
         }, status=status.HTTP_200_OK)
     
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -105,6 +149,7 @@ def verify_email(request, token):
 
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
+@throttle_classes([PasswordResetRateThrottle])
 def password_reset_request(request):
     """Password reset request endpoint"""
     serializer = PasswordResetRequestSerializer(data=request.data)
@@ -119,12 +164,11 @@ def password_reset_request(request):
             
             reset_link = f"{settings.SITE_DOMAIN}/reset-password/{reset_token.token}"
             
-            send_mail(
+            queue_email(
                 'Password Reset',
                 f'Click the link to reset your password: {reset_link}',
-                settings.EMAIL_HOST_USER,
                 [user.email],
-                fail_silently=False,
+                from_email=settings.EMAIL_HOST_USER,
             )
             
         except User.DoesNotExist:
@@ -147,7 +191,8 @@ def password_reset_confirm(request):
         new_password = serializer.validated_data['new_password']
         
         user = reset_token.user
-        user.set_password(new_password)
+        hashing.set_password(user, new_password)
+        user.revoke_tokens()
         user.save()
         
         reset_token.is_used = True
@@ -166,8 +211,7 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_object(self):
-        profile, created = UserProfile.objects.get_or_create(user=self.request.user)
-        return profile
+        return get_profile(self.request.user, UserProfile.objects.select_related('user'))
 
 
 @api_view(['POST'])
@@ -177,11 +221,14 @@ def change_password(request):
     serializer = PasswordChangeSerializer(data=request.data, context={'request': request})
     if serializer.is_valid():
         user = request.user
-        user.set_password(serializer.validated_data['new_password'])
+        hashing.set_password(user, serializer.validated_data['new_password'])
+        user.revoke_tokens()
         user.save()
         
+        # Other sessions are signed out; this one continues with fresh tokens
         return Response({
-            'message': 'Password changed successfully'
+            'message': 'Password changed successfully',
+            'tokens': get_tokens_for_user(user)
         }, status=status.HTTP_200_OK)
     
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -190,6 +237,9 @@ def change_password(request):
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def user_info(request):
-    """Get current user information"""
+    """Get current user information; ?include=profile adds the profile"""
+    if request.query_params.get('include') == 'profile':
+        request.user.profile = get_profile(request.user)
+        return Response(UserWithProfileSerializer(request.user).data)
     return Response(UserSerializer(request.user).data)
 
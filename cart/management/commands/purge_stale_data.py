@@ -0,0 +1,148 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+from accounts.models import EmailVerificationToken, PasswordResetToken, QueuedEmail, RevokedToken
+from cart.models import Cart, CartItem
+from orders.models import IdempotencyKey, OrderNumberWorker, OutboxEvent
+from products.models import StockReservation
+from datetime import timedelta
+import time
+
+
+def stale_carts(cutoff):
+    """Guest carts with no cart or item activity since the cutoff"""
+    recent_items = CartItem.objects.filter(cart=OuterRef('pk'), updated_at__gte=cutoff)
+    return Cart.objects.filter(user__isnull=True, updated_at__lt=cutoff).exclude(Exists(recent_items))
+
+
+def stale_sessions(cutoff):
+    return Session.objects.filter(expire_date__lt=cutoff)
+
+
+def stale_email_verification_tokens(cutoff):
+    return EmailVerificationToken.objects.filter(expires_at__lt=cutoff)
+
+
+def stale_password_reset_tokens(cutoff):
+    return PasswordResetToken.objects.filter(expires_at__lt=cutoff)
+
+
+def stale_stock_reservations(cutoff):
+    return StockReservation.objects.filter(expires_at__lt=cutoff)
+
+
+def stale_idempotency_keys(cutoff):
+    return IdempotencyKey.objects.filter(expires_at__lt=cutoff)
+
+
+def stale_outbox_events(cutoff):
+    return OutboxEvent.objects.filter(processed_at__lt=cutoff)
+
+
+def stale_queued_emails(cutoff):
+    """Sent or abandoned emails; their bodies can hold live reset links"""
+    return QueuedEmail.objects.filter(Q(sent_at__lt=cutoff) | Q(failed_at__lt=cutoff))
+
+
+def stale_order_number_workers(cutoff):
+    """Old worker id leases; auto-increment ids are never handed out again, so deleting them is safe"""
+    return OrderNumberWorker.objects.filter(created_at__lt=cutoff)
+
+
+def stale_revoked_tokens(cutoff):
+    """Revoked tokens past their expiry, which authentication rejects anyway"""
+    return RevokedToken.objects.filter(expires_at__lt=cutoff)
+
+
+TARGETS = {
+    'carts': stale_carts,
+    'sessions': stale_sessions,
+    'email_verification_tokens': stale_email_verification_tokens,
+    'password_reset_tokens': stale_password_reset_tokens,
+    'stock_reservations': stale_stock_reservations,
+    'idempotency_keys': stale_idempotency_keys,
+    'outbox_events': stale_outbox_events,
+    'queued_emails': stale_queued_emails,
+    'revoked_tokens': stale_revoked_tokens,
+    'order_number_workers': stale_order_number_workers,
+}
+
+
+class Command(BaseCommand):
+    help = ('Delete abandoned guest carts, expired sessions, tokens, stock holds, idempotency keys '
+            'processed outbox events, sent emails, expired token revocations and old order number '
+            'worker leases in small batches')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--only', nargs='+', choices=list(TARGETS), help='Only purge these targets')
+        parser.add_argument('--retention', nargs='+', default=[], metavar='TARGET=DAYS',
+                            help='Override retention in days, e.g. carts=14')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows deleted per batch')
+        parser.add_argument('--sleep', type=float, default=0.1, help='Seconds to sleep between batches')
+        parser.add_argument('--dry-run', action='store_true', help='Count rows without deleting them')
+
+    def handle(self, *args, **options):
+        retention = dict(settings.PURGE_STALE_DATA_RETENTION)
+        for override in options['retention']:
+            name, _, days = override.partition('=')
+            if name not in TARGETS or not days.isdigit():
+                raise CommandError(f'Invalid retention override: {override}')
+            retention[name] = int(days)
+
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size must be positive')
+
+        targets = options['only'] or list(TARGETS)
+        missing = [name for name in targets if name not in retention]
+        if missing:
+            raise CommandError(f"No retention set for {', '.join(missing)} in PURGE_STALE_DATA_RETENTION")
+
+        now = timezone.now()
+        for name in targets:
+            cutoff = now - timedelta(days=retention[name])
+            queryset = TARGETS[name](cutoff)
+            self.purge(name, queryset, options['batch_size'], options['sleep'], options['dry_run'])
+
+    def purge(self, name, queryset, batch_size, sleep, dry_run):
+        """Walk the stale rows in primary-key order and delete them one bounded range at a time"""
+        model = queryset.model
+        started = time.monotonic()
+        total = 0
+        last_pk = None
+
+        while True:
+            batch = queryset.order_by('pk')
+            if last_pk is not None:
+                batch = batch.filter(pk__gt=last_pk)
+            pks = list(batch.values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                break
+
+            if not dry_run:
+                # Delete by key range with the stale filter re-applied, so rows
+                # touched since the scan survive
+                chunk = queryset.filter(pk__lte=pks[-1])
+                if last_pk is not None:
+                    chunk = chunk.filter(pk__gt=last_pk)
+                # Count only the target model's rows, not cascaded ones
+                _, deleted = chunk.delete()
+                total += deleted.get(model._meta.label, 0)
+            else:
+                total += len(pks)
+            last_pk = pks[-1]
+
+            if len(pks) < batch_size:
+                break
+            if sleep:
+                time.sleep(sleep)
+
+        elapsed = time.monotonic() - started
+        rate = total / elapsed if elapsed else 0
+        action = 'Would delete' if dry_run else 'Deleted'
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{action} {total} {model._meta.verbose_name_plural} in {elapsed:.2f}s ({rate:.0f} rows/s)'
+            )
+        )
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cart', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cart',
+            index=models.Index(fields=['updated_at'], name='cart_cart_updated_c46eb6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cartitem',
+            index=models.Index(fields=['cart', 'updated_at'], name='cart_cartit_cart_id_97ca94_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:46
+
+from django.db import migrations, models
+import ecommerce.ids
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cart', '0002_cart_activity_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='cart',
+            name='id',
+            field=models.UUIDField(default=ecommerce.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='cartitem',
+            name='id',
+            field=models.UUIDField(default=ecommerce.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+    ]
@@ -1,14 +1,18 @@
-from django.db import models
+from django.db import models, transaction, IntegrityError
+from django.db.models import F
+from django.core.exceptions import ValidationError
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from products.models import Product
-import uuid
+from django.utils import timezone
+from products.models import Product, StockReservation
+from ecommerce.ids import uuid7
 
 User = get_user_model()
 
 
 class Cart(models.Model):
     """Shopping cart model"""
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='carts', null=True, blank=True)
     session_key = models.CharField(max_length=100, null=True, blank=True)  # For guest users
     created_at = models.DateTimeField(auto_now_add=True)
@@ -16,6 +20,9 @@ class Cart(models.Model):
     
     class Meta:
         unique_together = ['user', 'session_key']
+        indexes = [
+            models.Index(fields=['updated_at']),
+        ]
     
     def __str__(self):
         if self.user:
@@ -31,11 +38,72 @@ class Cart(models.Model):
     def total_price(self):
         """Calculate total price of all items in cart"""
         return sum(item.total_price for item in self.items.all())
+    
+    def add_item(self, product, quantity):
+        """Add quantity of a product to the cart as an atomic increment.
+        
+        The increment is a single ``UPDATE ... SET quantity = quantity + n``
+        (falling back to an insert for new lines), and the resulting total is
+        checked against stock in the same transaction, so concurrent adds
+        neither lose updates nor overshoot the available stock.
+        """
+        lines = CartItem.objects.filter(cart=self, product=product)
+        
+        with transaction.atomic():
+            updated = lines.update(quantity=F('quantity') + quantity, updated_at=timezone.now())
+            if not updated:
+                try:
+                    with transaction.atomic():
+                        CartItem.objects.create(cart=self, product=product, quantity=quantity)
+                except IntegrityError:
+                    # Another request created the line first, increment it instead
+                    lines.update(quantity=F('quantity') + quantity, updated_at=timezone.now())
+            
+            cart_item = lines.select_related('product').get()
+            reserved = StockReservation.reserved_quantities([product.pk], exclude_carts=[self])
+            available = cart_item.product.stock_quantity - reserved.get(product.pk, 0)
+            if cart_item.quantity > available:
+                raise ValidationError(f"Only {max(available, 0)} items available in stock")
+        
+        return cart_item
+    
+    def reserve_stock(self):
+        """Hold stock for every line in the cart for STOCK_RESERVATION_TTL.
+        
+        Any previous holds for this cart are replaced. The product rows are
+        locked while the holds are written so two checkouts cannot both take
+        the last units.
+        """
+        expires_at = timezone.now() + settings.STOCK_RESERVATION_TTL
+        
+        with transaction.atomic():
+            items = list(self.items.all())
+            product_ids = [item.product_id for item in items]
+            products = Product.objects.select_for_update().order_by('pk').in_bulk(product_ids)
+            reserved = StockReservation.reserved_quantities(product_ids, exclude_carts=[self])
+            
+            errors = {}
+            for item in items:
+                product = products[item.product_id]
+                available = product.stock_quantity - reserved.get(product.pk, 0)
+                if item.quantity > available:
+                    errors[str(product.pk)] = f"Only {max(available, 0)} items available in stock"
+            if errors:
+                raise ValidationError(errors)
+            
+            StockReservation.objects.filter(cart=self).delete()
+            StockReservation.objects.bulk_create([
+                StockReservation(cart=self, product_id=item.product_id,
+                                 quantity=item.quantity, expires_at=expires_at)
+                for item in items
+            ])
+        
+        return expires_at
 
 
 class CartItem(models.Model):
     """Individual items in shopping cart"""
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     cart = models.ForeignKey(Cart, on_delete=models.CASCADE, related_name='items')
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField(default=1)
@@ -44,6 +112,9 @@ class CartItem(models.Model):
     
     class Meta:
         unique_together = ['cart', 'product']
+        indexes = [
+            models.Index(fields=['cart', 'updated_at']),
+        ]
     
     def __str__(self):
         return f"{self.quantity}x {self.product.title}"
@@ -55,8 +126,6 @@ class CartItem(models.Model):
     
     def clean(self):
         """Validate cart item"""
-        from django.core.exceptions import ValidationError
-        
         if self.quantity > self.product.stock_quantity:
             raise ValidationError(f"Only {self.product.stock_quantity} items available in stock")
         
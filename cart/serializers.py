@@ -1,4 +1,7 @@
 from rest_framework import serializers
+from django.db import transaction
+from django.utils import timezone
+from products.models import Product, StockReservation
 from products.serializers import ProductListSerializer
 from .models import Cart, CartItem
 
@@ -38,8 +41,9 @@ class CartItemCreateUpdateSerializer(serializers.ModelSerializer):
     
     def validate(self, attrs):
         """Validate cart item"""
-        product = attrs['product']
-        quantity = attrs['quantity']
+        # Partial updates only send the fields that change
+        product = attrs.get('product', getattr(self.instance, 'product', None))
+        quantity = attrs.get('quantity', getattr(self.instance, 'quantity', None))
         
         if quantity > product.stock_quantity:
             raise serializers.ValidationError(
@@ -52,6 +56,121 @@ class CartItemCreateUpdateSerializer(serializers.ModelSerializer):
         return attrs
 
 
+class CartBatchOperationSerializer(serializers.Serializer):
+    """Single add/set/remove operation in a batch cart update"""
+    ACTION_CHOICES = [
+        ('add', 'Add'),
+        ('set', 'Set'),
+        ('remove', 'Remove'),
+    ]
+    
+    action = serializers.ChoiceField(choices=ACTION_CHOICES)
+    product = serializers.UUIDField()
+    quantity = serializers.IntegerField(required=False, min_value=0)
+    
+    def validate(self, attrs):
+        action = attrs['action']
+        quantity = attrs.get('quantity')
+        
+        if action == 'add' and not quantity:
+            raise serializers.ValidationError("Quantity must be greater than 0")
+        if action == 'set' and quantity is None:
+            raise serializers.ValidationError("Quantity is required")
+        
+        return attrs
 
 
-
+class CartBatchSerializer(serializers.Serializer):
+    """Apply a list of cart operations in a single request.
+    
+    Products are loaded with one ``in_bulk`` query and the existing cart
+    lines with one more; the changes are then written with at most one
+    ``bulk_create``, one ``bulk_update`` and one delete inside a transaction,
+    after re-reading the lines under a row lock.
+    """
+    operations = CartBatchOperationSerializer(many=True)
+    
+    def validate_operations(self, value):
+        if not value:
+            raise serializers.ValidationError("At least one operation is required")
+        return value
+    
+    def validate(self, attrs):
+        cart = self.context['cart']
+        operations = attrs['operations']
+        
+        products = Product.objects.in_bulk({op['product'] for op in operations})
+        reserved = StockReservation.reserved_quantities(list(products), exclude_carts=[cart])
+        items = {item.product_id: item for item in cart.items.all()}
+        
+        attrs['quantities'] = self.resolve(operations, items, products, reserved)
+        attrs['products'] = products
+        attrs['reserved'] = reserved
+        return attrs
+    
+    def resolve(self, operations, items, products, reserved):
+        """Replay the operations against the cart's current lines and return the resulting quantities"""
+        quantities = {product_id: item.quantity for product_id, item in items.items()}
+        for op in operations:
+            product_id = op['product']
+            if op['action'] == 'add':
+                quantities[product_id] = quantities.get(product_id, 0) + op['quantity']
+            elif op['action'] == 'set':
+                quantities[product_id] = op['quantity']
+            else:
+                quantities[product_id] = 0
+        
+        errors = {}
+        for op in operations:
+            product_id = op['product']
+            quantity = quantities[product_id]
+            if quantity <= 0 or str(product_id) in errors:
+                continue
+            product = products.get(product_id)
+            if product is None:
+                errors[str(product_id)] = "Product not found"
+            elif not product.is_active or product.status != 'approved':
+                errors[str(product_id)] = "Product is not available for purchase"
+            elif quantity > product.stock_quantity - reserved.get(product_id, 0):
+                available = max(product.stock_quantity - reserved.get(product_id, 0), 0)
+                errors[str(product_id)] = f"Only {available} items available in stock"
+        
+        if errors:
+            raise serializers.ValidationError({'operations': errors})
+        
+        return quantities
+    
+    def create(self, validated_data):
+        cart = self.context['cart']
+        
+        with transaction.atomic():
+            # Lock and re-read the lines so adds made since validation are not overwritten;
+            # a line another request inserts meanwhile still fails bulk_create with an IntegrityError
+            items = {item.product_id: item for item in cart.items.select_for_update()}
+            quantities = self.resolve(validated_data['operations'], items,
+                                      validated_data['products'], validated_data['reserved'])
+            
+            now = timezone.now()
+            to_create = []
+            to_update = []
+            to_delete = []
+            for product_id, quantity in quantities.items():
+                item = items.get(product_id)
+                if quantity <= 0:
+                    if item is not None:
+                        to_delete.append(item.id)
+                elif item is None:
+                    to_create.append(CartItem(cart=cart, product_id=product_id, quantity=quantity))
+                elif item.quantity != quantity:
+                    item.quantity = quantity
+                    item.updated_at = now
+                    to_update.append(item)
+            
+            if to_create:
+                CartItem.objects.bulk_create(to_create)
+            if to_update:
+                CartItem.objects.bulk_update(to_update, ['quantity', 'updated_at'])
+            if to_delete:
+                CartItem.objects.filter(cart=cart, id__in=to_delete).delete()
+        
+        return cart
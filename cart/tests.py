@@ -0,0 +1,73 @@
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test import TransactionTestCase
+from accounts.models import User
+from products.models import Category, Product
+from .models import Cart, CartItem
+import threading
+
+
+class ConcurrentAddItemTests(TransactionTestCase):
+    """Cart.add_item called from many threads at once on the same cart and product"""
+    threads = 8
+    adds_per_thread = 5
+
+    def setUp(self):
+        seller = User.objects.create_user(
+            email='seller@example.com', username='seller', first_name='Sam', last_name='Seller',
+            password='Seller-password-1', is_seller=True
+        )
+        shopper = User.objects.create_user(
+            email='shopper@example.com', username='shopper', first_name='Pat', last_name='Shopper',
+            password='Shopper-password-1'
+        )
+        self.product = Product.objects.create(
+            title='Mug', description='A mug', price=10, stock_quantity=1000,
+            category=Category.objects.create(name='Kitchen'), seller=seller, status='approved'
+        )
+        self.cart = Cart.objects.create(user=shopper)
+
+    def run_concurrently(self, quantity):
+        """Call add_item adds_per_thread times from each thread; returns how many adds succeeded"""
+        barrier = threading.Barrier(self.threads)
+        succeeded = []
+        errors = []
+
+        def work():
+            try:
+                barrier.wait()
+                for _ in range(self.adds_per_thread):
+                    try:
+                        self.cart.add_item(self.product, quantity)
+                    except ValidationError:
+                        continue
+                    succeeded.append(quantity)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=work) for _ in range(self.threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(errors, [])
+        return sum(succeeded)
+
+    def test_concurrent_adds_sum_up(self):
+        added = self.run_concurrently(2)
+
+        self.assertEqual(added, self.threads * self.adds_per_thread * 2)
+        self.assertEqual(CartItem.objects.get(cart=self.cart, product=self.product).quantity, added)
+
+    def test_concurrent_adds_never_exceed_stock(self):
+        Product.objects.filter(pk=self.product.pk).update(stock_quantity=25)
+
+        added = self.run_concurrently(2)
+
+        quantity = CartItem.objects.get(cart=self.cart, product=self.product).quantity
+        self.assertEqual(quantity, added)
+        self.assertLessEqual(quantity, 25)
+        self.assertEqual(quantity, 24)
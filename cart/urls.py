@@ -6,7 +6,10 @@ urlpatterns = [
     path('add/', views.add_to_cart, name='add_to_cart'),
     path('update/<uuid:item_id>/', views.update_cart_item, name='update_cart_item'),
     path('remove/<uuid:item_id>/', views.remove_from_cart, name='remove_from_cart'),
+    path('batch/', views.batch_update_cart, name='batch_update_cart'),
+    path('reserve/', views.reserve_cart, name='reserve_cart'),
     path('clear/', views.clear_cart, name='clear_cart'),
+    path('count/', views.cart_count, name='cart_count'),
     path('summary/', views.cart_summary, name='cart_summary'),
 ]
 
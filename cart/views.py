@@ -1,9 +1,16 @@
-from rest_framework import generics, status, permissions
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework import generics, status, permissions, serializers
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.response import Response
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError
+from django.db.models import Count, Max, Sum
+from ecommerce.throttling import CartWriteRateThrottle
+from orders.idempotency import idempotent
 from .models import Cart, CartItem
-from .serializers import CartSerializer, CartItemSerializer, CartItemCreateUpdateSerializer
+from .serializers import (
+    CartSerializer, CartItemSerializer, CartItemCreateUpdateSerializer, CartBatchSerializer
+)
 
 User = get_user_model()
 
@@ -41,17 +48,10 @@ class CartItemCreateView(generics.CreateAPIView):
         product = serializer.validated_data['product']
         quantity = serializer.validated_data['quantity']
         
-        # Check if item already exists in cart
-        cart_item, created = CartItem.objects.get_or_create(
-            cart=cart,
-            product=product,
-            defaults={'quantity': quantity}
-        )
-        
-        if not created:
-            # Update quantity if item already exists
-            cart_item.quantity += quantity
-            cart_item.save()
+        try:
+            serializer.instance = cart.add_item(product, quantity)
+        except DjangoValidationError as e:
+            raise serializers.ValidationError(e.messages)
 
 
 class CartItemUpdateView(generics.UpdateAPIView):
@@ -75,6 +75,8 @@ class CartItemDeleteView(generics.DestroyAPIView):
 
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
+@throttle_classes([CartWriteRateThrottle])
+@idempotent
 def add_to_cart(request):
     """Add product to cart"""
     serializer = CartItemCreateUpdateSerializer(data=request.data)
@@ -83,17 +85,10 @@ def add_to_cart(request):
         product = serializer.validated_data['product']
         quantity = serializer.validated_data['quantity']
         
-        # Check if item already exists in cart
-        cart_item, created = CartItem.objects.get_or_create(
-            cart=cart,
-            product=product,
-            defaults={'quantity': quantity}
-        )
-        
-        if not created:
-            # Update quantity if item already exists
-            cart_item.quantity += quantity
-            cart_item.save()
+        try:
+            cart_item = cart.add_item(product, quantity)
+        except DjangoValidationError as e:
+            return Response({'non_field_errors': e.messages}, status=status.HTTP_400_BAD_REQUEST)
         
         return Response({
             'message': 'Item added to cart successfully',
@@ -105,6 +100,7 @@ def add_to_cart(request):
 
 @api_view(['PUT'])
 @permission_classes([permissions.AllowAny])
+@idempotent
 def update_cart_item(request, item_id):
     """Update cart item quantity"""
     try:
@@ -127,6 +123,7 @@ def update_cart_item(request, item_id):
 
 @api_view(['DELETE'])
 @permission_classes([permissions.AllowAny])
+@idempotent
 def remove_from_cart(request, item_id):
     """Remove item from cart"""
     try:
@@ -142,8 +139,51 @@ def remove_from_cart(request, item_id):
         return Response({'error': 'Cart item not found'}, status=status.HTTP_404_NOT_FOUND)
 
 
+@api_view(['POST'])
+@permission_classes([permissions.AllowAny])
+@idempotent
+def batch_update_cart(request):
+    """Apply several add/set/remove operations to the cart at once"""
+    cart = get_or_create_cart(request)
+    serializer = CartBatchSerializer(data=request.data, context={'cart': cart})
+    if serializer.is_valid():
+        try:
+            serializer.save()
+        except IntegrityError:
+            # A concurrent request added one of these products to the cart first
+            return Response({
+                'error': 'The cart changed while it was being updated, please retry'
+            }, status=status.HTTP_409_CONFLICT)
+        return Response({
+            'message': 'Cart updated successfully',
+            'cart': CartSerializer(cart).data
+        }, status=status.HTTP_200_OK)
+    
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['POST'])
+@permission_classes([permissions.AllowAny])
+def reserve_cart(request):
+    """Hold stock for the cart's items while the user checks out"""
+    cart = get_or_create_cart(request)
+    try:
+        expires_at = cart.reserve_stock()
+    except DjangoValidationError as e:
+        return Response({
+            'error': 'Some items are no longer available in the requested quantity',
+            'details': e.message_dict
+        }, status=status.HTTP_409_CONFLICT)
+    
+    return Response({
+        'message': 'Cart items reserved',
+        'expires_at': expires_at
+    }, status=status.HTTP_200_OK)
+
+
 @api_view(['DELETE'])
 @permission_classes([permissions.AllowAny])
+@idempotent
 def clear_cart(request):
     """Clear all items from cart"""
     cart = get_or_create_cart(request)
@@ -154,6 +194,34 @@ def clear_cart(request):
     }, status=status.HTTP_200_OK)
 
 
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def cart_count(request):
+    """Get item count for the cart badge without loading the full cart"""
+    if request.user.is_authenticated:
+        items = CartItem.objects.filter(cart__user=request.user)
+    elif request.session.session_key:
+        items = CartItem.objects.filter(cart__session_key=request.session.session_key)
+    else:
+        items = CartItem.objects.none()
+    
+    counts = items.aggregate(
+        items=Count('id'),
+        quantity=Sum('quantity'),
+        last_updated=Max('updated_at'),
+    )
+    
+    # Changes whenever a line is added, updated or removed
+    last_updated = counts['last_updated']
+    version = f"{int(last_updated.timestamp() * 1000000) if last_updated else 0}-{counts['items']}"
+    
+    return Response({
+        'items': counts['items'],
+        'quantity': counts['quantity'] or 0,
+        'version': version
+    }, status=status.HTTP_200_OK)
+
+
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
 def cart_summary(request):
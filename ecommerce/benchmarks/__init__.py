@@ -0,0 +1,3 @@
+"""
+Seeded datasets and an endpoint catalogue for benchmarking the API.
+"""
@@ -0,0 +1,484 @@
+"""
+Deterministic benchmark datasets.
+
+Every value is drawn from random.Random streams seeded per table, primary
+keys included (uuid7s built from each row's seeded timestamp), so two
+databases seeded with the same scale and seed on the same day hold the same
+rows. Benchmark users are recognised by their email domain and catalogue
+rows by their name prefix, which is how they are found again and flushed.
+"""
+from array import array
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+from itertools import islice
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import reset_queries, transaction
+from django.utils import timezone
+from accounts.models import User, UserProfile
+from cart.models import Cart, CartItem
+from orders.models import Order, OrderItem, OrderStatusHistory, ShippingAddress
+from orders.rollups import rebuild_day
+from products.models import Brand, Category, Product, ProductImage, ProductReview, Tag, Wishlist
+import math
+import random
+import uuid
+
+EMAIL_DOMAIN = 'benchmark.invalid'
+PASSWORD = 'benchmark-password'
+NAME_PREFIX = 'Benchmark'
+BATCH_SIZE = 2000
+DELETE_BATCH_SIZE = 500  # Stays under SQLite's 999 query parameters
+
+SCALES = {
+    '1k': {
+        'products': 1_000, 'users': 500, 'categories': 20, 'brands': 40, 'tags': 50,
+        'orders': 1_000, 'carts': 200, 'days': 90,
+    },
+    '100k': {
+        'products': 100_000, 'users': 20_000, 'categories': 100, 'brands': 400, 'tags': 200,
+        'orders': 50_000, 'carts': 5_000, 'days': 365,
+    },
+    '1m': {
+        'products': 1_000_000, 'users': 100_000, 'categories': 200, 'brands': 1_000, 'tags': 500,
+        'orders': 250_000, 'carts': 20_000, 'days': 365,
+    },
+}
+
+ADJECTIVES = [
+    'Classic', 'Compact', 'Deluxe', 'Essential', 'Ultra', 'Smart', 'Portable', 'Premium',
+    'Wireless', 'Heavy-Duty', 'Eco', 'Pro', 'Mini', 'Vintage', 'Modern', 'Rugged',
+]
+NOUNS = [
+    'Headphones', 'Backpack', 'Blender', 'Lamp', 'Keyboard', 'Jacket', 'Camera', 'Kettle',
+    'Sneakers', 'Monitor', 'Tent', 'Speaker', 'Watch', 'Notebook', 'Drill', 'Chair',
+]
+FIRST_NAMES = ['Alex', 'Sam', 'Jordan', 'Taylor', 'Morgan', 'Casey', 'Riley', 'Jamie', 'Avery', 'Quinn']
+LAST_NAMES = ['Smith', 'Garcia', 'Chen', 'Okafor', 'Novak', 'Silva', 'Kim', 'Müller', 'Rossi', 'Dubois']
+CITIES = [
+    ('Springfield', 'IL', 'USA'), ('Toronto', 'ON', 'Canada'), ('Leeds', 'West Yorkshire', 'UK'),
+    ('Lyon', 'Auvergne-Rhône-Alpes', 'France'), ('Munich', 'Bavaria', 'Germany'), ('Austin', 'TX', 'USA'),
+]
+ORDER_STATUSES = (
+    ('pending', 10), ('processing', 10), ('shipped', 15), ('delivered', 55), ('cancelled', 7), ('refunded', 3),
+)
+PRODUCT_STATUSES = (('approved', 90), ('pending', 5), ('draft', 3), ('rejected', 2))
+
+
+def benchmark_users():
+    return User.objects.filter(email__endswith=f'@{EMAIL_DOMAIN}')
+
+
+def has_benchmark_data():
+    return benchmark_users().exists()
+
+
+def dataset_counts():
+    """Row counts of the tables the benchmark reads, for the results file"""
+    models = [
+        User, Category, Brand, Tag, Product, ProductImage, ProductReview, Wishlist,
+        Cart, CartItem, Order, OrderItem, ShippingAddress,
+    ]
+    return {model._meta.label: model.objects.count() for model in models}
+
+
+def seeded_uuid(rng, when):
+    """A uuid7 for a row created at when, its random bits drawn from rng"""
+    rand = rng.getrandbits(74)
+    value = (int(when.timestamp() * 1000) & 0xFFFFFFFFFFFF) << 80
+    value |= 0x7 << 76                        # version
+    value |= (rand >> 62) << 64               # rand_a
+    value |= 0x2 << 62                        # RFC 4122 variant
+    value |= rand & 0x3FFFFFFFFFFFFFFF        # rand_b
+    return uuid.UUID(int=value)
+
+
+def timestamps(model, when):
+    return {field.name: when for field in model._meta.concrete_fields if field.name in ('created_at', 'updated_at')}
+
+
+@contextmanager
+def manual_timestamps(*models):
+    """Keep the seeded created_at/updated_at values instead of letting bulk_create stamp now()"""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def batched(rows, size):
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+def weighted(rng, choices):
+    return rng.choices([value for value, _ in choices], [weight for _, weight in choices])[0]
+
+
+def product_title(index):
+    return f'{ADJECTIVES[index % len(ADJECTIVES)]} {NOUNS[index // len(ADJECTIVES) % len(NOUNS)]} {index}'
+
+
+def image_name(index, position):
+    return f'products/benchmark-{index}-{position}.jpg'
+
+
+def user_email(index):
+    return f'user{index}@{EMAIL_DOMAIN}'
+
+
+def user_name(index):
+    return FIRST_NAMES[index % len(FIRST_NAMES)], LAST_NAMES[index // len(FIRST_NAMES) % len(LAST_NAMES)]
+
+
+def user_address(index):
+    city, state, country = CITIES[index % len(CITIES)]
+    return {
+        'address': f'{index % 997 + 1} Benchmark Street',
+        'city': city,
+        'state': state,
+        'country': country,
+        'zip_code': f'{index % 90000 + 10000}',
+    }
+
+
+def delete_in_batches(queryset):
+    """Delete through the ORM a batch at a time, so cascades never load a whole table"""
+    deleted = 0
+    while pks := list(queryset.values_list('pk', flat=True)[:DELETE_BATCH_SIZE]):
+        with transaction.atomic():
+            deleted += queryset.model.objects.filter(pk__in=pks).delete()[0]
+    return deleted
+
+
+def flush(write=print):
+    """Delete all benchmark rows and rebuild the sales rollups they contributed to"""
+    users = benchmark_users()
+    orders = Order.objects.filter(user__in=users)
+    first = orders.order_by('created_at').values_list('created_at', flat=True).first()
+    last = orders.order_by('-created_at').values_list('created_at', flat=True).first()
+
+    for label, queryset in (
+        ('products', Product.objects.filter(seller__in=users)),
+        ('orders', orders),
+        ('users', users),
+        ('categories', Category.objects.filter(name__startswith=NAME_PREFIX)),
+        ('brands', Brand.objects.filter(name__startswith=NAME_PREFIX)),
+        ('tags', Tag.objects.filter(name__startswith=NAME_PREFIX.lower())),
+    ):
+        write(f'Deleting benchmark {label}...')
+        delete_in_batches(queryset)
+
+    if first is not None:
+        write('Rebuilding sales rollups...')
+        day = timezone.localdate(first)
+        while day <= timezone.localdate(last):
+            rebuild_day(day)
+            day += timedelta(days=1)
+
+
+class DatasetSeeder:
+    """Seed one scale of benchmark data, reporting progress through write"""
+
+    def __init__(self, scale, seed=0, write=print):
+        self.scale = scale
+        self.size = SCALES[scale]
+        self.seed = seed
+        self.write = write
+        self.counts = {}
+        # Timestamps are relative to the start of the seeding day, so the data is
+        # deterministic per day while the analytics windows still cover it
+        self.now = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        self.sellers = max(5, self.size['users'] // 25)
+
+    def random(self, table):
+        # One stream per table, so resizing one table leaves the others unchanged
+        return random.Random(f'{self.seed}:{table}')
+
+    def moment(self, rng, after=None):
+        """A seeded time within the dataset's window, later than after if given"""
+        start = after or self.now - timedelta(days=self.size['days'])
+        return start + (self.now - start) * rng.random()
+
+    def insert(self, *batches):
+        """bulk_create (model, rows) pairs in one transaction"""
+        with transaction.atomic():
+            for model, rows in batches:
+                model.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+                self.counts[model._meta.label] = self.counts.get(model._meta.label, 0) + len(rows)
+        reset_queries()  # Under DEBUG every multi-megabyte INSERT would stay in the query log
+
+    def seed_all(self):
+        models = (
+            User, UserProfile, Category, Brand, Tag, Product, ProductImage, ProductReview,
+            Wishlist, Cart, CartItem, Order, OrderStatusHistory, ShippingAddress,
+        )
+        with manual_timestamps(*models):
+            for step in (self.users, self.catalogue, self.products, self.shoppers, self.orders):
+                step()
+        self.rollups()
+        return self.counts
+
+    def users(self):
+        """Sellers first, then shoppers, then one staff user"""
+        self.write(f"Seeding {self.size['users']:,} users...")
+        rng = self.random('users')
+        password = make_password(PASSWORD)  # One hash for everyone; seeding every user's would take hours
+        self.user_ids = []
+
+        def rows():
+            for index in range(self.size['users'] + 1):
+                joined = self.moment(rng)
+                first_name, last_name = user_name(index)
+                staff = index == self.size['users']
+                user = User(
+                    id=seeded_uuid(rng, joined),
+                    username=f'benchmark-{index}',
+                    email=f'staff@{EMAIL_DOMAIN}' if staff else user_email(index),
+                    password=password,
+                    first_name=first_name,
+                    last_name=last_name,
+                    mobile_phone=f'+1555{index % 10_000_000:07d}',
+                    is_seller=index < self.sellers,
+                    is_staff=staff,
+                    is_verified=rng.random() < 0.9,
+                    date_joined=joined,
+                    **timestamps(User, joined)
+                )
+                self.user_ids.append(user.id)
+                address = user_address(index)
+                profile = UserProfile(
+                    user=user,
+                    address=address['address'],
+                    city=address['city'],
+                    country=address['country'],
+                    **timestamps(UserProfile, joined)
+                )
+                yield user, profile
+
+        for batch in batched(rows(), BATCH_SIZE):
+            users, profiles = zip(*batch)
+            self.insert((User, list(users)), (UserProfile, list(profiles)))
+        self.staff_id = self.user_ids[-1]
+
+    def catalogue(self):
+        self.write('Seeding categories, brands and tags...')
+        rng = self.random('catalogue')
+        self.category_names = [f'{NAME_PREFIX} {NOUNS[i % len(NOUNS)]} {i}' for i in range(self.size['categories'])]
+        self.brand_names = [f'{NAME_PREFIX} Brand {i}' for i in range(self.size['brands'])]
+        categories, brands, tags = [], [], []
+        for name in self.category_names:
+            when = self.moment(rng)
+            categories.append(Category(id=seeded_uuid(rng, when), name=name, description=f'{name} products',
+                                       **timestamps(Category, when)))
+        for name in self.brand_names:
+            when = self.moment(rng)
+            brands.append(Brand(id=seeded_uuid(rng, when), name=name, description=f'{name} products',
+                                **timestamps(Brand, when)))
+        for i in range(self.size['tags']):
+            when = self.moment(rng)
+            tags.append(Tag(id=seeded_uuid(rng, when), name=f'{NAME_PREFIX.lower()}-tag-{i}',
+                            color=f'#{rng.getrandbits(24):06x}', **timestamps(Tag, when)))
+        self.insert((Category, categories), (Brand, brands), (Tag, tags))
+        self.category_ids = [category.id for category in categories]
+        self.brand_ids = [brand.id for brand in brands]
+        self.tag_ids = [tag.id for tag in tags]
+
+    def products(self):
+        """Products with their images, reviews and tags, one batch of products at a time"""
+        count = self.size['products']
+        self.write(f'Seeding {count:,} products with images, reviews and tags...')
+        rng = self.random('products')
+        shoppers = range(self.sellers, self.size['users'])
+        # Only what orders and carts need later is kept, in compact arrays
+        self.product_ids = []
+        self.product_price = array('q')
+        self.product_seller = array('q')
+        self.product_category = array('q')
+        self.product_brand = array('q')
+        self.orderable = array('q')
+        Tagging = Product.tags.through
+
+        for start in range(0, count, BATCH_SIZE):
+            products, images, reviews, taggings = [], [], [], []
+            for index in range(start, min(start + BATCH_SIZE, count)):
+                when = self.moment(rng)
+                cents = int(math.exp(rng.uniform(math.log(200), math.log(200_000))))
+                seller = rng.randrange(self.sellers)
+                category = rng.randrange(len(self.category_ids))
+                brand = rng.randrange(len(self.brand_ids)) if rng.random() < 0.9 else -1
+                status = weighted(rng, PRODUCT_STATUSES)
+                stock = 0 if rng.random() < 0.05 else rng.randint(1, 500)
+                is_active = rng.random() < 0.97
+                discount = rng.choice([5, 10, 15, 20, 25, 50]) if rng.random() < 0.15 else 0
+                product = Product(
+                    id=seeded_uuid(rng, when),
+                    title=product_title(index),
+                    description=f'{product_title(index)} from the seeded benchmark catalogue, built to last.',
+                    price=Decimal(cents) / 100,
+                    stock_quantity=stock,
+                    category_id=self.category_ids[category],
+                    brand_id=self.brand_ids[brand] if brand >= 0 else None,
+                    seller_id=self.user_ids[seller],
+                    discount_percentage=discount,
+                    discount_start_date=self.now - timedelta(days=7) if discount else None,
+                    discount_end_date=self.now + timedelta(days=7) if discount else None,
+                    status=status,
+                    is_featured=rng.random() < 0.02,
+                    is_active=is_active,
+                    **timestamps(Product, when)
+                )
+                products.append(product)
+                self.product_ids.append(product.id)
+                self.product_price.append(cents)
+                self.product_seller.append(seller)
+                self.product_category.append(category)
+                self.product_brand.append(brand)
+                if status == 'approved' and is_active and stock:
+                    self.orderable.append(index)
+
+                for position in range(rng.randint(1, 3)):
+                    images.append(ProductImage(
+                        id=seeded_uuid(rng, when), product=product, image=image_name(index, position),
+                        is_primary=position == 0, alt_text=product.title, **timestamps(ProductImage, when)
+                    ))
+                for shopper in rng.sample(shoppers, min(rng.randint(0, 5), len(shoppers))):
+                    reviewed = self.moment(rng, after=when)
+                    reviews.append(ProductReview(
+                        id=seeded_uuid(rng, reviewed), product=product, user_id=self.user_ids[shopper],
+                        rating=rng.choices(range(1, 6), [5, 5, 15, 35, 40])[0],
+                        title=f'Review of {product.title}', comment='Seeded benchmark review. ' * 3,
+                        is_verified_purchase=rng.random() < 0.6, **timestamps(ProductReview, reviewed)
+                    ))
+                for tag in rng.sample(range(len(self.tag_ids)), rng.randint(0, 3)):
+                    taggings.append(Tagging(product_id=product.id, tag_id=self.tag_ids[tag]))
+
+            self.insert((Product, products), (ProductImage, images), (ProductReview, reviews), (Tagging, taggings))
+            if (start // BATCH_SIZE) % 50 == 49:
+                self.write(f'  {start + BATCH_SIZE:,} products')
+
+    def shoppers(self):
+        """Saved addresses for every shopper, and carts and wishlists for some"""
+        self.write('Seeding shipping addresses, carts and wishlists...')
+        rng = self.random('shoppers')
+        shoppers = range(self.sellers, self.size['users'])
+
+        for batch in batched(shoppers, BATCH_SIZE):
+            addresses = []
+            for index in batch:
+                when = self.moment(rng)
+                first_name, last_name = user_name(index)
+                addresses.append(ShippingAddress(
+                    id=seeded_uuid(rng, when), user_id=self.user_ids[index], first_name=first_name,
+                    last_name=last_name, email=user_email(index), phone=f'+1555{index % 10_000_000:07d}',
+                    is_default=True, **user_address(index), **timestamps(ShippingAddress, when)
+                ))
+            self.insert((ShippingAddress, addresses))
+
+        carts = min(self.size['carts'], len(shoppers))
+        chosen = rng.sample(shoppers, carts)
+        for batch in batched(chosen, BATCH_SIZE):
+            rows, items, wishes = [], [], []
+            for index in batch:
+                when = self.moment(rng, after=self.now - timedelta(days=14))
+                cart = Cart(id=seeded_uuid(rng, when), user_id=self.user_ids[index], **timestamps(Cart, when))
+                rows.append(cart)
+                for product in rng.sample(self.orderable, min(rng.randint(1, 5), len(self.orderable))):
+                    items.append(CartItem(
+                        id=seeded_uuid(rng, when), cart=cart, product_id=self.product_ids[product],
+                        quantity=rng.randint(1, 2), **timestamps(CartItem, when)
+                    ))
+                for product in rng.sample(self.orderable, min(rng.randint(0, 8), len(self.orderable))):
+                    wished = self.moment(rng)
+                    wishes.append(Wishlist(
+                        id=seeded_uuid(rng, wished), user_id=self.user_ids[index],
+                        product_id=self.product_ids[product], **timestamps(Wishlist, wished)
+                    ))
+            self.insert((Cart, rows), (CartItem, items), (Wishlist, wishes))
+
+    def orders(self):
+        count = self.size['orders']
+        self.write(f'Seeding {count:,} orders...')
+        rng = self.random('orders')
+        recent = self.now - timedelta(days=2)
+
+        for start in range(0, count, BATCH_SIZE):
+            orders, items, history = [], [], []
+            for number in range(start, min(start + BATCH_SIZE, count)):
+                when = self.moment(rng)
+                shopper = rng.randrange(self.sellers, self.size['users'])
+                status = rng.choice(['pending', 'processing']) if when > recent else weighted(rng, ORDER_STATUSES)
+                first_name, last_name = user_name(shopper)
+                address = user_address(shopper)
+                order = Order(
+                    id=seeded_uuid(rng, when),
+                    order_number=f'BEN{number:013d}',
+                    user_id=self.user_ids[shopper],
+                    status=status,
+                    payment_status={'pending': 'pending', 'cancelled': 'failed', 'refunded': 'refunded'}.get(status, 'paid'),
+                    subtotal=0,
+                    total_amount=0,
+                    shipping_first_name=first_name,
+                    shipping_last_name=last_name,
+                    shipping_email=user_email(shopper),
+                    shipping_phone=f'+1555{shopper % 10_000_000:07d}',
+                    shipping_address=address['address'],
+                    shipping_city=address['city'],
+                    shipping_state=address['state'],
+                    shipping_country=address['country'],
+                    shipping_zip_code=address['zip_code'],
+                    shipped_at=when + timedelta(days=1) if status in ('shipped', 'delivered', 'refunded') else None,
+                    delivered_at=when + timedelta(days=3) if status in ('delivered', 'refunded') else None,
+                    **timestamps(Order, when)
+                )
+
+                subtotal = Decimal('0')
+                for product in rng.sample(self.orderable, min(rng.randint(1, 4), len(self.orderable))):
+                    unit_price = Decimal(self.product_price[product]) / 100
+                    quantity = rng.randint(1, 3)
+                    brand = self.product_brand[product]
+                    item = OrderItem(
+                        id=seeded_uuid(rng, when), order=order, product_id=self.product_ids[product],
+                        seller_id=self.user_ids[self.product_seller[product]], quantity=quantity,
+                        unit_price=unit_price, total_price=unit_price * quantity,
+                        product_title=product_title(product),
+                        product_image=settings.MEDIA_URL + image_name(product, 0),
+                        product_attributes={
+                            'category': self.category_names[self.product_category[product]],
+                            'brand': self.brand_names[brand] if brand >= 0 else None,
+                            'list_price': str(unit_price),
+                            'discount_percentage': '0.00',
+                        },
+                        placed_at=when
+                    )
+                    items.append(item)
+                    subtotal += item.total_price
+
+                order.subtotal = subtotal
+                order.shipping_cost = Decimal('10.00')
+                order.tax_amount = subtotal * Decimal('0.1')
+                order.total_amount = subtotal + order.shipping_cost + order.tax_amount
+                orders.append(order)
+                history.append(OrderStatusHistory(
+                    id=seeded_uuid(rng, when), order=order, status=status, note='Seeded for benchmarking',
+                    **timestamps(OrderStatusHistory, when)
+                ))
+
+            self.insert((Order, orders), (OrderItem, items), (OrderStatusHistory, history))
+
+    def rollups(self):
+        self.write('Rebuilding sales rollups...')
+        day = timezone.localdate(self.now - timedelta(days=self.size['days']))
+        while day <= timezone.localdate(self.now):
+            rebuild_day(day)
+            day += timedelta(days=1)
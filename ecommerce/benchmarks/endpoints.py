@@ -0,0 +1,493 @@
+"""
+The endpoints the API benchmark drives and the request each iteration sends.
+
+Builders run before the timed request, inside the transaction the client
+transport rolls back, so write endpoints may create the rows they consume.
+Every builder spreads its requests over a pool of seeded rows and users so
+no single row, cache entry or throttle key is hit on every iteration.
+"""
+from datetime import timedelta
+from importlib import import_module
+from django.utils import timezone
+from accounts.models import EmailVerificationToken, PasswordResetToken, User
+from accounts.views import get_tokens_for_user
+from cart.models import CartItem
+from orders.models import Order, ShippingAddress
+from products.models import Brand, Category, Product, ProductReview, Wishlist
+from .datasets import NAME_PREFIX, NOUNS, PASSWORD, benchmark_users
+
+BENCHMARKED_URLCONFS = ('products.urls', 'cart.urls', 'orders.urls', 'accounts.urls')
+NEW_PASSWORD = 'Benchmark-password-2'
+
+ENDPOINTS = []
+
+
+class Endpoint:
+    """One benchmarked request shape: a URL name, a method and a builder for each iteration's request"""
+
+    def __init__(self, url_name, method, build, variant='', writes=False):
+        self.url_name = url_name
+        self.method = method
+        self.build = build
+        self.variant = variant
+        self.writes = writes
+
+    @property
+    def key(self):
+        key = f'{self.method} {self.url_name}'
+        return f'{key} [{self.variant}]' if self.variant else key
+
+
+class Call:
+    """The request for one iteration; user None sends it anonymously"""
+
+    def __init__(self, user=None, kwargs=None, query=None, data=None, access=None):
+        self.user = user
+        self.kwargs = kwargs or {}
+        self.query = query or {}
+        self.data = data
+        self.access = access  # Sent instead of the user's shared access token
+
+
+def endpoint(url_name, method='GET', variant='', writes=False):
+    def register(build):
+        ENDPOINTS.append(Endpoint(url_name, method, build, variant, writes))
+        return build
+    return register
+
+
+def uncovered_url_names():
+    """URL names in the benchmarked apps that no endpoint drives"""
+    names = set()
+    for urlconf in BENCHMARKED_URLCONFS:
+        names.update(pattern.name for pattern in import_module(urlconf).urlpatterns)
+    return sorted(names - {endpoint.url_name for endpoint in ENDPOINTS})
+
+
+class Fixtures:
+    """Seeded rows the requests are spread over, loaded once per run"""
+
+    def __init__(self, size=200):
+        users = benchmark_users()
+        self.pools = {
+            # Verified, so they can also sign in
+            'shoppers': list(users.filter(is_seller=False, is_staff=False, is_verified=True).order_by('id')
+                             .values_list('id', flat=True)[:size]),
+            'sellers': list(users.filter(is_seller=True).order_by('id').values_list('id', flat=True)[:size]),
+            'products': list(Product.objects.filter(seller__in=users, status='approved', is_active=True,
+                                                    stock_quantity__gte=10)
+                             .order_by('id').values_list('id', 'seller_id')[:size]),
+            'categories': list(Category.objects.filter(name__startswith=NAME_PREFIX).order_by('id')
+                               .values_list('id', flat=True)[:size]),
+            'brands': list(Brand.objects.filter(name__startswith=NAME_PREFIX).order_by('id')
+                           .values_list('id', flat=True)[:size]),
+            'cart_lines': list(CartItem.objects.filter(cart__user__in=users).order_by('id')
+                               .values_list('cart__user_id', 'id')[:size]),
+            'orders': list(Order.objects.filter(user__in=users).order_by('id')
+                           .values_list('user_id', 'id')[:size]),
+            'pending_orders': list(Order.objects.filter(user__in=users, status='pending').order_by('id')
+                                   .values_list('id', flat=True)[:size]),
+            'wishlists': list(Wishlist.objects.filter(user__in=users).order_by('id')
+                              .values_list('user_id', 'id')[:size]),
+            'addresses': list(ShippingAddress.objects.filter(user__in=users).order_by('id')
+                              .values_list('user_id', 'id')[:size]),
+        }
+        self.staff = users.filter(is_staff=True).values_list('id', flat=True).first()
+        self.users = {}
+
+    def pick(self, pool, i):
+        rows = self.pools[pool]
+        if not rows:
+            raise LookupError(f'The benchmark dataset has no {pool.replace("_", " ")}')
+        return rows[i % len(rows)]
+
+    def user(self, pk):
+        if pk not in self.users:
+            self.users[pk] = User.objects.get(pk=pk)
+        return self.users[pk]
+
+    def tokens(self, pk):
+        """A fresh refresh and access token pair, for requests that revoke or rotate them"""
+        return get_tokens_for_user(self.user(pk))
+
+
+# Products
+
+@endpoint('category_list_create')
+def list_categories(fixtures, i):
+    return Call()
+
+
+@endpoint('category_list_create', 'POST', writes=True)
+def create_category(fixtures, i):
+    return Call(fixtures.staff, data={'name': f'{NAME_PREFIX} run category {i}', 'description': 'Benchmark'})
+
+
+@endpoint('category_detail')
+def category_detail(fixtures, i):
+    return Call(kwargs={'pk': fixtures.pick('categories', i)})
+
+
+@endpoint('brand_list_create')
+def list_brands(fixtures, i):
+    return Call()
+
+
+@endpoint('brand_list_create', 'POST', writes=True)
+def create_brand(fixtures, i):
+    return Call(fixtures.staff, data={'name': f'{NAME_PREFIX} run brand {i}', 'description': 'Benchmark'})
+
+
+@endpoint('brand_detail')
+def brand_detail(fixtures, i):
+    return Call(kwargs={'pk': fixtures.pick('brands', i)})
+
+
+@endpoint('tag_list_create')
+def list_tags(fixtures, i):
+    return Call()
+
+
+@endpoint('tag_list_create', 'POST', writes=True)
+def create_tag(fixtures, i):
+    return Call(fixtures.staff, data={'name': f'{NAME_PREFIX.lower()}-run-tag-{i}'})
+
+
+@endpoint('product_list_create')
+def list_products(fixtures, i):
+    return Call()
+
+
+@endpoint('product_list_create', variant='search')
+def search_products(fixtures, i):
+    return Call(query={'search': NOUNS[i % len(NOUNS)]})
+
+
+@endpoint('product_list_create', variant='category')
+def list_category_products(fixtures, i):
+    return Call(query={'category': fixtures.pick('categories', i), 'ordering': 'price'})
+
+
+@endpoint('product_list_create', 'POST', writes=True)
+def create_product(fixtures, i):
+    return Call(fixtures.pick('sellers', i), data={
+        'title': f'Benchmark run product {i}',
+        'description': 'Created by the API benchmark',
+        'price': '19.99',
+        'stock_quantity': 10,
+        'category': fixtures.pick('categories', i),
+        'brand': fixtures.pick('brands', i),
+    })
+
+
+@endpoint('product_search')
+def advanced_search(fixtures, i):
+    return Call(query={'min_price': 20, 'max_price': 200, 'min_rating': 4})
+
+
+@endpoint('featured_products')
+def featured_products(fixtures, i):
+    return Call()
+
+
+@endpoint('product_detail')
+def product_detail(fixtures, i):
+    product, _ = fixtures.pick('products', i)
+    return Call(kwargs={'pk': product})
+
+
+@endpoint('product_detail', 'PATCH', writes=True)
+def update_product(fixtures, i):
+    product, seller = fixtures.pick('products', i)
+    return Call(seller, kwargs={'pk': product}, data={'stock_quantity': 100 + i % 10})
+
+
+@endpoint('product_stats')
+def product_stats(fixtures, i):
+    product, _ = fixtures.pick('products', i)
+    return Call(kwargs={'product_id': product})
+
+
+@endpoint('product_reviews')
+def list_reviews(fixtures, i):
+    product, _ = fixtures.pick('products', i)
+    return Call(kwargs={'product_id': product})
+
+
+@endpoint('product_reviews', 'POST', writes=True)
+def create_review(fixtures, i):
+    product, _ = fixtures.pick('products', i)
+    shopper = fixtures.pick('shoppers', i)
+    ProductReview.objects.filter(product_id=product, user_id=shopper).delete()
+    return Call(shopper, kwargs={'product_id': product},
+                data={'rating': 4, 'title': 'Benchmark review', 'comment': 'Written by the API benchmark'})
+
+
+@endpoint('wishlist_list_create')
+def list_wishlist(fixtures, i):
+    user, _ = fixtures.pick('wishlists', i)
+    return Call(user)
+
+
+@endpoint('wishlist_list_create', 'POST', writes=True)
+def add_to_wishlist(fixtures, i):
+    product, _ = fixtures.pick('products', i)
+    shopper = fixtures.pick('shoppers', i)
+    Wishlist.objects.filter(product_id=product, user_id=shopper).delete()
+    return Call(shopper, data={'product': product})
+
+
+@endpoint('wishlist_detail', 'DELETE', writes=True)
+def remove_from_wishlist(fixtures, i):
+    user, wishlist = fixtures.pick('wishlists', i)
+    return Call(user, kwargs={'pk': wishlist})
+
+
+@endpoint('toggle_wishlist', 'POST', writes=True)
+def toggle_wishlist(fixtures, i):
+    product, _ = fixtures.pick('products', i)
+    return Call(fixtures.pick('shoppers', i), kwargs={'product_id': product})
+
+
+# Cart
+
+@endpoint('cart_detail')
+def cart_detail(fixtures, i):
+    user, _ = fixtures.pick('cart_lines', i)
+    return Call(user)
+
+
+@endpoint('add_to_cart', 'POST', writes=True)
+def add_to_cart(fixtures, i):
+    user, _ = fixtures.pick('cart_lines', i)
+    product, _ = fixtures.pick('products', i)
+    return Call(user, data={'product': product, 'quantity': 1})
+
+
+@endpoint('update_cart_item', 'PUT', writes=True)
+def update_cart_item(fixtures, i):
+    user, line = fixtures.pick('cart_lines', i)
+    return Call(user, kwargs={'item_id': line}, data={'quantity': 2})
+
+
+@endpoint('remove_from_cart', 'DELETE', writes=True)
+def remove_from_cart(fixtures, i):
+    user, line = fixtures.pick('cart_lines', i)
+    return Call(user, kwargs={'item_id': line})
+
+
+@endpoint('batch_update_cart', 'POST', writes=True)
+def batch_update_cart(fixtures, i):
+    user, _ = fixtures.pick('cart_lines', i)
+    operations = [
+        {'action': 'add', 'product': fixtures.pick('products', i + offset)[0], 'quantity': 1}
+        for offset in range(3)
+    ]
+    operations.append({'action': 'set', 'product': operations[0]['product'], 'quantity': 2})
+    return Call(user, data={'operations': operations})
+
+
+@endpoint('reserve_cart', 'POST', writes=True)
+def reserve_cart(fixtures, i):
+    user, _ = fixtures.pick('cart_lines', i)
+    return Call(user)
+
+
+@endpoint('clear_cart', 'DELETE', writes=True)
+def clear_cart(fixtures, i):
+    user, _ = fixtures.pick('cart_lines', i)
+    return Call(user)
+
+
+@endpoint('cart_count')
+def cart_count(fixtures, i):
+    user, _ = fixtures.pick('cart_lines', i)
+    return Call(user)
+
+
+@endpoint('cart_summary')
+def cart_summary(fixtures, i):
+    user, _ = fixtures.pick('cart_lines', i)
+    return Call(user)
+
+
+# Orders
+
+@endpoint('order_list_create')
+def list_orders(fixtures, i):
+    user, _ = fixtures.pick('orders', i)
+    return Call(user)
+
+
+@endpoint('order_list_create', 'POST', writes=True)
+def create_order(fixtures, i):
+    shopper = fixtures.pick('shoppers', i)
+    user = fixtures.user(shopper)
+    return Call(shopper, data={
+        'shipping_first_name': user.first_name,
+        'shipping_last_name': user.last_name,
+        'shipping_email': user.email,
+        'shipping_phone': user.mobile_phone,
+        'shipping_address': '1 Benchmark Street',
+        'shipping_city': 'Springfield',
+        'shipping_state': 'IL',
+        'shipping_country': 'USA',
+        'shipping_zip_code': '62701',
+        'items': [{'product_id': str(fixtures.pick('products', i + offset)[0]), 'quantity': 1} for offset in range(2)],
+    })
+
+
+@endpoint('order_detail')
+def order_detail(fixtures, i):
+    user, order = fixtures.pick('orders', i)
+    return Call(user, kwargs={'pk': order})
+
+
+@endpoint('order_status_update', 'PATCH', writes=True)
+def update_order_status(fixtures, i):
+    return Call(fixtures.staff, kwargs={'pk': fixtures.pick('pending_orders', i)}, data={'status': 'processing'})
+
+
+@endpoint('fulfilment_queue')
+def fulfilment_queue(fixtures, i):
+    return Call(fixtures.pick('sellers', i))
+
+
+@endpoint('bulk_update_order_status', 'POST', writes=True)
+def bulk_update_order_status(fixtures, i):
+    order_ids = [str(fixtures.pick('pending_orders', i + offset)) for offset in range(20)]
+    return Call(fixtures.staff, data={'order_ids': order_ids, 'status': 'processing'})
+
+
+@endpoint('order_stats')
+def order_stats(fixtures, i):
+    user, _ = fixtures.pick('orders', i)
+    return Call(user)
+
+
+@endpoint('seller_stats')
+def seller_stats(fixtures, i):
+    return Call(fixtures.pick('sellers', i))
+
+
+@endpoint('admin_stats')
+def admin_stats(fixtures, i):
+    return Call(fixtures.staff)
+
+
+@endpoint('outbox_status')
+def outbox_status(fixtures, i):
+    return Call(fixtures.staff)
+
+
+@endpoint('sales_analytics')
+def platform_analytics(fixtures, i):
+    return Call(fixtures.staff, query={'granularity': 'week'})
+
+
+@endpoint('sales_analytics', variant='seller')
+def seller_analytics(fixtures, i):
+    return Call(fixtures.pick('sellers', i))
+
+
+@endpoint('shipping_address_list_create')
+def list_addresses(fixtures, i):
+    user, _ = fixtures.pick('addresses', i)
+    return Call(user)
+
+
+@endpoint('shipping_address_list_create', 'POST', writes=True)
+def create_address(fixtures, i):
+    user, _ = fixtures.pick('addresses', i)
+    return Call(user, data={
+        'first_name': 'Bench', 'last_name': 'Mark', 'email': f'address{i}@benchmark.invalid',
+        'phone': '+15550000000', 'address': '2 Benchmark Street', 'city': 'Leeds',
+        'state': 'West Yorkshire', 'country': 'UK', 'zip_code': 'LS1 1AA',
+    })
+
+
+@endpoint('shipping_address_detail')
+def address_detail(fixtures, i):
+    user, address = fixtures.pick('addresses', i)
+    return Call(user, kwargs={'pk': address})
+
+
+@endpoint('shipping_address_detail', 'PATCH', writes=True)
+def update_address(fixtures, i):
+    user, address = fixtures.pick('addresses', i)
+    return Call(user, kwargs={'pk': address}, data={'city': 'Lyon'})
+
+
+# Accounts
+
+@endpoint('register', 'POST', writes=True)
+def register(fixtures, i):
+    return Call(data={
+        'email': f'new{i}@benchmark.invalid', 'username': f'benchmark-new-{i}',
+        'first_name': 'New', 'last_name': 'Shopper', 'password': NEW_PASSWORD, 'confirm_password': NEW_PASSWORD,
+    })
+
+
+@endpoint('login', 'POST', writes=True)
+def login(fixtures, i):
+    return Call(data={'email': fixtures.user(fixtures.pick('shoppers', i)).email, 'password': PASSWORD})
+
+
+@endpoint('logout', 'POST', writes=True)
+def logout(fixtures, i):
+    shopper = fixtures.pick('shoppers', i)
+    tokens = fixtures.tokens(shopper)
+    return Call(shopper, data={'refresh': tokens['refresh']}, access=tokens['access'])
+
+
+@endpoint('token_refresh', 'POST', writes=True)
+def token_refresh(fixtures, i):
+    return Call(data={'refresh': fixtures.tokens(fixtures.pick('shoppers', i))['refresh']})
+
+
+@endpoint('verify_email', 'POST', writes=True)
+def verify_email(fixtures, i):
+    token = EmailVerificationToken.objects.create(
+        user_id=fixtures.pick('shoppers', i), expires_at=timezone.now() + timedelta(days=1)
+    )
+    return Call(kwargs={'token': token.token})
+
+
+@endpoint('password_reset_request', 'POST', writes=True)
+def password_reset_request(fixtures, i):
+    return Call(data={'email': fixtures.user(fixtures.pick('shoppers', i)).email})
+
+
+@endpoint('password_reset_confirm', 'POST', writes=True)
+def password_reset_confirm(fixtures, i):
+    token = PasswordResetToken.objects.create(
+        user_id=fixtures.pick('shoppers', i), expires_at=timezone.now() + timedelta(hours=1)
+    )
+    return Call(data={'token': str(token.token), 'new_password': NEW_PASSWORD, 'confirm_password': NEW_PASSWORD})
+
+
+@endpoint('user_profile')
+def profile(fixtures, i):
+    return Call(fixtures.pick('shoppers', i))
+
+
+@endpoint('user_profile', 'PATCH', writes=True)
+def update_profile(fixtures, i):
+    return Call(fixtures.pick('shoppers', i), data={'city': 'Toronto', 'country': 'Canada'})
+
+
+@endpoint('change_password', 'POST', writes=True)
+def change_password(fixtures, i):
+    return Call(fixtures.pick('shoppers', i), data={
+        'old_password': PASSWORD, 'new_password': NEW_PASSWORD, 'confirm_password': NEW_PASSWORD,
+    })
+
+
+@endpoint('user_info')
+def user_info(fixtures, i):
+    return Call(fixtures.pick('shoppers', i))
+
+
+@endpoint('user_info', variant='profile')
+def user_info_with_profile(fixtures, i):
+    return Call(fixtures.pick('shoppers', i), query={'include': 'profile'})
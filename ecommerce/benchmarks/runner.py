@@ -0,0 +1,260 @@
+"""
+Drive the endpoint catalogue and summarise latency, queries and memory per endpoint.
+"""
+from contextlib import contextmanager, nullcontext
+from ipaddress import IPv4Address
+from urllib.parse import urlencode, urlsplit
+from django.db import connection, transaction
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.utils.encoders import JSONEncoder
+from .datasets import dataset_counts
+from .endpoints import Fixtures, uncovered_url_names
+import django
+import http.client
+import json
+import platform
+import random
+import statistics
+import time
+import tracemalloc
+
+# Anonymous requests come from the 198.18.0.0/15 benchmarking range, a new
+# address each, so per-address throttles never turn them into 429s
+BENCHMARK_NETWORK = int(IPv4Address('198.18.0.0'))
+BENCHMARK_ADDRESSES = 1 << 17
+
+SAVEPOINT_SQL = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+
+# Latency changes smaller than this are noise however large they are relatively
+LATENCY_NOISE_MS = 0.5
+
+
+class QueryCounter:
+    """execute_wrapper counting the request's queries, minus the savepoints of the rollback transaction"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        if not sql.startswith(SAVEPOINT_SQL):
+            self.count += 1
+        return execute(sql, params, many, context)
+
+
+class ClientTransport:
+    """Django's test client in this process; each request runs in a transaction that is rolled back"""
+    name = 'client'
+    rolls_back = True
+    traces_memory = True
+
+    def __init__(self):
+        self.client = Client(raise_request_exception=False)
+
+    def request(self, method, path, data, headers):
+        counter = QueryCounter()
+        body = json.dumps(data, cls=JSONEncoder) if data is not None else ''
+        with connection.execute_wrapper(counter):
+            response = self.client.generic(method, path, body, content_type='application/json', **headers)
+        return response.status_code, counter.count
+
+
+class LiveTransport:
+    """A running server. Only read endpoints run, since nothing rolls back writes;
+    queries come from its X-Query-Count header.
+
+    Each request opens its own connection: reusing one lets servers that write
+    headers and body separately (the dev server does) stall on delayed ACKs.
+    """
+    name = 'live'
+    rolls_back = False
+    traces_memory = False
+
+    def __init__(self, base_url):
+        url = urlsplit(base_url)
+        self.connection_class = http.client.HTTPSConnection if url.scheme == 'https' else http.client.HTTPConnection
+        self.host, self.port = url.hostname, url.port
+        self.prefix = url.path.rstrip('/')
+
+    def request(self, method, path, data, headers):
+        headers = {
+            key[5:].replace('_', '-').title(): value
+            for key, value in headers.items() if key.startswith('HTTP_')
+        }
+        body = None
+        if data is not None:
+            body = json.dumps(data, cls=JSONEncoder)
+            headers['Content-Type'] = 'application/json'
+        connection = self.connection_class(self.host, self.port, timeout=60)
+        try:
+            connection.request(method, self.prefix + path, body, headers)
+            response = connection.getresponse()
+            response.read()
+        finally:
+            connection.close()
+        queries = response.getheader('X-Query-Count')
+        return response.status, int(queries) if queries is not None else None
+
+
+@contextmanager
+def rolled_back():
+    with transaction.atomic():
+        yield
+        transaction.set_rollback(True)
+
+
+def percentile_summary(latencies):
+    cuts = statistics.quantiles(latencies, n=100, method='inclusive')
+    return {
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 3),
+        'p50_ms': round(cuts[49] * 1000, 3),
+        'p95_ms': round(cuts[94] * 1000, 3),
+        'p99_ms': round(cuts[98] * 1000, 3),
+        'max_ms': round(max(latencies) * 1000, 3),
+    }
+
+
+class BenchmarkRunner:
+    """Time requests + warmup iterations of every endpoint, then one more with tracemalloc on"""
+
+    def __init__(self, transport, requests=100, warmup=5, write=print):
+        self.transport = transport
+        self.requests = requests
+        self.warmup = warmup
+        self.write = write
+        self.fixtures = Fixtures()
+        self.sequence = 0
+        self.address_offset = random.randrange(BENCHMARK_ADDRESSES)
+
+    def run(self, endpoints, label=''):
+        results = {}
+        skipped = []
+        for endpoint in endpoints:
+            if endpoint.writes and not self.transport.rolls_back:
+                skipped.append(endpoint.key)
+                continue
+            results[endpoint.key] = result = self.measure(endpoint)
+            self.write(endpoint.key, result)
+
+        return {
+            'meta': {
+                'label': label,
+                'created_at': timezone.now().isoformat(),
+                'transport': self.transport.name,
+                'writes_rolled_back': self.transport.rolls_back,
+                'requests': self.requests,
+                'warmup': self.warmup,
+                'database': connection.vendor,
+                'django': django.get_version(),
+                'python': platform.python_version(),
+                'dataset': dataset_counts(),
+                'skipped': skipped,
+                'unbenchmarked_urls': uncovered_url_names(),
+            },
+            'endpoints': results,
+        }
+
+    def measure(self, endpoint):
+        self.tokens = {}  # Minted per endpoint so long runs never outlive the access token lifetime
+        latencies, queries, statuses = [], [], {}
+        for i in range(self.warmup + self.requests):
+            status, elapsed, count, _ = self.call(endpoint, i)
+            if i < self.warmup:
+                continue
+            latencies.append(elapsed)
+            if count is not None:
+                queries.append(count)
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+        peak = None
+        if self.transport.traces_memory:
+            _, _, _, peak = self.call(endpoint, self.warmup + self.requests, trace_memory=True)
+
+        return {
+            'method': endpoint.method,
+            'url_name': endpoint.url_name,
+            'status_codes': statuses,
+            **percentile_summary(latencies),
+            'queries': statistics.median(queries) if queries else None,
+            'queries_max': max(queries) if queries else None,
+            'peak_memory_kib': round(peak / 1024, 1) if peak is not None else None,
+        }
+
+    def call(self, endpoint, i, trace_memory=False):
+        """Build and send one request; returns (status, seconds, queries, peak traced bytes)"""
+        with rolled_back() if self.transport.rolls_back else nullcontext():
+            call = endpoint.build(self.fixtures, i)
+            path = reverse(endpoint.url_name, kwargs=call.kwargs)
+            if call.query:
+                path = f'{path}?{urlencode(call.query)}'
+            headers = self.headers(call)
+
+            if trace_memory:
+                tracemalloc.start()
+            started = time.perf_counter()
+            status, queries = self.transport.request(endpoint.method, path, call.data, headers)
+            elapsed = time.perf_counter() - started
+            peak = None
+            if trace_memory:
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+        return status, elapsed, queries, peak
+
+    def headers(self, call):
+        self.sequence += 1
+        address = IPv4Address(BENCHMARK_NETWORK + (self.address_offset + self.sequence) % BENCHMARK_ADDRESSES)
+        headers = {'REMOTE_ADDR': str(address)}
+        access = call.access
+        if access is None and call.user is not None:
+            if call.user not in self.tokens:
+                self.tokens[call.user] = self.fixtures.tokens(call.user)['access']
+            access = self.tokens[call.user]
+        if access is not None:
+            headers['HTTP_AUTHORIZATION'] = f'Bearer {access}'
+        return headers
+
+
+def percent_change(before, after):
+    if before is None or after is None:
+        return None
+    if before == 0:
+        return 0.0 if after == 0 else float('inf')
+    return (after - before) / before * 100
+
+
+def compare_results(baseline, candidate, threshold=10.0):
+    """Per-endpoint changes between two results files, with a verdict for each.
+
+    An endpoint regressed if p50, p95 or peak memory grew by more than
+    threshold percent (and latency by more than LATENCY_NOISE_MS), or if it
+    runs more queries; it improved if something shrank that much and nothing
+    regressed.
+    """
+    rows = []
+    before_endpoints, after_endpoints = baseline['endpoints'], candidate['endpoints']
+    for key in list(before_endpoints) + [key for key in after_endpoints if key not in before_endpoints]:
+        before, after = before_endpoints.get(key), after_endpoints.get(key)
+        if before is None or after is None:
+            rows.append({'endpoint': key, 'verdict': 'added' if before is None else 'removed', 'metrics': {}})
+            continue
+
+        metrics = {}
+        worse = better = False
+        for metric in ('p50_ms', 'p95_ms', 'p99_ms', 'queries', 'peak_memory_kib'):
+            change = percent_change(before.get(metric), after.get(metric))
+            metrics[metric] = (before.get(metric), after.get(metric), change)
+            if change is None or metric == 'p99_ms':
+                continue  # p99 of a short run is a handful of samples; reported, not judged
+            if metric == 'queries':
+                worse |= after[metric] > before[metric]
+                better |= after[metric] < before[metric]
+                continue
+            if metric.endswith('_ms') and abs(after[metric] - before[metric]) < LATENCY_NOISE_MS:
+                continue
+            worse |= change > threshold
+            better |= change < -threshold
+
+        verdict = 'regressed' if worse else 'improved' if better else 'unchanged'
+        rows.append({'endpoint': key, 'verdict': verdict, 'metrics': metrics})
+    return rows
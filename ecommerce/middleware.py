@@ -0,0 +1,129 @@
+"""
+Per-request SQL instrumentation shared by all apps.
+"""
+from collections import Counter
+from contextlib import ExitStack
+from django.conf import settings
+from django.db import connections
+from rest_framework.serializers import Serializer
+import logging
+import re
+import sys
+import time
+
+logger = logging.getLogger('ecommerce.queries')
+
+SERIALIZER_LOOP = Serializer.to_representation.__code__
+
+FINGERPRINT_PATTERNS = [
+    (re.compile(r"'(?:[^']|'')*'"), '?'),           # string literals
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),         # numeric literals
+    (re.compile(r'%s'), '?'),                         # placeholders
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(...)'),  # IN lists of any length
+    (re.compile(r'\s+'), ' '),
+]
+
+
+def fingerprint(sql):
+    """Normalize SQL so queries that differ only in values share one shape"""
+    for pattern, replacement in FINGERPRINT_PATTERNS:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def query_origin():
+    """The serializer field being rendered, or else the first project frame, that ran the query"""
+    frame = sys._getframe(2)
+    project_frame = None
+    base_dir = str(settings.BASE_DIR)
+    while frame is not None:
+        code = frame.f_code
+        if code is SERIALIZER_LOOP and 'field' in frame.f_locals:
+            field = frame.f_locals['field']
+            return f"{type(frame.f_locals['self']).__name__}.{field.field_name}"
+        if (project_frame is None and code.co_filename.startswith(base_dir)
+                and 'site-packages' not in code.co_filename and code.co_filename != __file__):
+            project_frame = f'{code.co_filename[len(base_dir) + 1:]}:{frame.f_lineno} in {code.co_name}'
+        frame = frame.f_back
+    return project_frame or 'unknown'
+
+
+class QueryRecorder:
+    """execute_wrapper that tallies queries, time and SQL strings for one request"""
+
+    def __init__(self, trace):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+        self.origins = {} if trace else None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.statements[sql] += 1
+            if self.origins is not None:
+                self.origins.setdefault(sql, Counter())[query_origin()] += 1
+
+    def repeated_shapes(self, threshold):
+        """(count, fingerprint, origins) for every query shape run at least threshold times"""
+        shapes = {}
+        for sql, count in self.statements.items():
+            shape = shapes.setdefault(fingerprint(sql), [0, Counter()])
+            shape[0] += count
+            if self.origins is not None:
+                shape[1].update(self.origins[sql])
+        return sorted(
+            ((count, shape, origins) for shape, (count, origins) in shapes.items() if count >= threshold),
+            key=lambda item: item[0],
+            reverse=True
+        )
+
+
+class QueryInstrumentationMiddleware:
+    """Report each request's query count and DB time, and log requests that blow the query budget.
+
+    Adds Server-Timing and X-Query-Count headers. With QUERY_INSTRUMENTATION_TRACE
+    (on under DEBUG) every query also records the serializer field or code line
+    that ran it, so repeated query shapes are reported as likely N+1s.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, 'QUERY_INSTRUMENTATION', True):
+            return self.get_response(request)
+
+        trace = getattr(settings, 'QUERY_INSTRUMENTATION_TRACE', settings.DEBUG)
+        recorder = QueryRecorder(trace)
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+
+        duration_ms = recorder.duration * 1000
+        response['Server-Timing'] = f'db;dur={duration_ms:.1f};desc="{recorder.count} queries"'
+        response['X-Query-Count'] = str(recorder.count)
+
+        threshold = getattr(settings, 'QUERY_REPEAT_THRESHOLD', 5)
+        over_budget = (recorder.count > getattr(settings, 'QUERY_BUDGET_COUNT', 30)
+                       or duration_ms > getattr(settings, 'QUERY_BUDGET_MS', 200))
+        if over_budget or (trace and recorder.count >= threshold):
+            self.report(request, recorder, duration_ms, threshold, over_budget)
+        return response
+
+    def report(self, request, recorder, duration_ms, threshold, over_budget):
+        repeated = recorder.repeated_shapes(threshold)
+        if not over_budget and not repeated:
+            return
+
+        lines = [f'{request.method} {request.path}: {recorder.count} queries in {duration_ms:.1f}ms']
+        for count, shape, origins in repeated[:5]:
+            lines.append(f'  {count}x {shape[:200]}')
+            for origin, origin_count in origins.most_common(3):
+                lines.append(f'    possible N+1 from {origin} ({origin_count}x)')
+        logger.warning('\n'.join(lines))
@@ -5,6 +5,7 @@ Django settings for ecommerce project.
 from pathlib import Path
 import os
 from datetime import timedelta
+from corsheaders.defaults import default_headers
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -36,6 +37,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'ecommerce.middleware.QueryInstrumentationMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -71,9 +73,29 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # A file rather than the in-memory default, which fails concurrent writers
+        # with "table is locked" instead of waiting, so threaded tests can run
+        'TEST': {
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
     }
 }
 
+# Cache (shared Redis when REDIS_URL is set, per-process memory otherwise)
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -113,7 +135,7 @@ AUTH_USER_MODEL = 'accounts.User'
 # REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -125,6 +147,16 @@ REST_FRAMEWORK = {
         'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
     ],
+    # Sliding-window limits (ecommerce.throttling) on auth and write endpoints
+    'DEFAULT_THROTTLE_RATES': {
+        'login': '10/min',
+        'register': '5/hour',
+        'password_reset': '5/hour',
+        'cart_write': '60/min',
+        'wishlist': '30/min',
+    },
+    # Proxies in front of the app; client addresses are only taken from X-Forwarded-For behind them
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', '0')),
 }
 
 # JWT Configuration
@@ -154,6 +186,26 @@ SIMPLE_JWT = {
     'SLIDING_TOKEN_REFRESH_LIFETIME': timedelta(days=1),
 }
 
+# Authenticated users are resolved from a per-process LRU (AUTH_USER_LOCAL_TTL seconds,
+# AUTH_USER_LOCAL_SIZE entries) backed by the shared cache (AUTH_USER_CACHE_TIMEOUT seconds)
+AUTH_USER_LOCAL_TTL = 5
+AUTH_USER_LOCAL_SIZE = 1024
+AUTH_USER_CACHE_TIMEOUT = 300
+
+# Revoked JWTs are screened by a per-process Bloom filter, synced from the RevokedToken table every
+# TOKEN_BLOOM_SYNC_INTERVAL seconds and rebuilt every TOKEN_BLOOM_REBUILD_INTERVAL seconds
+TOKEN_BLOOM_CAPACITY = 100000
+TOKEN_BLOOM_ERROR_RATE = 0.001
+TOKEN_BLOOM_SYNC_INTERVAL = 5
+TOKEN_BLOOM_REBUILD_INTERVAL = 3600
+
+# Password hashing runs in a pool of PASSWORD_HASH_WORKERS processes per web worker (0 hashes on
+# the request thread). At most PASSWORD_HASH_MAX_QUEUE more hashes wait for a free process; further
+# logins wait up to PASSWORD_HASH_QUEUE_TIMEOUT seconds for a slot and then get a 503.
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', '2'))
+PASSWORD_HASH_MAX_QUEUE = PASSWORD_HASH_WORKERS * 4
+PASSWORD_HASH_QUEUE_TIMEOUT = 5
+
 # CORS Configuration
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
@@ -164,8 +216,24 @@ CORS_ALLOWED_ORIGINS = [
 
 CORS_ALLOW_CREDENTIALS = True
 
-# Email Configuration (for development)
-EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
+
+CORS_EXPOSE_HEADERS = ['X-Query-Count']
+
+# Per-request query counts and DB time are sent as Server-Timing/X-Query-Count headers, and
+# requests over QUERY_BUDGET_COUNT queries or QUERY_BUDGET_MS of DB time are logged. With
+# QUERY_INSTRUMENTATION_TRACE (default: DEBUG) query shapes repeated QUERY_REPEAT_THRESHOLD
+# times are logged as likely N+1s, with the serializer field or code line that ran them.
+QUERY_INSTRUMENTATION = True
+QUERY_INSTRUMENTATION_TRACE = DEBUG
+QUERY_BUDGET_COUNT = 30
+QUERY_BUDGET_MS = 200
+QUERY_REPEAT_THRESHOLD = 5
+
+# Email Configuration (for development: console, or set EMAIL_BACKEND to the
+# filebased/locmem backends to capture queued emails locally)
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
 
 # Email Configuration (for production)
 # EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
@@ -179,3 +247,69 @@ EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 SITE_NAME = "E-Commerce Store"
 SITE_DOMAIN = "localhost:3000"
 
+# Retention in days for the purge_stale_data management command
+PURGE_STALE_DATA_RETENTION = {
+    'carts': 30,
+    'sessions': 0,
+    'email_verification_tokens': 7,
+    'password_reset_tokens': 1,
+    'stock_reservations': 0,
+    'idempotency_keys': 0,
+    'outbox_events': 7,
+    'queued_emails': 7,
+    'revoked_tokens': 0,
+    'order_number_workers': 30,
+}
+
+# How long checkout holds cart stock before it is released
+STOCK_RESERVATION_TTL = timedelta(minutes=15)
+
+# How long stored responses for Idempotency-Key requests are replayed
+IDEMPOTENCY_KEY_TTL = timedelta(hours=24)
+
+# A key still in progress after this long belongs to a request that died and can be reused
+IDEMPOTENCY_KEY_LOCK_TIMEOUT = timedelta(minutes=5)
+
+# Worker id (0-1023) embedded in order numbers; each process leases one from the database when unset.
+# If set, it must differ between every process that creates orders.
+ORDER_NUMBER_WORKER_ID = os.environ.get('ORDER_NUMBER_WORKER_ID')
+
+# Seconds the order/seller/admin stats endpoints are cached (0 disables caching)
+ORDER_STATS_CACHE_TIMEOUT = 30
+
+# Delivered and cancelled orders move to the archive tables this many months after finishing
+ORDER_ARCHIVE_AFTER_MONTHS = 6
+
+# Celery (REDIS_URL doubles as the broker; without one, tasks run inline in the caller)
+CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', os.environ.get('REDIS_URL'))
+CELERY_TASK_ALWAYS_EAGER = not CELERY_BROKER_URL
+CELERY_BEAT_SCHEDULE = {
+    'drain-outbox': {
+        'task': 'orders.tasks.drain_outbox',
+        'schedule': 10.0,
+    },
+    'send-queued-emails': {
+        'task': 'accounts.tasks.send_queued_emails',
+        'schedule': 10.0,
+    },
+}
+
+# Order side effects outbox: retries back off exponentially until OUTBOX_MAX_ATTEMPTS.
+# OUTBOX_DRAIN_ON_COMMIT wakes a Celery worker when an order commits. It is on only with a
+# broker: eager tasks would drain inside the request, so without one process_outbox polls.
+OUTBOX_DRAIN_ON_COMMIT = os.environ.get('OUTBOX_DRAIN_ON_COMMIT', str(bool(CELERY_BROKER_URL))).lower() == 'true'
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_MAX_ATTEMPTS = 10
+OUTBOX_RETRY_BASE_DELAY = timedelta(seconds=5)
+OUTBOX_RETRY_MAX_DELAY = timedelta(hours=1)
+
+# Email queue: batches share one SMTP connection and are paced to EMAIL_QUEUE_RATE_LIMIT
+# messages per second (0 for no limit). EMAIL_QUEUE_SEND_ON_COMMIT wakes a Celery worker when an
+# email is queued, only with a broker; without one the send_queued_emails poller sends them.
+EMAIL_QUEUE_SEND_ON_COMMIT = os.environ.get('EMAIL_QUEUE_SEND_ON_COMMIT', str(bool(CELERY_BROKER_URL))).lower() == 'true'
+EMAIL_QUEUE_BATCH_SIZE = 50
+EMAIL_QUEUE_RATE_LIMIT = 10
+EMAIL_QUEUE_MAX_ATTEMPTS = 5
+EMAIL_QUEUE_RETRY_BASE_DELAY = timedelta(seconds=30)
+EMAIL_QUEUE_RETRY_MAX_DELAY = timedelta(hours=1)
+EMAIL_QUEUE_LEASE = timedelta(minutes=5)
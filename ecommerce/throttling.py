@@ -0,0 +1,134 @@
+"""
+Sliding-window rate limiting shared by all apps.
+"""
+from django.core.cache import caches
+from django.core.cache.backends.redis import RedisCache
+from redis.commands.core import Script
+from rest_framework.throttling import SimpleRateThrottle
+import math
+import threading
+
+# Allow the request only if the weighted count stays under the limit, and only
+# then count it, in one round trip
+SLIDING_WINDOW_SCRIPT = """
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+if previous * tonumber(ARGV[1]) + current >= tonumber(ARGV[2]) then
+    return {0, current, previous}
+end
+current = redis.call('INCR', KEYS[1])
+if current == 1 then
+    redis.call('EXPIRE', KEYS[1], ARGV[3])
+end
+return {1, current, previous}
+"""
+
+# Registered once and run on whichever client the cache hands out: RedisCache
+# builds a new client per call, so per-client registration would pile up
+sliding_window_script = Script(None, SLIDING_WINDOW_SCRIPT.encode())
+_local_lock = threading.Lock()
+
+
+def redis_hit(cache, current_key, previous_key, weight, limit, timeout):
+    current_key = cache.make_and_validate_key(current_key)
+    previous_key = cache.make_and_validate_key(previous_key)
+    client = cache._cache.get_client(current_key, write=True)
+    allowed, current, previous = sliding_window_script(
+        keys=[current_key, previous_key], args=[weight, limit, timeout], client=client
+    )
+    return bool(allowed), current, previous
+
+
+def local_hit(cache, current_key, previous_key, weight, limit, timeout):
+    # Atomic for the per-process locmem cache; approximate across processes on other backends
+    with _local_lock:
+        counts = cache.get_many([current_key, previous_key])
+        current = counts.get(current_key, 0)
+        previous = counts.get(previous_key, 0)
+        if previous * weight + current >= limit:
+            return False, current, previous
+        current += 1
+        cache.set(current_key, current, timeout)
+        return True, current, previous
+
+
+def sliding_window_hit(current_key, previous_key, weight, limit, timeout):
+    """Count a request against the window; returns (allowed, current count, previous count)"""
+    cache = caches['default']
+    hit = redis_hit if isinstance(cache, RedisCache) else local_hit
+    return hit(cache, current_key, previous_key, weight, limit, timeout)
+
+
+class SlidingWindowRateThrottle(SimpleRateThrottle):
+    """SimpleRateThrottle with a sliding-window counter instead of a request history.
+
+    Each key keeps two integers, the counts for the current and the previous
+    fixed window; the previous one is weighted by how much of it still falls
+    inside the sliding window. Rates come from DEFAULT_THROTTLE_RATES[scope].
+    """
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        window, offset = divmod(self.timer(), self.duration)
+        self.elapsed = offset / self.duration
+        self.allowed, self.current, self.previous = sliding_window_hit(
+            f'{self.key}:{int(window)}',
+            f'{self.key}:{int(window) - 1}',
+            1 - self.elapsed,
+            self.num_requests,
+            math.ceil(self.duration * 2)
+        )
+        return self.allowed
+
+    def wait(self):
+        """Seconds until the weighted count drops under the limit"""
+        if self.current >= self.num_requests or not self.previous:
+            # Only the start of the next window can free a slot
+            return (1 - self.elapsed) * self.duration
+        # previous * (1 - elapsed) has to fall below the room left in this window
+        needed = 1 - (self.num_requests - self.current) / self.previous
+        return max(needed - self.elapsed, 0) * self.duration
+
+
+class IPRateThrottle(SlidingWindowRateThrottle):
+    """Limits every client address, signed in or not"""
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class UserRateThrottle(SlidingWindowRateThrottle):
+    """Limits signed-in users by id and everyone else by address"""
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+
+class LoginRateThrottle(IPRateThrottle):
+    scope = 'login'
+
+
+class RegisterRateThrottle(IPRateThrottle):
+    scope = 'register'
+
+
+class PasswordResetRateThrottle(IPRateThrottle):
+    scope = 'password_reset'
+
+
+class CartWriteRateThrottle(UserRateThrottle):
+    scope = 'cart_write'
+
+
+class WishlistRateThrottle(UserRateThrottle):
+    scope = 'wishlist'
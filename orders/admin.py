@@ -1,11 +1,16 @@
 from django.contrib import admin
-from .models import Order, OrderItem, OrderStatusHistory, ShippingAddress
+from django.utils import timezone
+from .models import (
+    Order, OrderItem, OrderStatusHistory, ShippingAddress,
+    ArchivedOrder, ArchivedOrderItem, ArchivedOrderStatusHistory, OutboxEvent,
+    DailyPlatformSales, DailySellerSales, DailyProductSales
+)
 
 
 class OrderItemInline(admin.TabularInline):
     model = OrderItem
     extra = 0
-    readonly_fields = ('total_price',)
+    readonly_fields = ('total_price', 'product_title', 'product_image', 'seller', 'product_attributes')
 
 
 class OrderStatusHistoryInline(admin.TabularInline):
@@ -74,3 +79,71 @@ class ShippingAddressAdmin(admin.ModelAdmin):
     ordering = ('-created_at',)
 
 
+class ArchivedOrderItemInline(admin.TabularInline):
+    model = ArchivedOrderItem
+    extra = 0
+    can_delete = False
+    fields = ('product_title', 'seller', 'quantity', 'unit_price', 'total_price')
+    readonly_fields = fields
+
+
+class ArchivedOrderStatusHistoryInline(admin.TabularInline):
+    model = ArchivedOrderStatusHistory
+    extra = 0
+    can_delete = False
+    fields = ('status', 'note', 'updated_by', 'created_at')
+    readonly_fields = fields
+
+
+@admin.register(ArchivedOrder)
+class ArchivedOrderAdmin(admin.ModelAdmin):
+    list_display = ('order_number', 'user', 'status', 'payment_status', 'total_amount', 'created_at', 'archived_at')
+    list_filter = ('status', 'payment_status', 'archived_at')
+    search_fields = ('order_number', 'user__email', 'user__first_name', 'user__last_name')
+    ordering = ('-created_at',)
+    inlines = [ArchivedOrderItemInline, ArchivedOrderStatusHistoryInline]
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(DailyPlatformSales)
+class DailyPlatformSalesAdmin(admin.ModelAdmin):
+    list_display = ('date', 'orders', 'units', 'revenue', 'cancelled_orders', 'refunded_orders')
+    date_hierarchy = 'date'
+    ordering = ('-date',)
+
+
+@admin.register(DailySellerSales)
+class DailySellerSalesAdmin(admin.ModelAdmin):
+    list_display = ('date', 'seller', 'orders', 'units', 'revenue', 'cancelled_orders', 'refunded_orders')
+    date_hierarchy = 'date'
+    search_fields = ('seller__email',)
+    ordering = ('-date',)
+
+
+@admin.register(DailyProductSales)
+class DailyProductSalesAdmin(admin.ModelAdmin):
+    list_display = ('date', 'product', 'seller', 'orders', 'units', 'revenue')
+    date_hierarchy = 'date'
+    search_fields = ('product__title', 'seller__email')
+    ordering = ('-date',)
+
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    list_display = ('topic', 'created_at', 'attempts', 'available_at', 'processed_at', 'failed_at')
+    list_filter = ('topic', 'processed_at', 'failed_at')
+    readonly_fields = ('topic', 'payload', 'created_at', 'attempts', 'last_error', 'processed_at', 'failed_at')
+    ordering = ('-created_at',)
+    actions = ['requeue']
+    
+    @admin.action(description='Retry selected events now')
+    def requeue(self, request, queryset):
+        count = queryset.filter(processed_at__isnull=True).update(
+            failed_at=None, attempts=0, available_at=timezone.now()
+        )
+        self.message_user(request, f'{count} events queued for retry')
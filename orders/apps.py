@@ -5,6 +5,12 @@ class OrdersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'orders'
 
+    def ready(self):
+        from . import handlers  # noqa: F401  registers outbox handlers
+        from django.core.signals import request_started
+        from .order_numbers import generator
+        request_started.connect(generator.prepare, dispatch_uid='order_number_worker_lease')
+
 
 
 
@@ -0,0 +1,54 @@
+from django.db import transaction
+from django.db.models import Q
+from .models import (
+    Order, OrderItem, OrderStatusHistory,
+    ArchivedOrder, ArchivedOrderItem, ArchivedOrderStatusHistory
+)
+import calendar
+
+
+def months_before(moment, months):
+    """The same moment the given number of calendar months earlier (clamped to month end)"""
+    month_index = moment.year * 12 + moment.month - 1 - months
+    year, month = divmod(month_index, 12)
+    day = min(moment.day, calendar.monthrange(year, month + 1)[1])
+    return moment.replace(year=year, month=month + 1, day=day)
+
+
+def archivable_orders(cutoff):
+    """Orders delivered or cancelled before the cutoff.
+    
+    Archived orders can no longer change status, so the cutoff should be
+    past the refund window for delivered orders.
+    """
+    return Order.objects.filter(
+        Q(status='delivered', delivered_at__lt=cutoff) | Q(status='cancelled', updated_at__lt=cutoff)
+    )
+
+
+def copy_rows(queryset, archive_model):
+    """Insert the queryset's rows into archive_model, keeping ids and timestamps"""
+    fields = [field.attname for field in archive_model._meta.concrete_fields if field.name != 'archived_at']
+    archive_model.objects.bulk_create([archive_model(**row) for row in queryset.values(*fields)])
+
+
+def archive_batch(cutoff, batch_size):
+    """Move up to batch_size archivable orders, with their lines and history, into the archive.
+    
+    Daily sales rollups are left untouched. Returns the number of orders moved.
+    """
+    with transaction.atomic():
+        order_ids = list(
+            archivable_orders(cutoff).select_for_update()
+            .order_by('pk').values_list('pk', flat=True)[:batch_size]
+        )
+        if not order_ids:
+            return 0
+        
+        orders = Order.objects.filter(pk__in=order_ids)
+        copy_rows(orders, ArchivedOrder)
+        copy_rows(OrderItem.objects.filter(order__in=order_ids), ArchivedOrderItem)
+        copy_rows(OrderStatusHistory.objects.filter(order__in=order_ids), ArchivedOrderStatusHistory)
+        orders.delete()
+    
+    return len(order_ids)
@@ -0,0 +1,26 @@
+from .models import Order
+from .outbox import handles
+from .rollups import record_order_placed, record_orders_status
+from .stats import invalidate_orders_stats
+
+
+@handles('order.placed')
+def roll_up_placed_order(payload):
+    order = Order.objects.filter(pk=payload['order_id']).first()
+    if order is not None:
+        record_order_placed(order)
+
+
+@handles('order.status_changed')
+def roll_up_status_change(payload):
+    record_orders_status(Order.objects.filter(pk__in=payload['order_ids']), payload['status'])
+
+
+@handles('order.placed')
+def invalidate_placed_order_stats(payload):
+    invalidate_orders_stats([payload['order_id']])
+
+
+@handles('order.status_changed')
+def invalidate_changed_order_stats(payload):
+    invalidate_orders_stats(payload['order_ids'])
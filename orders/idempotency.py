@@ -0,0 +1,98 @@
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+from django.conf import settings
+from django.db import transaction, IntegrityError
+from django.utils import timezone
+from .models import IdempotencyKey
+import functools
+import hashlib
+import json
+
+
+def get_idempotency_scope(request):
+    """Keys are only unique per user, or per session for guests"""
+    if request.user.is_authenticated:
+        return f"user:{request.user.pk}"
+    if request.session.session_key:
+        return f"session:{request.session.session_key}"
+    return None
+
+
+def get_request_fingerprint(request):
+    """Method, path and a hash of the parsed body, so a key cannot be reused for different data"""
+    body = json.dumps(request.data, sort_keys=True, cls=JSONEncoder, default=str)
+    return f"{request.method} {request.path} {hashlib.sha256(body.encode()).hexdigest()}"
+
+
+def idempotent(view_func):
+    """Replay the stored response when a request repeats an Idempotency-Key.
+    
+    The first request with a key claims it with a placeholder row, runs the
+    view and stores the response. Retries are answered from that row in one
+    indexed lookup without running the view again; a retry with a different
+    body is rejected. Only successful responses are stored: client and server
+    errors, returned or raised, release the key so a corrected request can
+    reuse it. A placeholder older than IDEMPOTENCY_KEY_LOCK_TIMEOUT belongs
+    to a request that died, and is reclaimed.
+    """
+    @functools.wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        key = request.META.get('HTTP_IDEMPOTENCY_KEY')
+        scope = get_idempotency_scope(request) if key else None
+        if scope is None:
+            return view_func(request, *args, **kwargs)
+        
+        if len(key) > 255:
+            return Response({'error': 'Idempotency-Key must be at most 255 characters'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        
+        fingerprint = get_request_fingerprint(request)
+        now = timezone.now()
+        
+        record = IdempotencyKey.objects.filter(scope=scope, key=key).first()
+        if record is not None and (record.expires_at <= now or (
+            record.response_status is None and record.created_at <= now - settings.IDEMPOTENCY_KEY_LOCK_TIMEOUT
+        )):
+            record.delete()
+            record = None
+        
+        if record is not None:
+            if record.request_fingerprint != fingerprint:
+                return Response({'error': 'Idempotency-Key was already used for a different request'},
+                                status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+            if record.response_status is None:
+                return Response({'error': 'A request with this Idempotency-Key is still in progress'},
+                                status=status.HTTP_409_CONFLICT)
+            return Response(record.response_body, status=record.response_status,
+                            headers={'Idempotent-Replayed': 'true'})
+        
+        try:
+            with transaction.atomic():
+                record = IdempotencyKey.objects.create(
+                    scope=scope,
+                    key=key,
+                    request_fingerprint=fingerprint,
+                    expires_at=now + settings.IDEMPOTENCY_KEY_TTL
+                )
+        except IntegrityError:
+            return Response({'error': 'A request with this Idempotency-Key is still in progress'},
+                            status=status.HTTP_409_CONFLICT)
+        
+        try:
+            response = view_func(request, *args, **kwargs)
+        except Exception:
+            record.delete()
+            raise
+        
+        if response.status_code >= 400 or not hasattr(response, 'data'):
+            record.delete()
+        else:
+            record.response_status = response.status_code
+            # As the client received it, so a replay renders identically
+            record.response_body = json.loads(json.dumps(response.data, cls=JSONEncoder))
+            record.save(update_fields=['response_status', 'response_body'])
+        
+        return response
+    
+    return wrapper
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+from django.utils import timezone
+from orders.archive import archivable_orders, archive_batch, months_before
+import time
+
+
+class Command(BaseCommand):
+    help = 'Move orders delivered or cancelled more than N months ago into the archive tables in small batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months', type=int, default=getattr(settings, 'ORDER_ARCHIVE_AFTER_MONTHS', 6),
+                            help='Archive orders finished more than this many months ago')
+        parser.add_argument('--batch-size', type=int, default=500, help='Orders moved per transaction')
+        parser.add_argument('--sleep', type=float, default=0.1, help='Seconds to sleep between batches')
+        parser.add_argument('--dry-run', action='store_true', help='Count orders without moving them')
+
+    def handle(self, *args, **options):
+        # Archived orders are left out of "recent" dashboard counts, so keep at least a month live
+        if options['months'] < 1:
+            raise CommandError('--months must be at least 1')
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size must be positive')
+
+        cutoff = months_before(timezone.now(), options['months'])
+        if options['dry_run']:
+            count = archivable_orders(cutoff).count()
+            self.stdout.write(self.style.SUCCESS(f'Would archive {count} orders finished before {cutoff:%Y-%m-%d}'))
+            return
+
+        started = time.monotonic()
+        total = 0
+        while True:
+            moved = archive_batch(cutoff, options['batch_size'])
+            total += moved
+            if moved < options['batch_size']:
+                break
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        elapsed = time.monotonic() - started
+        rate = total / elapsed if elapsed else 0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Archived {total} orders finished before {cutoff:%Y-%m-%d} in {elapsed:.2f}s ({rate:.0f} orders/s)'
+            )
+        )
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+from orders.outbox import drain, outbox_metrics
+import time
+
+
+class Command(BaseCommand):
+    help = 'Poll the outbox and run order side effects, for deployments without a Celery broker'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=getattr(settings, 'OUTBOX_BATCH_SIZE', 100),
+                            help='Events handled per transaction')
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds to wait when the outbox is empty')
+        parser.add_argument('--metrics-every', type=float, default=60.0,
+                            help='Seconds between queue depth/lag reports (0 disables them)')
+        parser.add_argument('--once', action='store_true', help='Drain due events once and exit')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size must be positive')
+
+        batch_size = options['batch_size']
+        if options['once']:
+            total = 0
+            while True:
+                handled = drain(batch_size)
+                total += handled
+                if handled < batch_size:
+                    break
+            self.stdout.write(self.style.SUCCESS(f'Handled {total} outbox events'))
+            self.report()
+            return
+
+        self.stdout.write('Polling the outbox (Ctrl+C to stop)...')
+        last_report = time.monotonic()
+        try:
+            while True:
+                if drain(batch_size) < batch_size:
+                    time.sleep(options['interval'])
+                if options['metrics_every'] and time.monotonic() - last_report >= options['metrics_every']:
+                    self.report()
+                    last_report = time.monotonic()
+        except KeyboardInterrupt:
+            self.stdout.write('Stopped')
+
+    def report(self):
+        metrics = outbox_metrics()
+        self.stdout.write(
+            f"pending={metrics['pending']} due={metrics['due']} retrying={metrics['retrying']} "
+            f"failed={metrics['failed']} lag={metrics['lag_seconds']}s"
+        )
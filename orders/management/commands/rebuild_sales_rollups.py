@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from orders.rollups import ORDER_SOURCES, rebuild_day
+import time
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily platform, seller and product sales rollups for a date range'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=date.fromisoformat,
+                            help='First day to rebuild (YYYY-MM-DD), defaults to the first live or archived order')
+        parser.add_argument('--end', type=date.fromisoformat,
+                            help='Last day to rebuild (YYYY-MM-DD), defaults to today')
+        parser.add_argument('--workers', type=int, default=4, help='Days rebuilt in parallel')
+
+    def handle(self, *args, **options):
+        end = options['end'] or timezone.localdate()
+        start = options['start']
+        if start is None:
+            first_orders = [
+                order_model.objects.order_by('created_at').values_list('created_at', flat=True).first()
+                for order_model, _ in ORDER_SOURCES
+            ]
+            first_order = min(filter(None, first_orders), default=None)
+            if first_order is None:
+                self.stdout.write('No orders to roll up')
+                return
+            start = timezone.localdate(first_order)
+        if start > end:
+            raise CommandError('--start must not be after --end')
+        if options['workers'] <= 0:
+            raise CommandError('--workers must be positive')
+
+        days = [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+        self.stdout.write(f'Rebuilding {len(days)} days with {options["workers"]} workers...')
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            orders = sum(pool.map(self.rebuild, days))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Rebuilt rollups for {len(days)} days ({orders} orders) in {time.monotonic() - started:.2f}s'
+            )
+        )
+
+    def rebuild(self, day):
+        # Each worker thread has its own connection; close it when done
+        try:
+            return rebuild_day(day)
+        finally:
+            connection.close()
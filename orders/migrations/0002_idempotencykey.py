@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:45
+
+import django.core.serializers.json
+from django.db import migrations, models
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyKey',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('scope', models.CharField(max_length=100)),
+                ('key', models.CharField(max_length=255)),
+                ('request_fingerprint', models.CharField(max_length=255)),
+                ('response_status', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('response_body', models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['expires_at'], name='orders_idem_expires_681ecb_idx')],
+                'unique_together': {('scope', 'key')},
+            },
+        ),
+    ]
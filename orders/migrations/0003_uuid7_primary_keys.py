@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:46
+
+from django.db import migrations, models
+import ecommerce.ids
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0002_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='idempotencykey',
+            name='id',
+            field=models.UUIDField(default=ecommerce.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='id',
+            field=models.UUIDField(default=ecommerce.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='orderitem',
+            name='id',
+            field=models.UUIDField(default=ecommerce.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='orderstatushistory',
+            name='id',
+            field=models.UUIDField(default=ecommerce.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='shippingaddress',
+            name='id',
+            field=models.UUIDField(default=ecommerce.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+    ]
@@ -0,0 +1,90 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:49
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_uuid7_primary_keys'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('orders', '0003_uuid7_primary_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyPlatformSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('orders', models.PositiveIntegerField(default=0)),
+                ('units', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('shipped_orders', models.PositiveIntegerField(default=0)),
+                ('cancelled_orders', models.PositiveIntegerField(default=0)),
+                ('refunded_orders', models.PositiveIntegerField(default=0)),
+                ('lost_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'ordering': ['date'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='DailySellerSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('orders', models.PositiveIntegerField(default=0)),
+                ('units', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('shipped_orders', models.PositiveIntegerField(default=0)),
+                ('cancelled_orders', models.PositiveIntegerField(default=0)),
+                ('refunded_orders', models.PositiveIntegerField(default=0)),
+                ('lost_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('seller', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['date'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyProductSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('orders', models.PositiveIntegerField(default=0)),
+                ('units', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('shipped_orders', models.PositiveIntegerField(default=0)),
+                ('cancelled_orders', models.PositiveIntegerField(default=0)),
+                ('refunded_orders', models.PositiveIntegerField(default=0)),
+                ('lost_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='products.product')),
+                ('seller', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_product_sales', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['date'],
+                'abstract': False,
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dailyplatformsales',
+            constraint=models.UniqueConstraint(fields=('date',), name='unique_daily_platform_sales'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailysellersales',
+            constraint=models.UniqueConstraint(fields=('seller', 'date'), name='unique_daily_seller_sales'),
+        ),
+        migrations.AddIndex(
+            model_name='dailyproductsales',
+            index=models.Index(fields=['seller', 'date'], name='orders_dail_seller__f47e24_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyproductsales',
+            constraint=models.UniqueConstraint(fields=('product', 'date'), name='unique_daily_product_sales'),
+        ),
+    ]
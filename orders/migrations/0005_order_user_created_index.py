@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0004_daily_sales_rollups'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['user', '-created_at', 'id'], name='order_user_created_idx'),
+        ),
+    ]
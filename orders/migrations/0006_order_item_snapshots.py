@@ -0,0 +1,64 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:52
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_snapshots(apps, schema_editor):
+    """Copy current product details onto existing order items"""
+    OrderItem = apps.get_model('orders', 'OrderItem')
+    items = OrderItem.objects.select_related('product__category', 'product__brand').prefetch_related('product__images')
+    batch = []
+    for item in items.iterator(chunk_size=500):
+        product = item.product
+        images = list(product.images.all())
+        image = next((img for img in images if img.is_primary), images[0] if images else None)
+        item.product_title = product.title
+        item.product_image = image.image.url if image else ''
+        item.seller_id = product.seller_id
+        item.product_attributes = {
+            'category': product.category.name,
+            'brand': product.brand.name if product.brand else None,
+            'list_price': str(product.price),
+            'discount_percentage': str(product.discount_percentage),
+        }
+        batch.append(item)
+        if len(batch) >= 500:
+            OrderItem.objects.bulk_update(batch, ['product_title', 'product_image', 'seller', 'product_attributes'])
+            batch = []
+    if batch:
+        OrderItem.objects.bulk_update(batch, ['product_title', 'product_image', 'seller', 'product_attributes'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('orders', '0005_order_user_created_index'),
+        ('products', '0003_uuid7_primary_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderitem',
+            name='product_attributes',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='product_image',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='product_title',
+            field=models.CharField(blank=True, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='seller',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sold_items', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(backfill_snapshots, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:54
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+def backfill_placed_at(apps, schema_editor):
+    """Copy each order's creation time onto its items"""
+    Order = apps.get_model('orders', 'Order')
+    OrderItem = apps.get_model('orders', 'OrderItem')
+    OrderItem.objects.update(
+        placed_at=models.Subquery(Order.objects.filter(pk=models.OuterRef('order')).values('created_at')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0006_order_item_snapshots'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderitem',
+            name='placed_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(backfill_placed_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='orderitem',
+            index=models.Index(fields=['seller', '-placed_at', 'order'], name='orderitem_seller_queue_idx'),
+        ),
+    ]
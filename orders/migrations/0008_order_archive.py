@@ -0,0 +1,99 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:57
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import ecommerce.ids
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_uuid7_primary_keys'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('orders', '0007_order_item_seller_queue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedOrder',
+            fields=[
+                ('id', models.UUIDField(default=ecommerce.ids.uuid7, editable=False, primary_key=True, serialize=False)),
+                ('order_number', models.CharField(max_length=20, unique=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('shipped', 'Shipped'), ('delivered', 'Delivered'), ('cancelled', 'Cancelled'), ('refunded', 'Refunded')], default='pending', max_length=20)),
+                ('payment_status', models.CharField(choices=[('pending', 'Pending'), ('paid', 'Paid'), ('failed', 'Failed'), ('refunded', 'Refunded')], default='pending', max_length=20)),
+                ('subtotal', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('shipping_cost', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('tax_amount', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('total_amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('shipping_first_name', models.CharField(max_length=50)),
+                ('shipping_last_name', models.CharField(max_length=50)),
+                ('shipping_email', models.EmailField(max_length=254)),
+                ('shipping_phone', models.CharField(max_length=20)),
+                ('shipping_address', models.TextField()),
+                ('shipping_city', models.CharField(max_length=100)),
+                ('shipping_state', models.CharField(max_length=100)),
+                ('shipping_country', models.CharField(max_length=100)),
+                ('shipping_zip_code', models.CharField(max_length=20)),
+                ('billing_first_name', models.CharField(blank=True, max_length=50)),
+                ('billing_last_name', models.CharField(blank=True, max_length=50)),
+                ('billing_email', models.EmailField(blank=True, max_length=254)),
+                ('billing_phone', models.CharField(blank=True, max_length=20)),
+                ('billing_address', models.TextField(blank=True)),
+                ('billing_city', models.CharField(blank=True, max_length=100)),
+                ('billing_state', models.CharField(blank=True, max_length=100)),
+                ('billing_country', models.CharField(blank=True, max_length=100)),
+                ('billing_zip_code', models.CharField(blank=True, max_length=20)),
+                ('payment_method', models.CharField(default='card', max_length=50)),
+                ('payment_reference', models.CharField(blank=True, max_length=100)),
+                ('shipped_at', models.DateTimeField(blank=True, null=True)),
+                ('delivered_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_orders', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedOrderStatusHistory',
+            fields=[
+                ('id', models.UUIDField(default=ecommerce.ids.uuid7, editable=False, primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('shipped', 'Shipped'), ('delivered', 'Delivered'), ('cancelled', 'Cancelled'), ('refunded', 'Refunded')], max_length=20)),
+                ('note', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField()),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_history', to='orders.archivedorder')),
+                ('updated_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedOrderItem',
+            fields=[
+                ('id', models.UUIDField(default=ecommerce.ids.uuid7, editable=False, primary_key=True, serialize=False)),
+                ('quantity', models.PositiveIntegerField()),
+                ('unit_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('total_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('product_title', models.CharField(blank=True, max_length=200)),
+                ('product_image', models.CharField(blank=True, max_length=255)),
+                ('product_attributes', models.JSONField(blank=True, default=dict)),
+                ('placed_at', models.DateTimeField()),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='orders.archivedorder')),
+                ('product', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='products.product')),
+                ('seller', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.AddIndex(
+            model_name='archivedorder',
+            index=models.Index(fields=['user', '-created_at', 'id'], name='archivedorder_user_created_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:59
+
+import django.core.serializers.json
+from django.db import migrations, models
+import django.utils.timezone
+import ecommerce.ids
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0008_order_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxEvent',
+            fields=[
+                ('id', models.UUIDField(default=ecommerce.ids.uuid7, editable=False, primary_key=True, serialize=False)),
+                ('topic', models.CharField(max_length=100)),
+                ('payload', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('available_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+                ('failed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('failed_at__isnull', True), ('processed_at__isnull', True)), fields=['available_at'], name='outbox_pending_idx'), models.Index(fields=['processed_at'], name='orders_outb_process_4acb01_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0009_outbox_events'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderNumberWorker',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('hostname', models.CharField(max_length=255)),
+                ('pid', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
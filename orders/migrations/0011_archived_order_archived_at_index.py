@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0010_order_number_workers'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='archivedorder',
+            index=models.Index(fields=['archived_at'], name='archivedorder_archived_idx'),
+        ),
+    ]
@@ -1,13 +1,18 @@
-from django.db import models
+from django.db import models, transaction, IntegrityError
+from django.core.serializers.json import DjangoJSONEncoder
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from products.models import Product
-import uuid
+from ecommerce.ids import uuid7
+from .order_numbers import generator as order_number_generator
 
 User = get_user_model()
 
+ORDER_NUMBER_ATTEMPTS = 3
 
-class Order(models.Model):
-    """Order model"""
+
+class AbstractOrder(models.Model):
+    """Order columns shared by live and archived orders"""
     STATUS_CHOICES = [
         ('pending', 'Pending'),
         ('processing', 'Processing'),
@@ -17,6 +22,20 @@ class Order(models.Model):
         ('refunded', 'Refunded'),
     ]
     
+    # Allowed status transitions and the timestamp each target status stamps
+    STATUS_TRANSITIONS = {
+        'pending': ['processing', 'cancelled'],
+        'processing': ['shipped', 'cancelled'],
+        'shipped': ['delivered'],
+        'delivered': ['refunded'],
+        'cancelled': [],
+        'refunded': [],
+    }
+    STATUS_TIMESTAMPS = {
+        'shipped': 'shipped_at',
+        'delivered': 'delivered_at',
+    }
+    
     PAYMENT_STATUS_CHOICES = [
         ('pending', 'Pending'),
         ('paid', 'Paid'),
@@ -24,9 +43,8 @@ class Order(models.Model):
         ('refunded', 'Refunded'),
     ]
     
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     order_number = models.CharField(max_length=20, unique=True)
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='orders')
     
     # Order status
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
@@ -71,59 +89,164 @@ class Order(models.Model):
     delivered_at = models.DateTimeField(null=True, blank=True)
     
     class Meta:
+        abstract = True
         ordering = ['-created_at']
     
     def __str__(self):
         return f"Order {self.order_number} - {self.user.email}"
     
+    @classmethod
+    def status_predecessors(cls, status):
+        """Statuses an order may move to status from"""
+        return [source for source, targets in cls.STATUS_TRANSITIONS.items() if status in targets]
+
+
+class Order(AbstractOrder):
+    """Order model"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='orders')
+    
+    class Meta(AbstractOrder.Meta):
+        indexes = [
+            models.Index(fields=['user', '-created_at', 'id'], name='order_user_created_idx'),
+        ]
+    
     def save(self, *args, **kwargs):
-        if not self.order_number:
+        if self.order_number:
+            return super().save(*args, **kwargs)
+        
+        # Worker ids can still repeat (a misconfigured ORDER_NUMBER_WORKER_ID, or a
+        # leased id reused after 1024 process starts), so retry a duplicate number
+        for attempt in range(ORDER_NUMBER_ATTEMPTS):
             self.order_number = self.generate_order_number()
-        super().save(*args, **kwargs)
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                taken = Order.objects.filter(order_number=self.order_number).exists()
+                self.order_number = ''
+                if not taken or attempt == ORDER_NUMBER_ATTEMPTS - 1:
+                    raise
     
     def generate_order_number(self):
-        """Generate unique order number"""
-        import random
-        import string
-        return f"ORD{''.join(random.choices(string.ascii_uppercase + string.digits, k=8))}"
+        """Generate unique, time-ordered order number (ORD + 13 base-36 characters)"""
+        return order_number_generator.generate()
 
 
-class OrderItem(models.Model):
-    """Individual items in an order"""
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='items')
-    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+class AbstractOrderItem(models.Model):
+    """Order line columns shared by live and archived orders"""
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     quantity = models.PositiveIntegerField()
     unit_price = models.DecimalField(max_digits=10, decimal_places=2)
     total_price = models.DecimalField(max_digits=10, decimal_places=2)
     
+    # Product details as they were at purchase time
+    product_title = models.CharField(max_length=200, blank=True)
+    product_image = models.CharField(max_length=255, blank=True)
+    product_attributes = models.JSONField(default=dict, blank=True)
+    
+    # Copied from the order so a seller's lines can be paged from one index
+    placed_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        abstract = True
+    
     def __str__(self):
-        return f"{self.quantity}x {self.product.title} - Order {self.order.order_number}"
+        return f"{self.quantity}x {self.product_title} - Order {self.order.order_number}"
+
+
+class OrderItem(AbstractOrderItem):
+    """Individual items in an order"""
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='items')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    seller = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='sold_items')
+    
+    class Meta(AbstractOrderItem.Meta):
+        indexes = [
+            models.Index(fields=['seller', '-placed_at', 'order'], name='orderitem_seller_queue_idx'),
+        ]
+    
+    @classmethod
+    def from_product(cls, product, quantity):
+        """Build an unsaved item that snapshots the product's current details"""
+        unit_price = product.discounted_price
+        images = list(product.images.all())
+        image = next((img for img in images if img.is_primary), images[0] if images else None)
+        return cls(
+            product=product,
+            quantity=quantity,
+            unit_price=unit_price,
+            total_price=unit_price * quantity,
+            product_title=product.title,
+            product_image=image.image.url if image else '',
+            seller_id=product.seller_id,
+            product_attributes={
+                'category': product.category.name,
+                'brand': product.brand.name if product.brand else None,
+                'list_price': str(product.price),
+                'discount_percentage': str(product.discount_percentage),
+            }
+        )
     
     def save(self, *args, **kwargs):
         self.total_price = self.unit_price * self.quantity
         super().save(*args, **kwargs)
 
 
-class OrderStatusHistory(models.Model):
-    """Track order status changes"""
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='status_history')
-    status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+class AbstractOrderStatusHistory(models.Model):
+    """Status history columns shared by live and archived orders"""
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+    status = models.CharField(max_length=20, choices=AbstractOrder.STATUS_CHOICES)
     note = models.TextField(blank=True)
-    updated_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
+        abstract = True
         ordering = ['-created_at']
     
     def __str__(self):
         return f"Order {self.order.order_number} - {self.status}"
 
 
+class OrderStatusHistory(AbstractOrderStatusHistory):
+    """Track order status changes"""
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='status_history')
+    updated_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+
+
+class ArchivedOrder(AbstractOrder):
+    """Delivered or cancelled order moved out of the live tables"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_orders')
+    # Copied verbatim from the live row rather than stamped on insert
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta(AbstractOrder.Meta):
+        indexes = [
+            models.Index(fields=['user', '-created_at', 'id'], name='archivedorder_user_created_idx'),
+            models.Index(fields=['archived_at'], name='archivedorder_archived_idx'),
+        ]
+
+
+class ArchivedOrderItem(AbstractOrderItem):
+    """Line of an archived order"""
+    order = models.ForeignKey(ArchivedOrder, on_delete=models.CASCADE, related_name='items')
+    # Products may be deleted later; the snapshot columns keep what was bought
+    product = models.ForeignKey(Product, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    seller = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    placed_at = models.DateTimeField()
+
+
+class ArchivedOrderStatusHistory(AbstractOrderStatusHistory):
+    """Status history of an archived order"""
+    order = models.ForeignKey(ArchivedOrder, on_delete=models.CASCADE, related_name='status_history')
+    updated_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField()
+
+
 class ShippingAddress(models.Model):
     """Saved shipping addresses for users"""
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='shipping_addresses')
     first_name = models.CharField(max_length=50)
     last_name = models.CharField(max_length=50)
@@ -151,6 +274,115 @@ class ShippingAddress(models.Model):
         super().save(*args, **kwargs)
 
 
+class IdempotencyKey(models.Model):
+    """Stored response for a request sent with an Idempotency-Key header"""
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+    scope = models.CharField(max_length=100)  # Owning user or guest session
+    key = models.CharField(max_length=255)
+    request_fingerprint = models.CharField(max_length=255)
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+    
+    class Meta:
+        unique_together = ['scope', 'key']
+        indexes = [
+            models.Index(fields=['expires_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.key} ({self.scope})"
+
 
+class OutboxEvent(models.Model):
+    """Side effect recorded in the same transaction as the change that caused it"""
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+    topic = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+    available_at = models.DateTimeField(default=timezone.now)  # Pushed back after each failure
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    failed_at = models.DateTimeField(null=True, blank=True)  # Gave up after OUTBOX_MAX_ATTEMPTS
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['available_at'], name='outbox_pending_idx',
+                         condition=models.Q(processed_at__isnull=True, failed_at__isnull=True)),
+            models.Index(fields=['processed_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.topic} ({self.id})"
+
+
+class OrderNumberWorker(models.Model):
+    """A process that generates order numbers; its id modulo 1024 is the worker id it embeds"""
+    id = models.BigAutoField(primary_key=True)
+    hostname = models.CharField(max_length=255)
+    pid = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"Worker {self.id} ({self.hostname}:{self.pid})"
 
 
+class SalesRollup(models.Model):
+    """Daily sales counters, keyed by the order's creation date"""
+    date = models.DateField()
+    orders = models.PositiveIntegerField(default=0)
+    units = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    shipped_orders = models.PositiveIntegerField(default=0)
+    cancelled_orders = models.PositiveIntegerField(default=0)
+    refunded_orders = models.PositiveIntegerField(default=0)
+    lost_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)  # Cancelled or refunded
+    
+    class Meta:
+        abstract = True
+        ordering = ['date']
+
+
+class DailyPlatformSales(SalesRollup):
+    """Platform-wide sales per day"""
+    
+    class Meta(SalesRollup.Meta):
+        constraints = [
+            models.UniqueConstraint(fields=['date'], name='unique_daily_platform_sales'),
+        ]
+    
+    def __str__(self):
+        return f"Platform sales {self.date}"
+
+
+class DailySellerSales(SalesRollup):
+    """Sales of one seller's products per day"""
+    seller = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_sales')
+    
+    class Meta(SalesRollup.Meta):
+        constraints = [
+            models.UniqueConstraint(fields=['seller', 'date'], name='unique_daily_seller_sales'),
+        ]
+    
+    def __str__(self):
+        return f"Sales for {self.seller_id} on {self.date}"
+
+
+class DailyProductSales(SalesRollup):
+    """Sales of one product per day"""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='daily_sales')
+    seller = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_product_sales')
+    
+    class Meta(SalesRollup.Meta):
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'date'], name='unique_daily_product_sales'),
+        ]
+        indexes = [
+            models.Index(fields=['seller', 'date']),
+        ]
+    
+    def __str__(self):
+        return f"Sales for {self.product_id} on {self.date}"
+
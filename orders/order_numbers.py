@@ -0,0 +1,124 @@
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DatabaseError, transaction
+import functools
+import logging
+import os
+import socket
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Snowflake layout: 42 bits of milliseconds since EPOCH_MS, 10 bits of
+# worker id and 12 bits of per-millisecond sequence
+EPOCH_MS = 1735689600000  # 2025-01-01T00:00:00Z
+WORKER_BITS = 10
+SEQUENCE_BITS = 12
+MAX_WORKER_ID = (1 << WORKER_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+
+ALPHABET = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+WIDTH = 13  # 64 bits in base 36, zero-padded so numbers sort by time
+PREFIX = 'ORD'
+
+
+def encode(value):
+    digits = []
+    while value:
+        value, remainder = divmod(value, 36)
+        digits.append(ALPHABET[remainder])
+    return ''.join(reversed(digits)).rjust(WIDTH, '0')
+
+
+def configured_worker_id():
+    """ORDER_NUMBER_WORKER_ID, or None to lease one from the database"""
+    worker_id = getattr(settings, 'ORDER_NUMBER_WORKER_ID', None)
+    if worker_id is None:
+        return None
+    worker_id = int(worker_id)
+    if not 0 <= worker_id <= MAX_WORKER_ID:
+        raise ImproperlyConfigured(f'ORDER_NUMBER_WORKER_ID must be between 0 and {MAX_WORKER_ID}')
+    return worker_id
+
+
+class OrderNumberGenerator:
+    """Unique, roughly time-ordered order numbers without a database round trip.
+    
+    Unless ORDER_NUMBER_WORKER_ID is set, each process leases its worker id by
+    inserting an OrderNumberWorker row: the auto-increment id is shared by
+    every process and host on the database, so running processes get distinct
+    worker ids until 1024 more processes have started. The lease is taken
+    when a request starts, outside any transaction. A lease taken inside a
+    transaction (orders created outside a request) is only kept once that
+    transaction commits, since a rolled-back row lets another process
+    receive the same id.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self._worker_id = None
+        self._lease = None  # OrderNumberWorker id of a lease not yet known to be committed
+        self._last_ms = -1
+        self._sequence = 0
+    
+    def prepare(self, **kwargs):
+        """Lease a worker id ahead of the first order; connected to request_started"""
+        try:
+            with self._lock:
+                self._ensure_worker_id()
+        except DatabaseError:
+            # Tables not migrated yet; generate() leases on first use instead
+            logger.warning('Could not lease an order number worker id', exc_info=True)
+    
+    def _ensure_worker_id(self):
+        from .models import OrderNumberWorker
+        hostname = socket.gethostname()[:255]
+        if self._pid == os.getpid():
+            if self._lease is None:
+                return
+            if OrderNumberWorker.objects.filter(pk=self._lease, hostname=hostname, pid=self._pid).exists():
+                return  # Still inside the transaction that took it
+        
+        # First use, a fork, or a lease that was rolled back
+        worker_id = configured_worker_id()
+        if worker_id is None:
+            worker = OrderNumberWorker.objects.create(hostname=hostname, pid=os.getpid())
+            worker_id = worker.id & MAX_WORKER_ID
+            self._lease = worker.id
+            # Runs at once outside a transaction, and never if this one rolls back
+            transaction.on_commit(functools.partial(self._confirm, worker.id))
+        else:
+            self._lease = None
+        self._worker_id = worker_id
+        self._pid = os.getpid()
+        self._last_ms = -1
+    
+    def _confirm(self, lease):
+        if self._lease == lease:
+            self._lease = None
+    
+    def generate(self):
+        with self._lock:
+            self._ensure_worker_id()
+            
+            now_ms = max(int(time.time() * 1000), self._last_ms)
+            if now_ms == self._last_ms:
+                self._sequence = (self._sequence + 1) & MAX_SEQUENCE
+                if self._sequence == 0:
+                    # Sequence exhausted for this millisecond, wait for the next
+                    while now_ms <= self._last_ms:
+                        now_ms = int(time.time() * 1000)
+            else:
+                self._sequence = 0
+            self._last_ms = now_ms
+            
+            value = ((now_ms - EPOCH_MS) << (WORKER_BITS + SEQUENCE_BITS)
+                     | self._worker_id << SEQUENCE_BITS
+                     | self._sequence)
+        
+        return PREFIX + encode(value)
+
+
+generator = OrderNumberGenerator()
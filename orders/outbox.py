@@ -0,0 +1,107 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+from datetime import timedelta
+from .models import OutboxEvent
+import logging
+import traceback
+
+logger = logging.getLogger(__name__)
+
+# topic -> handlers, each called with the event payload
+HANDLERS = {}
+
+
+def handles(topic):
+    """Register a handler for an outbox topic.
+    
+    Handlers run in a transaction together with marking the event processed,
+    so their database writes happen exactly once; anything outside the
+    database (cache, email) must be safe to repeat.
+    """
+    def register(handler):
+        HANDLERS.setdefault(topic, []).append(handler)
+        return handler
+    return register
+
+
+def publish(topic, payload):
+    """Record an event in the caller's transaction and wake a worker once it commits"""
+    event = OutboxEvent.objects.create(topic=topic, payload=payload)
+    # Eager Celery would run the drain here, in the request; leave it to the poller
+    if getattr(settings, 'OUTBOX_DRAIN_ON_COMMIT', False) and not getattr(settings, 'CELERY_TASK_ALWAYS_EAGER', False):
+        transaction.on_commit(wake_worker)
+    return event
+
+
+def wake_worker():
+    from .tasks import drain_outbox
+    try:
+        drain_outbox.delay()
+    except Exception:
+        # The event is safely stored; the periodic drain will pick it up
+        logger.exception('Could not enqueue outbox drain')
+
+
+def retry_delay(attempts):
+    """Exponential backoff between attempts, capped at OUTBOX_RETRY_MAX_DELAY"""
+    base = getattr(settings, 'OUTBOX_RETRY_BASE_DELAY', timedelta(seconds=5))
+    cap = getattr(settings, 'OUTBOX_RETRY_MAX_DELAY', timedelta(hours=1))
+    return min(base * 2 ** (attempts - 1), cap)
+
+
+def pending_events():
+    return OutboxEvent.objects.filter(processed_at__isnull=True, failed_at__isnull=True)
+
+
+def drain(batch_size=100):
+    """Handle one batch of due events; returns how many were attempted"""
+    max_attempts = getattr(settings, 'OUTBOX_MAX_ATTEMPTS', 10)
+    
+    with transaction.atomic():
+        # skip_locked lets several workers drain side by side where the database supports it
+        events = list(
+            pending_events().filter(available_at__lte=timezone.now())
+            .select_for_update(skip_locked=True)
+            .order_by('available_at', 'id')[:batch_size]
+        )
+        for event in events:
+            try:
+                with transaction.atomic():
+                    for handler in HANDLERS.get(event.topic, []):
+                        handler(event.payload)
+            except Exception as e:
+                now = timezone.now()
+                event.attempts += 1
+                event.last_error = ''.join(traceback.format_exception(e))[-4000:]
+                if event.attempts >= max_attempts:
+                    event.failed_at = now
+                    logger.error('Outbox event %s (%s) failed permanently', event.pk, event.topic)
+                else:
+                    event.available_at = now + retry_delay(event.attempts)
+            else:
+                event.attempts += 1
+                event.processed_at = timezone.now()
+        
+        OutboxEvent.objects.bulk_update(
+            events, ['attempts', 'last_error', 'available_at', 'processed_at', 'failed_at']
+        )
+    
+    return len(events)
+
+
+def outbox_metrics():
+    """Queue depth and lag of the outbox, in one query"""
+    now = timezone.now()
+    pending = Q(processed_at__isnull=True, failed_at__isnull=True)
+    row = OutboxEvent.objects.aggregate(
+        pending=Count('id', filter=pending),
+        due=Count('id', filter=pending & Q(available_at__lte=now)),
+        retrying=Count('id', filter=pending & Q(attempts__gt=0)),
+        failed=Count('id', filter=Q(failed_at__isnull=False)),
+        oldest_pending=Min('created_at', filter=pending),
+    )
+    oldest = row.pop('oldest_pending')
+    row['lag_seconds'] = round((now - oldest).total_seconds(), 3) if oldest else 0
+    return row
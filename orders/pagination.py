@@ -0,0 +1,75 @@
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from django.db.models import Q
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+import binascii
+import uuid
+
+
+def encode_cursor(timestamp, pk):
+    """Opaque keyset position just after the row with this timestamp and id"""
+    return urlsafe_b64encode(f"{timestamp.isoformat()}|{pk}".encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Return (timestamp, pk) from a cursor, raising ValueError if it is malformed"""
+    try:
+        timestamp, pk = urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(timestamp), uuid.UUID(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise ValueError('Invalid cursor') from e
+
+
+class OrderCursorPagination(BasePagination):
+    """Newest-first keyset paging over a user's live and archived orders.
+    
+    Each source is read with the same (-created_at, -id) keyset and the
+    pages are merged, so the cost per page does not grow with history.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+    
+    def paginate_querysets(self, querysets, request):
+        self.request = request
+        page_size = self.get_page_size(request)
+        
+        position = None
+        if self.cursor_query_param in request.query_params:
+            try:
+                position = decode_cursor(request.query_params[self.cursor_query_param])
+            except ValueError:
+                raise NotFound('Invalid cursor')
+        
+        rows = []
+        for queryset in querysets:
+            if position:
+                created_at, pk = position
+                queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+            rows.extend(queryset.order_by('-created_at', '-pk')[:page_size + 1])
+        rows.sort(key=lambda row: (row.created_at, row.pk), reverse=True)
+        
+        self.page = rows[:page_size]
+        self.has_next = len(rows) > page_size
+        return self.page
+    
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, encode_cursor(last.created_at, last.pk))
+    
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'previous': None, 'results': data})
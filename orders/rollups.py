@@ -0,0 +1,204 @@
+from django.db import transaction, IntegrityError
+from django.db.models import Count, DateField, F, Q, Sum
+from django.db.models.functions import Trunc
+from django.utils import timezone
+from datetime import datetime, time, timedelta
+from .models import (
+    Order, OrderItem, ArchivedOrder, ArchivedOrderItem,
+    DailyPlatformSales, DailySellerSales, DailyProductSales
+)
+
+LOST_STATUSES = ('cancelled', 'refunded')
+ROLLUP_MODELS = (DailyPlatformSales, DailySellerSales, DailyProductSales)
+ORDER_SOURCES = ((Order, OrderItem), (ArchivedOrder, ArchivedOrderItem))
+
+
+def placed_deltas(units, revenue):
+    return {'orders': 1, 'units': units, 'revenue': revenue}
+
+
+# Rollup changes for each status an order can move into
+STATUS_DELTAS = {
+    'shipped': lambda units, revenue: {'shipped_orders': 1},
+    'cancelled': lambda units, revenue: {'cancelled_orders': 1, 'lost_revenue': revenue},
+    'refunded': lambda units, revenue: {'refunded_orders': 1, 'lost_revenue': revenue},
+}
+
+
+def increment(model, lookup, deltas):
+    """Add deltas to the rollup row identified by lookup, creating it if needed"""
+    rows = model.objects.filter(**lookup)
+    changes = {field: F(field) + value for field, value in deltas.items()}
+    
+    if rows.update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **deltas)
+    except IntegrityError:
+        # Another request created the row first
+        rows.update(**changes)
+
+
+def add_deltas(totals, deltas):
+    for field, value in deltas.items():
+        totals[field] = totals.get(field, 0) + value
+
+
+def apply_orders_deltas(orders, deltas_for):
+    """Apply deltas_for(units, revenue) to every rollup the orders count towards.
+    
+    Platform rows use the order total; seller and product rows use the
+    totals of their own lines. Orders sharing a rollup row are summed
+    first, so each row is written once.
+    """
+    orders = {order.pk: order for order in orders}
+    lines = {}
+    for item in OrderItem.objects.filter(order__in=list(orders)).values(
+            'order_id', 'product_id', 'seller', 'quantity', 'total_price'):
+        order_lines = lines.setdefault(item['order_id'], {'products': {}, 'sellers': {}})
+        for key, group in ((item['product_id'], order_lines['products']),
+                           (item['seller'], order_lines['sellers'])):
+            line = group.setdefault(key, {'units': 0, 'revenue': 0, 'seller_id': item['seller']})
+            line['units'] += item['quantity']
+            line['revenue'] += item['total_price']
+    
+    rows = {}
+    for order_id, order_lines in lines.items():
+        order = orders[order_id]
+        date = timezone.localdate(order.created_at)
+        total_units = sum(line['units'] for line in order_lines['products'].values())
+        add_deltas(rows.setdefault((DailyPlatformSales, (('date', date),)), {}),
+                   deltas_for(total_units, order.total_amount))
+        for seller_id, line in order_lines['sellers'].items():
+            add_deltas(rows.setdefault((DailySellerSales, (('date', date), ('seller_id', seller_id))), {}),
+                       deltas_for(line['units'], line['revenue']))
+        for product_id, line in order_lines['products'].items():
+            lookup = (('date', date), ('product_id', product_id), ('seller_id', line['seller_id']))
+            add_deltas(rows.setdefault((DailyProductSales, lookup), {}),
+                       deltas_for(line['units'], line['revenue']))
+    
+    for (model, lookup), deltas in rows.items():
+        increment(model, dict(lookup), deltas)
+
+
+def record_order_placed(order):
+    apply_orders_deltas([order], placed_deltas)
+
+
+def record_orders_status(orders, status):
+    if status in STATUS_DELTAS:
+        apply_orders_deltas(orders, STATUS_DELTAS[status])
+
+
+def line_aggregates():
+    """Aggregates over OrderItem rows matching the incremental seller/product deltas"""
+    return {
+        'orders': Count('order', distinct=True),
+        'units': Sum('quantity'),
+        'revenue': Sum('total_price'),
+        'shipped_orders': Count('order', distinct=True, filter=Q(order__shipped_at__isnull=False)),
+        'cancelled_orders': Count('order', distinct=True, filter=Q(order__status='cancelled')),
+        'refunded_orders': Count('order', distinct=True, filter=Q(order__status='refunded')),
+        'lost_revenue': Sum('total_price', filter=Q(order__status__in=LOST_STATUSES)),
+    }
+
+
+def without_nulls(row):
+    return {field: 0 if value is None else value for field, value in row.items()}
+
+
+def rebuild_day(date):
+    """Recompute all rollups for one day from the live and archived orders"""
+    platform = {}
+    sellers = {}
+    products = {}
+    
+    # Day bounds as datetimes; a __date lookup casts every row's timestamp
+    start = timezone.make_aware(datetime.combine(date, time.min))
+    end = timezone.make_aware(datetime.combine(date + timedelta(days=1), time.min))
+    
+    with transaction.atomic():
+        for order_model, item_model in ORDER_SOURCES:
+            orders = order_model.objects.filter(created_at__gte=start, created_at__lt=end)
+            items = item_model.objects.filter(order__in=orders)
+            add_deltas(platform, without_nulls(orders.aggregate(
+                orders=Count('id'),
+                revenue=Sum('total_amount'),
+                shipped_orders=Count('id', filter=Q(shipped_at__isnull=False)),
+                cancelled_orders=Count('id', filter=Q(status='cancelled')),
+                refunded_orders=Count('id', filter=Q(status='refunded')),
+                lost_revenue=Sum('total_amount', filter=Q(status__in=LOST_STATUSES)),
+            )))
+            add_deltas(platform, without_nulls(items.aggregate(units=Sum('quantity'))))
+            
+            # Archived lines outlive deleted sellers; those have no rollup row
+            items = items.exclude(seller=None)
+            for row in items.values('seller').annotate(**line_aggregates()).order_by():
+                add_deltas(sellers.setdefault(row.pop('seller'), {}), without_nulls(row))
+            for row in items.values('product', 'seller').annotate(**line_aggregates()).order_by():
+                add_deltas(products.setdefault((row.pop('product'), row.pop('seller')), {}), without_nulls(row))
+        
+        for model in ROLLUP_MODELS:
+            model.objects.filter(date=date).delete()
+        if not platform['orders']:
+            return 0
+        
+        DailyPlatformSales.objects.create(date=date, **platform)
+        DailySellerSales.objects.bulk_create([
+            DailySellerSales(date=date, seller_id=seller_id, **row)
+            for seller_id, row in sellers.items()
+        ])
+        DailyProductSales.objects.bulk_create([
+            DailyProductSales(date=date, product_id=product_id, seller_id=seller_id, **row)
+            for (product_id, seller_id), row in products.items()
+        ])
+    
+    return platform['orders']
+
+
+MEASURES = ('orders', 'units', 'revenue', 'shipped_orders', 'cancelled_orders',
+            'refunded_orders', 'lost_revenue')
+
+
+def as_numbers(row):
+    """Replace missing sums with zero and decimals with floats for the API"""
+    return {field: float(row.get(field) or 0) if 'revenue' in field else row.get(field) or 0
+            for field in MEASURES}
+
+
+def sales_series(rollups, start, end, granularity):
+    """Per-period totals between start and end (inclusive), in one grouped query"""
+    rows = (rollups.filter(date__range=(start, end))
+            .annotate(period=Trunc('date', granularity, output_field=DateField()))
+            .values('period')
+            .annotate(**{field: Sum(field) for field in MEASURES})
+            .order_by('period'))
+    return [{'period': row['period'], **as_numbers(row)} for row in rows]
+
+
+def period_comparison(rollups, start, end):
+    """Totals for start..end and the preceding period of the same length, in one query"""
+    previous_start = start - (end - start) - timedelta(days=1)
+    current = Q(date__gte=start)
+    previous = Q(date__lt=start)
+    
+    sums = {}
+    for field in MEASURES:
+        sums[f'current_{field}'] = Sum(field, filter=current)
+        sums[f'previous_{field}'] = Sum(field, filter=previous)
+    row = rollups.filter(date__range=(previous_start, end)).aggregate(**sums)
+    
+    totals = as_numbers({field: row[f'current_{field}'] for field in MEASURES})
+    previous_totals = as_numbers({field: row[f'previous_{field}'] for field in MEASURES})
+    change = {
+        field: round((totals[field] - previous_totals[field]) / previous_totals[field] * 100, 1)
+        if previous_totals[field] else None
+        for field in MEASURES
+    }
+    return {
+        'previous_start': previous_start,
+        'totals': totals,
+        'previous_totals': previous_totals,
+        'change': change,
+    }
@@ -1,18 +1,25 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
-from products.serializers import ProductListSerializer
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from products.models import Product, StockReservation
+from cart.models import Cart
 from .models import Order, OrderItem, OrderStatusHistory, ShippingAddress
+from . import outbox
+from decimal import Decimal
+import uuid
 
 User = get_user_model()
 
 
 class OrderItemSerializer(serializers.ModelSerializer):
-    """Serializer for OrderItem model"""
-    product = ProductListSerializer(read_only=True)
+    """Serializer for OrderItem model, rendered from the purchase-time snapshot"""
     
     class Meta:
         model = OrderItem
-        fields = ['id', 'product', 'quantity', 'unit_price', 'total_price']
+        fields = ['id', 'product', 'product_title', 'product_image', 'seller',
+                 'product_attributes', 'quantity', 'unit_price', 'total_price']
+        read_only_fields = fields
 
 
 class OrderStatusHistorySerializer(serializers.ModelSerializer):
@@ -46,15 +53,12 @@ class OrderSerializer(serializers.ModelSerializer):
 class OrderListSerializer(serializers.ModelSerializer):
     """Simplified serializer for order listings"""
     user_name = serializers.CharField(source='user.first_name', read_only=True)
-    item_count = serializers.SerializerMethodField()
+    item_count = serializers.IntegerField(read_only=True)
     
     class Meta:
         model = Order
         fields = ['id', 'order_number', 'user_name', 'status', 'payment_status', 
                  'total_amount', 'item_count', 'created_at']
-    
-    def get_item_count(self, obj):
-        return obj.items.count()
 
 
 class OrderCreateSerializer(serializers.ModelSerializer):
@@ -80,6 +84,11 @@ class OrderCreateSerializer(serializers.ModelSerializer):
             
             if item['quantity'] <= 0:
                 raise serializers.ValidationError("Quantity must be greater than 0")
+            
+            try:
+                item['product_id'] = uuid.UUID(str(item['product_id']))
+            except ValueError:
+                raise serializers.ValidationError("Invalid product_id")
         
         return value
     
@@ -87,49 +96,66 @@ class OrderCreateSerializer(serializers.ModelSerializer):
         items_data = validated_data.pop('items')
         user = self.context['request'].user
         
-        # Calculate totals
-        subtotal = 0
+        carts = Cart.objects.filter(user=user)
+        quantities = {}
         for item_data in items_data:
-            from products.models import Product
-            product = Product.objects.get(id=item_data['product_id'])
-            subtotal += product.discounted_price * item_data['quantity']
+            product_id = item_data['product_id']
+            quantities[product_id] = quantities.get(product_id, 0) + item_data['quantity']
+        
+        # Check stock against holds placed by other shoppers
+        products = Product.objects.select_related('category', 'brand').prefetch_related('images').in_bulk(quantities)
+        reserved = StockReservation.reserved_quantities(quantities, exclude_carts=carts)
+        for product_id, quantity in quantities.items():
+            product = products.get(product_id)
+            if product is None:
+                raise serializers.ValidationError({'items': f"Product {product_id} not found"})
+            if quantity > product.stock_quantity - reserved.get(product.pk, 0):
+                raise serializers.ValidationError(
+                    {'items': f"Not enough stock available for {product.title}"}
+                )
+        
+        # Build order items with prices and product details captured once
+        order_items = [
+            OrderItem.from_product(products[item_data['product_id']], item_data['quantity'])
+            for item_data in items_data
+        ]
+        subtotal = sum((order_item.total_price for order_item in order_items), Decimal('0'))
         
         # Calculate shipping and tax (simplified)
-        shipping_cost = 10.00  # Fixed shipping cost
-        tax_amount = subtotal * 0.1  # 10% tax
+        shipping_cost = Decimal('10.00')  # Fixed shipping cost
+        tax_amount = subtotal * Decimal('0.1')  # 10% tax
         total_amount = subtotal + shipping_cost + tax_amount
         
-        # Create order
-        order = Order.objects.create(
-            user=user,
-            subtotal=subtotal,
-            shipping_cost=shipping_cost,
-            tax_amount=tax_amount,
-            total_amount=total_amount,
-            **validated_data
-        )
-        
-        # Create order items
-        for item_data in items_data:
-            from products.models import Product
-            product = Product.objects.get(id=item_data['product_id'])
-            OrderItem.objects.create(
+        with transaction.atomic():
+            order = Order.objects.create(
+                user=user,
+                subtotal=subtotal,
+                shipping_cost=shipping_cost,
+                tax_amount=tax_amount,
+                total_amount=total_amount,
+                **validated_data
+            )
+            
+            for order_item in order_items:
+                order_item.order = order
+                order_item.placed_at = order.created_at
+            OrderItem.objects.bulk_create(order_items)
+            
+            # Convert the user's checkout holds into permanent stock decrements,
+            # rolling the whole order back if any line is short on stock
+            try:
+                StockReservation.commit(carts, quantities)
+            except DjangoValidationError as e:
+                raise serializers.ValidationError({'items': e.messages})
+            
+            # Create initial status history
+            OrderStatusHistory.objects.create(
                 order=order,
-                product=product,
-                quantity=item_data['quantity'],
-                unit_price=product.discounted_price
+                status='pending',
+                note='Order created'
             )
             
-            # Update product stock
-            product.stock_quantity -= item_data['quantity']
-            product.save()
-        
-        # Create initial status history
-        OrderStatusHistory.objects.create(
-            order=order,
-            status='pending',
-            note='Order created'
-        )
+            outbox.publish('order.placed', {'order_id': order.pk})
         
         return order
 
@@ -153,20 +179,10 @@ class OrderStatusUpdateSerializer(serializers.Serializer):
     
     def validate_status(self, value):
         """Validate status transition"""
-        order = self.context['order']
+        order = self.context.get('order', self.instance)
         current_status = order.status
         
-        # Define valid status transitions
-        valid_transitions = {
-            'pending': ['processing', 'cancelled'],
-            'processing': ['shipped', 'cancelled'],
-            'shipped': ['delivered'],
-            'delivered': ['refunded'],
-            'cancelled': [],
-            'refunded': []
-        }
-        
-        if value not in valid_transitions.get(current_status, []):
+        if value not in Order.STATUS_TRANSITIONS.get(current_status, []):
             raise serializers.ValidationError(
                 f"Cannot change status from {current_status} to {value}"
             )
@@ -174,6 +190,18 @@ class OrderStatusUpdateSerializer(serializers.Serializer):
         return value
 
 
+class OrderBulkStatusUpdateSerializer(serializers.Serializer):
+    """Serializer for moving many orders to one status"""
+    order_ids = serializers.ListField(child=serializers.UUIDField(), allow_empty=False, max_length=500)
+    status = serializers.ChoiceField(choices=Order.STATUS_CHOICES)
+    note = serializers.CharField(required=False, allow_blank=True)
+    
+    def validate_status(self, value):
+        if not Order.status_predecessors(value):
+            raise serializers.ValidationError(f"Orders cannot be moved to {value}")
+        return value
+
+
 
 
 
@@ -0,0 +1,136 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Exists, Max, OuterRef, Q, Sum
+from django.utils import timezone
+from datetime import timedelta
+from .models import Order, OrderItem, ArchivedOrder, ArchivedOrderItem
+
+
+def status_counts():
+    """Conditional aggregates shared by all order dashboards"""
+    return {
+        'total_orders': Count('id'),
+        'pending_orders': Count('id', filter=Q(status='pending')),
+        'processing_orders': Count('id', filter=Q(status='processing')),
+        'shipped_orders': Count('id', filter=Q(status='shipped')),
+        'delivered_orders': Count('id', filter=Q(status='delivered')),
+    }
+
+
+def cached_stats(key, compute):
+    """Serve stats from the cache for ORDER_STATS_CACHE_TIMEOUT seconds (0 disables caching)"""
+    timeout = getattr(settings, 'ORDER_STATS_CACHE_TIMEOUT', 0)
+    if not timeout:
+        return compute()
+    
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute()
+        cache.set(key, stats, timeout)
+    return stats
+
+
+# Expires totals for archive versions that are no longer read
+ARCHIVE_TOTALS_TIMEOUT = 60 * 60 * 24
+
+
+def archive_version():
+    """The time of the latest archive run, read from the database so every process sees it"""
+    latest = ArchivedOrder.objects.aggregate(latest=Max('archived_at'))['latest']
+    return int(latest.timestamp() * 1_000_000) if latest else 0
+
+
+def archived_totals(key, compute):
+    """Archived orders never change, so their totals are cached until the next archive run"""
+    return cache.get_or_set(f'{key}:archive:{archive_version()}', compute, ARCHIVE_TOTALS_TIMEOUT)
+
+
+def add_totals(live, archived):
+    return {field: (live[field] or 0) + (archived.get(field) or 0) for field in live}
+
+
+def user_stats_key(user_id):
+    return f'order_stats:user:{user_id}'
+
+
+def seller_stats_key(seller_id):
+    return f'order_stats:seller:{seller_id}'
+
+
+ADMIN_STATS_KEY = 'order_stats:admin'
+
+
+def get_order_stats(user):
+    def compute():
+        aggregates = {
+            **status_counts(),
+            'total_spent': Sum('total_amount', filter=Q(payment_status='paid')),
+        }
+        stats = add_totals(
+            Order.objects.filter(user=user).aggregate(**aggregates),
+            archived_totals(user_stats_key(user.pk),
+                            lambda: ArchivedOrder.objects.filter(user=user).aggregate(**aggregates))
+        )
+        stats['total_spent'] = float(stats['total_spent'])
+        return stats
+    
+    return cached_stats(user_stats_key(user.pk), compute)
+
+
+def seller_totals(order_model, item_model, seller):
+    seller_items = item_model.objects.filter(order=OuterRef('pk'), seller=seller)
+    stats = order_model.objects.filter(Exists(seller_items)).aggregate(
+        **status_counts(),
+        total_revenue=Sum('total_amount', filter=Q(payment_status='paid')),
+    )
+    stats['products_sold'] = item_model.objects.filter(
+        seller=seller,
+        order__payment_status='paid'
+    ).aggregate(total=Sum('quantity'))['total']
+    return stats
+
+
+def get_seller_stats(seller):
+    def compute():
+        stats = add_totals(
+            seller_totals(Order, OrderItem, seller),
+            archived_totals(seller_stats_key(seller.pk),
+                            lambda: seller_totals(ArchivedOrder, ArchivedOrderItem, seller))
+        )
+        stats['total_revenue'] = float(stats['total_revenue'])
+        return stats
+    
+    return cached_stats(seller_stats_key(seller.pk), compute)
+
+
+def get_admin_stats():
+    def compute():
+        thirty_days_ago = timezone.now() - timedelta(days=30)
+        aggregates = {
+            **status_counts(),
+            'cancelled_orders': Count('id', filter=Q(status='cancelled')),
+            'total_revenue': Sum('total_amount', filter=Q(payment_status='paid')),
+        }
+        # Orders are archived months after they finish, so none are recent
+        stats = add_totals(
+            Order.objects.aggregate(
+                **aggregates,
+                recent_orders=Count('id', filter=Q(created_at__gte=thirty_days_ago)),
+            ),
+            archived_totals(ADMIN_STATS_KEY, lambda: ArchivedOrder.objects.aggregate(**aggregates))
+        )
+        stats['total_revenue'] = float(stats['total_revenue'])
+        return stats
+    
+    return cached_stats(ADMIN_STATS_KEY, compute)
+
+
+def invalidate_orders_stats(order_ids):
+    """Drop cached stats for everyone who can see any of the orders"""
+    user_ids = Order.objects.filter(pk__in=order_ids).values_list('user', flat=True).distinct()
+    seller_ids = OrderItem.objects.filter(order__in=order_ids).values_list('seller', flat=True).distinct()
+    cache.delete_many(
+        [ADMIN_STATS_KEY]
+        + [user_stats_key(user_id) for user_id in user_ids]
+        + [seller_stats_key(seller_id) for seller_id in seller_ids]
+    )
@@ -0,0 +1,11 @@
+from celery import shared_task
+from django.conf import settings
+from .outbox import drain
+
+
+@shared_task(ignore_result=True)
+def drain_outbox():
+    """Drain every due outbox event, one batch at a time"""
+    batch_size = getattr(settings, 'OUTBOX_BATCH_SIZE', 100)
+    while drain(batch_size) == batch_size:
+        pass
@@ -0,0 +1,110 @@
+from datetime import timedelta
+from types import SimpleNamespace
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from accounts.models import User
+from cart.models import CartItem
+from products.models import Category, Product
+from .idempotency import get_request_fingerprint
+from .models import IdempotencyKey, Order
+
+
+class IdempotencyKeyTests(TestCase):
+    """Idempotency-Key handling on a function view (add to cart) and a class view (place order)"""
+
+    def setUp(self):
+        cache.clear()  # Throttle counters
+        seller = User.objects.create_user(
+            email='seller@example.com', username='seller', first_name='Sam', last_name='Seller',
+            password='Seller-password-1', is_seller=True
+        )
+        self.shopper = User.objects.create_user(
+            email='shopper@example.com', username='shopper', first_name='Pat', last_name='Shopper',
+            password='Shopper-password-1', is_verified=True
+        )
+        self.product = Product.objects.create(
+            title='Mug', description='A mug', price=10, stock_quantity=3,
+            category=Category.objects.create(name='Kitchen'), seller=seller, status='approved'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.shopper)
+
+    def add_to_cart(self, quantity, key='key-1'):
+        return self.client.post(reverse('add_to_cart'), {'product': str(self.product.pk), 'quantity': quantity},
+                                format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retry_replays_the_stored_response(self):
+        first = self.add_to_cart(1)
+        retry = self.add_to_cart(1)
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.headers['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(CartItem.objects.get(cart__user=self.shopper).quantity, 1)
+
+    def test_reusing_a_key_with_a_different_body_is_rejected(self):
+        self.add_to_cart(1)
+
+        response = self.add_to_cart(2)
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(CartItem.objects.get(cart__user=self.shopper).quantity, 1)
+
+    def test_request_still_in_progress_conflicts(self):
+        request = SimpleNamespace(method='POST', path=reverse('add_to_cart'),
+                                  data={'product': str(self.product.pk), 'quantity': 1})
+        IdempotencyKey.objects.create(
+            scope=f'user:{self.shopper.pk}', key='key-1', request_fingerprint=get_request_fingerprint(request),
+            expires_at=timezone.now() + timedelta(hours=1)
+        )
+
+        response = self.add_to_cart(1)
+
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(CartItem.objects.filter(cart__user=self.shopper).exists())
+
+    def test_abandoned_request_releases_its_key(self):
+        request = SimpleNamespace(method='POST', path=reverse('add_to_cart'),
+                                  data={'product': str(self.product.pk), 'quantity': 1})
+        record = IdempotencyKey.objects.create(
+            scope=f'user:{self.shopper.pk}', key='key-1', request_fingerprint=get_request_fingerprint(request),
+            expires_at=timezone.now() + timedelta(hours=1)
+        )
+        IdempotencyKey.objects.filter(pk=record.pk).update(created_at=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(self.add_to_cart(1).status_code, 201)
+
+    def test_corrected_request_can_reuse_a_key_after_a_client_error(self):
+        rejected = self.add_to_cart(10)
+        corrected = self.add_to_cart(1)
+
+        self.assertEqual(rejected.status_code, 400)
+        self.assertEqual(corrected.status_code, 201)
+        self.assertNotIn('Idempotent-Replayed', corrected.headers)
+
+    def test_order_validation_error_releases_the_key(self):
+        shipping = {
+            'shipping_first_name': 'Pat', 'shipping_last_name': 'Shopper', 'shipping_email': 'pat@example.com',
+            'shipping_phone': '555 0100', 'shipping_address': '1 Main St', 'shipping_city': 'Springfield',
+            'shipping_state': 'IL', 'shipping_country': 'US', 'shipping_zip_code': '62701',
+        }
+
+        def place_order(quantity):
+            return self.client.post(
+                reverse('order_list_create'),
+                {**shipping, 'items': [{'product_id': str(self.product.pk), 'quantity': quantity}]},
+                format='json', HTTP_IDEMPOTENCY_KEY='order-1'
+            )
+
+        rejected = place_order(10)
+        placed = place_order(2)
+        replayed = place_order(2)
+
+        self.assertEqual(rejected.status_code, 400)
+        self.assertEqual(placed.status_code, 201)
+        self.assertEqual(replayed.headers['Idempotent-Replayed'], 'true')
+        self.assertEqual(Order.objects.filter(user=self.shopper).count(), 1)
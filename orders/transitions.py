@@ -0,0 +1,48 @@
+from django.db import transaction
+from django.db.models import Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from .models import Order, OrderStatusHistory
+from . import outbox
+
+
+def transition_orders(orders, order_ids, status, user=None, note=''):
+    """Move the given orders to status wherever the state machine allows it.
+    
+    orders is the queryset the caller may act on. Transitions are checked by
+    a single conditional UPDATE on the current status, so no order is read
+    before it is changed. Returns one result per requested id, in order.
+    """
+    now = timezone.now()
+    changes = {'status': status, 'updated_at': now}
+    timestamp_field = Order.STATUS_TIMESTAMPS.get(status)
+    if timestamp_field:
+        changes[timestamp_field] = Coalesce(timestamp_field, Value(now))
+    
+    targets = orders.filter(pk__in=order_ids)
+    with transaction.atomic():
+        targets.filter(status__in=Order.status_predecessors(status)).update(**changes)
+        
+        # Rows stamped with this update's timestamp are the ones we moved
+        current = {pk: (row_status, updated_at) for pk, row_status, updated_at
+                   in targets.values_list('pk', 'status', 'updated_at')}
+        updated = [pk for pk, (row_status, updated_at) in current.items()
+                   if row_status == status and updated_at == now]
+        
+        OrderStatusHistory.objects.bulk_create([
+            OrderStatusHistory(order_id=pk, status=status, note=note, updated_by=user)
+            for pk in updated
+        ])
+        if updated:
+            outbox.publish('order.status_changed', {'order_ids': updated, 'status': status})
+    
+    moved = set(updated)
+    results = []
+    for pk in order_ids:
+        if pk in moved:
+            results.append({'id': pk, 'result': 'updated', 'status': status})
+        elif pk in current:
+            results.append({'id': pk, 'result': 'invalid_transition', 'status': current[pk][0]})
+        else:
+            results.append({'id': pk, 'result': 'not_found', 'status': None})
+    return results
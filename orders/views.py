@@ -1,38 +1,103 @@
-from rest_framework import generics, status, permissions
+from rest_framework import generics, status, permissions, serializers
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
-from django.db.models import Q, Sum, Count
+from rest_framework.utils.urls import replace_query_param
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Count, Exists, OuterRef, Prefetch, Q
+from django.http import Http404
+from django.shortcuts import get_object_or_404
 from django.utils import timezone
-from .models import Order, OrderItem, OrderStatusHistory, ShippingAddress
+from django.utils.decorators import method_decorator
+from datetime import date, datetime, time, timedelta
+from .idempotency import idempotent
+from .pagination import OrderCursorPagination, encode_cursor, decode_cursor
+from .stats import get_order_stats, get_seller_stats, get_admin_stats
+from .outbox import outbox_metrics
+from .models import (
+    Order, OrderItem, OrderStatusHistory, ShippingAddress,
+    ArchivedOrder, ArchivedOrderStatusHistory,
+    DailyPlatformSales, DailySellerSales, DailyProductSales
+)
+from .rollups import sales_series, period_comparison
+from .transitions import transition_orders
 from .serializers import (
-    OrderSerializer, OrderListSerializer, OrderCreateSerializer,
-    OrderStatusUpdateSerializer, ShippingAddressSerializer
+    OrderSerializer, OrderListSerializer, OrderCreateSerializer, OrderItemSerializer,
+    OrderStatusUpdateSerializer, OrderBulkStatusUpdateSerializer, ShippingAddressSerializer
 )
 
 
+@method_decorator(idempotent, name='post')
 class OrderListCreateView(generics.ListCreateAPIView):
     """List and create orders"""
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = OrderCursorPagination
     
     def get_serializer_class(self):
         if self.request.method == 'POST':
             return OrderCreateSerializer
         return OrderListSerializer
     
+    def user_orders(self, model):
+        return (
+            model.objects.filter(user=self.request.user)
+            .select_related('user')
+            .annotate(item_count=Count('items'))
+        )
+    
     def get_queryset(self):
-        return Order.objects.filter(user=self.request.user)
+        return self.user_orders(Order)
+    
+    def list(self, request, *args, **kwargs):
+        # Live and archived orders are paged as one newest-first list
+        page = self.paginator.paginate_querysets(
+            [self.user_orders(Order), self.user_orders(ArchivedOrder)], request
+        )
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
     
-    def perform_create(self, serializer):
-        serializer.save()
-
 
 class OrderDetailView(generics.RetrieveAPIView):
     """Retrieve order details"""
     serializer_class = OrderSerializer
     permission_classes = [permissions.IsAuthenticated]
     
+    def user_orders(self, model, history_model):
+        return (
+            model.objects.filter(user=self.request.user)
+            .select_related('user')
+            .prefetch_related(
+                'items',
+                Prefetch('status_history', queryset=history_model.objects.select_related('updated_by'))
+            )
+        )
+    
     def get_queryset(self):
-        return Order.objects.filter(user=self.request.user)
+        return self.user_orders(Order, OrderStatusHistory)
+    
+    def get_object(self):
+        try:
+            return super().get_object()
+        except Http404:
+            # Old finished orders live in the archive tables
+            order = get_object_or_404(
+                self.user_orders(ArchivedOrder, ArchivedOrderStatusHistory), pk=self.kwargs['pk']
+            )
+            self.check_object_permissions(self.request, order)
+            return order
+
+
+def updatable_orders(user):
+    """Orders whose status the user may change"""
+    # Sellers can only update orders for their products
+    if user.is_seller:
+        return Order.objects.filter(
+            Exists(OrderItem.objects.filter(order=OuterRef('pk'), seller=user))
+        )
+    # Admins can update any order
+    elif user.is_staff:
+        return Order.objects.all()
+    else:
+        return Order.objects.none()
 
 
 class OrderStatusUpdateView(generics.UpdateAPIView):
@@ -41,40 +106,113 @@ class OrderStatusUpdateView(generics.UpdateAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
-        # Sellers can only update orders for their products
-        if self.request.user.is_seller:
-            return Order.objects.filter(items__product__seller=self.request.user).distinct()
-        # Admins can update any order
-        elif self.request.user.is_staff:
-            return Order.objects.all()
-        else:
-            return Order.objects.none()
+        return updatable_orders(self.request.user)
     
     def perform_update(self, serializer):
-        order = self.get_object()
-        old_status = order.status
+        order = serializer.instance
         new_status = serializer.validated_data['status']
-        note = serializer.validated_data.get('note', '')
-        
-        # Update order status
-        order.status = new_status
-        order.save()
-        
-        # Create status history entry
-        OrderStatusHistory.objects.create(
-            order=order,
-            status=new_status,
-            note=note,
-            updated_by=self.request.user
+        [result] = transition_orders(
+            self.get_queryset(), [order.pk], new_status,
+            user=self.request.user, note=serializer.validated_data.get('note', '')
         )
-        
-        # Update timestamps based on status
-        if new_status == 'shipped' and not order.shipped_at:
-            order.shipped_at = timezone.now()
-            order.save()
-        elif new_status == 'delivered' and not order.delivered_at:
-            order.delivered_at = timezone.now()
-            order.save()
+        if result['result'] != 'updated':
+            # Another request changed the order since it was validated
+            raise serializers.ValidationError(
+                {'status': f"Cannot change status from {result['status']} to {new_status}"}
+            )
+        order.status = new_status
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def bulk_update_order_status(request):
+    """Move many orders to one status, reporting the outcome per order"""
+    if not (request.user.is_seller or request.user.is_staff):
+        return Response({'error': 'Access denied'}, status=status.HTTP_403_FORBIDDEN)
+    
+    serializer = OrderBulkStatusUpdateSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    data = serializer.validated_data
+    
+    results = transition_orders(
+        updatable_orders(request.user), data['order_ids'], data['status'],
+        user=request.user, note=data.get('note', '')
+    )
+    return Response({
+        'status': data['status'],
+        'updated': sum(1 for result in results if result['result'] == 'updated'),
+        'results': results
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def fulfilment_queue(request):
+    """A seller's own order lines grouped by order, newest first, paged by keyset"""
+    user = request.user
+    if not user.is_seller:
+        return Response({'error': 'Only sellers have a fulfilment queue'}, status=status.HTTP_403_FORBIDDEN)
+    
+    params = request.query_params
+    lines = OrderItem.objects.filter(seller=user)
+    if 'status' in params:
+        if params['status'] not in Order.STATUS_TRANSITIONS:
+            return Response({'error': 'Invalid status'}, status=status.HTTP_400_BAD_REQUEST)
+        lines = lines.filter(order__status=params['status'])
+    try:
+        # Day bounds as datetimes so the filters can use the queue index
+        if 'since' in params:
+            since = date.fromisoformat(params['since'])
+            lines = lines.filter(placed_at__gte=timezone.make_aware(datetime.combine(since, time.min)))
+        if 'until' in params:
+            until = date.fromisoformat(params['until']) + timedelta(days=1)
+            lines = lines.filter(placed_at__lt=timezone.make_aware(datetime.combine(until, time.min)))
+    except ValueError:
+        return Response({'error': 'Dates must be in YYYY-MM-DD format'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        page_size = min(int(params.get('page_size', 20)), 100)
+        if page_size < 1:
+            raise ValueError
+    except ValueError:
+        return Response({'error': 'page_size must be a positive integer'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    heads = lines.values('placed_at', 'order_id').distinct().order_by('-placed_at', '-order_id')
+    if 'cursor' in params:
+        try:
+            placed_at, order_id = decode_cursor(params['cursor'])
+        except ValueError:
+            return Response({'error': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+        heads = heads.filter(Q(placed_at__lt=placed_at) | Q(placed_at=placed_at, order_id__lt=order_id))
+    heads = list(heads[:page_size + 1])
+    page, has_more = heads[:page_size], len(heads) > page_size
+    
+    groups = {head['order_id']: [] for head in page}
+    for line in (OrderItem.objects.filter(seller=user, order_id__in=groups)
+                 .select_related('order').order_by('id')):
+        groups[line.order_id].append(line)
+    
+    results = []
+    for order_lines in groups.values():
+        order = order_lines[0].order
+        results.append({
+            'order_id': order.pk,
+            'order_number': order.order_number,
+            'status': order.status,
+            'placed_at': order.created_at,
+            'shipping_name': f"{order.shipping_first_name} {order.shipping_last_name}",
+            'shipping_city': order.shipping_city,
+            'shipping_country': order.shipping_country,
+            'items': OrderItemSerializer(order_lines, many=True).data,
+            'seller_total': sum(line.total_price for line in order_lines)
+        })
+    
+    next_url = None
+    if has_more:
+        last = page[-1]
+        cursor = encode_cursor(last['placed_at'], last['order_id'])
+        next_url = replace_query_param(request.build_absolute_uri(), 'cursor', cursor)
+    
+    return Response({'next': next_url, 'results': results}, status=status.HTTP_200_OK)
 
 
 class ShippingAddressListCreateView(generics.ListCreateAPIView):
@@ -99,29 +237,7 @@ class ShippingAddressDetailView(generics.RetrieveUpdateDestroyAPIView):
 @permission_classes([permissions.IsAuthenticated])
 def order_stats(request):
     """Get order statistics for user"""
-    user = request.user
-    
-    # Basic stats
-    total_orders = Order.objects.filter(user=user).count()
-    pending_orders = Order.objects.filter(user=user, status='pending').count()
-    processing_orders = Order.objects.filter(user=user, status='processing').count()
-    shipped_orders = Order.objects.filter(user=user, status='shipped').count()
-    delivered_orders = Order.objects.filter(user=user, status='delivered').count()
-    
-    # Total spent
-    total_spent = Order.objects.filter(
-        user=user, 
-        payment_status='paid'
-    ).aggregate(total=Sum('total_amount'))['total'] or 0
-    
-    return Response({
-        'total_orders': total_orders,
-        'pending_orders': pending_orders,
-        'processing_orders': processing_orders,
-        'shipped_orders': shipped_orders,
-        'delivered_orders': delivered_orders,
-        'total_spent': float(total_spent)
-    }, status=status.HTTP_200_OK)
+    return Response(get_order_stats(request.user), status=status.HTTP_200_OK)
 
 
 @api_view(['GET'])
@@ -131,36 +247,7 @@ def seller_stats(request):
     if not request.user.is_seller:
         return Response({'error': 'Access denied'}, status=status.HTTP_403_FORBIDDEN)
     
-    # Orders for seller's products
-    seller_orders = Order.objects.filter(items__product__seller=request.user).distinct()
-    
-    # Basic stats
-    total_orders = seller_orders.count()
-    pending_orders = seller_orders.filter(status='pending').count()
-    processing_orders = seller_orders.filter(status='processing').count()
-    shipped_orders = seller_orders.filter(status='shipped').count()
-    delivered_orders = seller_orders.filter(status='delivered').count()
-    
-    # Revenue
-    total_revenue = seller_orders.filter(
-        payment_status='paid'
-    ).aggregate(total=Sum('total_amount'))['total'] or 0
-    
-    # Products sold
-    products_sold = OrderItem.objects.filter(
-        product__seller=request.user,
-        order__payment_status='paid'
-    ).aggregate(total=Sum('quantity'))['total'] or 0
-    
-    return Response({
-        'total_orders': total_orders,
-        'pending_orders': pending_orders,
-        'processing_orders': processing_orders,
-        'shipped_orders': shipped_orders,
-        'delivered_orders': delivered_orders,
-        'total_revenue': float(total_revenue),
-        'products_sold': products_sold
-    }, status=status.HTTP_200_OK)
+    return Response(get_seller_stats(request.user), status=status.HTTP_200_OK)
 
 
 @api_view(['GET'])
@@ -170,39 +257,65 @@ def admin_stats(request):
     if not request.user.is_staff:
         return Response({'error': 'Access denied'}, status=status.HTTP_403_FORBIDDEN)
     
-    # All orders
-    all_orders = Order.objects.all()
+    return Response(get_admin_stats(), status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def outbox_status(request):
+    """Outbox queue depth and lag (admin only)"""
+    if not request.user.is_staff:
+        return Response({'error': 'Access denied'}, status=status.HTTP_403_FORBIDDEN)
+    
+    return Response(outbox_metrics(), status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def sales_analytics(request):
+    """Sales time series and period comparison, read from the daily rollups only"""
+    user = request.user
+    if not (user.is_seller or user.is_staff):
+        return Response({'error': 'Access denied'}, status=status.HTTP_403_FORBIDDEN)
     
-    # Basic stats
-    total_orders = all_orders.count()
-    pending_orders = all_orders.filter(status='pending').count()
-    processing_orders = all_orders.filter(status='processing').count()
-    shipped_orders = all_orders.filter(status='shipped').count()
-    delivered_orders = all_orders.filter(status='delivered').count()
-    cancelled_orders = all_orders.filter(status='cancelled').count()
+    params = request.query_params
+    try:
+        end = date.fromisoformat(params['end']) if 'end' in params else timezone.localdate()
+        start = date.fromisoformat(params['start']) if 'start' in params else end - timedelta(days=29)
+    except ValueError:
+        return Response({'error': 'Dates must be in YYYY-MM-DD format'}, status=status.HTTP_400_BAD_REQUEST)
+    if start > end:
+        return Response({'error': 'start must not be after end'}, status=status.HTTP_400_BAD_REQUEST)
     
-    # Revenue
-    total_revenue = all_orders.filter(
-        payment_status='paid'
-    ).aggregate(total=Sum('total_amount'))['total'] or 0
+    granularity = params.get('granularity', 'day')
+    if granularity not in ('day', 'week', 'month'):
+        return Response({'error': 'granularity must be day, week or month'}, status=status.HTTP_400_BAD_REQUEST)
     
-    # Recent orders (last 30 days)
-    from datetime import timedelta
-    thirty_days_ago = timezone.now() - timedelta(days=30)
-    recent_orders = all_orders.filter(created_at__gte=thirty_days_ago).count()
+    # Staff see the platform (or any seller); sellers only see their own sales
+    seller_id = params.get('seller') if user.is_staff else user.pk
+    try:
+        if 'product' in params:
+            scope = 'product'
+            rollups = DailyProductSales.objects.filter(product_id=params['product'])
+            if seller_id:
+                rollups = rollups.filter(seller_id=seller_id)
+        elif seller_id:
+            scope = 'seller'
+            rollups = DailySellerSales.objects.filter(seller_id=seller_id)
+        else:
+            scope = 'platform'
+            rollups = DailyPlatformSales.objects.all()
+        series = sales_series(rollups, start, end, granularity)
+        comparison = period_comparison(rollups, start, end)
+    except DjangoValidationError:
+        return Response({'error': 'Invalid seller or product id'}, status=status.HTTP_400_BAD_REQUEST)
     
     return Response({
-        'total_orders': total_orders,
-        'pending_orders': pending_orders,
-        'processing_orders': processing_orders,
-        'shipped_orders': shipped_orders,
-        'delivered_orders': delivered_orders,
-        'cancelled_orders': cancelled_orders,
-        'total_revenue': float(total_revenue),
-        'recent_orders': recent_orders
+        'scope': scope,
+        'start': start,
+        'end': end,
+        'granularity': granularity,
+        'series': series,
+        **comparison
     }, status=status.HTTP_200_OK)
 
-
-
-
-
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Category, Brand, Tag, Product, ProductImage, ProductReview, Wishlist
+from .models import Category, Brand, Tag, Product, ProductImage, ProductReview, Wishlist, StockReservation
 
 
 @admin.register(Category)
@@ -76,6 +76,9 @@ class WishlistAdmin(admin.ModelAdmin):
     ordering = ('-created_at',)
 
 
-
-
-
+@admin.register(StockReservation)
+class StockReservationAdmin(admin.ModelAdmin):
+    list_display = ('product', 'cart', 'quantity', 'expires_at', 'created_at')
+    list_filter = ('expires_at',)
+    search_fields = ('product__title', 'cart__user__email')
+    ordering = ('expires_at',)
@@ -0,0 +1,125 @@
+from contextlib import ExitStack
+from fnmatch import fnmatch
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from ecommerce.benchmarks.datasets import has_benchmark_data
+from ecommerce.benchmarks.endpoints import ENDPOINTS
+from ecommerce.benchmarks.runner import BenchmarkRunner, ClientTransport, LiveTransport, compare_results
+import json
+import logging
+
+# Silenced during client runs: the results file records status codes and query counts instead
+NOISY_LOGGERS = ('django.request', 'ecommerce.queries')
+
+
+class Command(BaseCommand):
+    help = ('Measure latency percentiles, queries per request and peak memory for every API endpoint '
+            'against the seed_benchmark_data dataset, or compare two results files')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=100, help='Timed requests per endpoint')
+        parser.add_argument('--warmup', type=int, default=5, help='Untimed requests per endpoint first')
+        parser.add_argument('--endpoint', action='append', dest='patterns', metavar='PATTERN',
+                            help="Only run endpoints matching this glob, e.g. 'GET product*' (repeatable)")
+        parser.add_argument('--url', help='Benchmark a running server at this base URL instead of the test client')
+        parser.add_argument('--label', default='', help='Name for this run in the results file')
+        parser.add_argument('--output', default='benchmark_results.json', help='Results file to write')
+        parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CANDIDATE'),
+                            help='Compare two results files instead of running')
+        parser.add_argument('--threshold', type=float, default=10.0,
+                            help='Percent change that counts as a regression or improvement')
+        parser.add_argument('--fail-on-regression', action='store_true',
+                            help='Exit with an error if --compare finds a regression')
+
+    def handle(self, *args, **options):
+        if options['compare']:
+            return self.compare(*options['compare'], options['threshold'], options['fail_on_regression'])
+
+        if options['requests'] < 2 or options['warmup'] < 0:
+            raise CommandError('--requests must be at least 2 and --warmup must not be negative')
+        if not has_benchmark_data():
+            raise CommandError('No benchmark data found; run seed_benchmark_data first')
+
+        endpoints = [
+            endpoint for endpoint in ENDPOINTS
+            if not options['patterns'] or any(fnmatch(endpoint.key, pattern) for pattern in options['patterns'])
+        ]
+        if not endpoints:
+            raise CommandError('No endpoints match the given patterns')
+
+        with ExitStack() as stack:
+            if options['url']:
+                transport = LiveTransport(options['url'])
+            else:
+                # Time the app as production runs it, not with DEBUG's query log and tracing
+                stack.enter_context(override_settings(
+                    DEBUG=False,
+                    ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+                    QUERY_INSTRUMENTATION_TRACE=False,
+                ))
+                for name in NOISY_LOGGERS:
+                    logger = logging.getLogger(name)
+                    stack.callback(setattr, logger, 'disabled', logger.disabled)
+                    logger.disabled = True
+                transport = ClientTransport()
+
+            self.stdout.write(
+                f"Running {len(endpoints)} endpoints, {options['requests']} requests each, through the {transport.name} transport..."
+            )
+            runner = BenchmarkRunner(transport, options['requests'], options['warmup'], self.report)
+            results = runner.run(endpoints, options['label'])
+
+        with open(options['output'], 'w') as f:
+            json.dump(results, f, indent=2)
+
+        meta = results['meta']
+        if meta['skipped']:
+            self.stdout.write(f"Skipped {len(meta['skipped'])} write endpoints, which a live server cannot roll back")
+        if meta['unbenchmarked_urls']:
+            self.stdout.write(self.style.WARNING(f"No benchmark for: {', '.join(meta['unbenchmarked_urls'])}"))
+        self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+
+    def report(self, key, result):
+        queries = f"{result['queries']:g} queries" if result['queries'] is not None else '? queries'
+        memory = f"{result['peak_memory_kib']:,.0f} KiB" if result['peak_memory_kib'] is not None else ''
+        line = (f"{key:<50} p50 {result['p50_ms']:8.2f}ms  p95 {result['p95_ms']:8.2f}ms  "
+                f"p99 {result['p99_ms']:8.2f}ms  {queries:>11}  {memory:>9}")
+        failures = {code: count for code, count in result['status_codes'].items() if not code.startswith('2')}
+        if failures:
+            self.stdout.write(self.style.WARNING(f'{line}  status {failures}'))
+        else:
+            self.stdout.write(line)
+
+    def compare(self, baseline_path, candidate_path, threshold, fail_on_regression):
+        runs = []
+        for path in (baseline_path, candidate_path):
+            try:
+                with open(path) as f:
+                    runs.append(json.load(f))
+            except (OSError, ValueError) as e:
+                raise CommandError(f'Cannot read {path}: {e}')
+        baseline, candidate = runs
+
+        for field in ('transport', 'database', 'requests', 'dataset'):
+            if baseline['meta'].get(field) != candidate['meta'].get(field):
+                self.stdout.write(self.style.WARNING(f'The runs differ in {field}; the comparison may be misleading'))
+
+        names = [run['meta'].get('label') or path for run, path in zip(runs, (baseline_path, candidate_path))]
+        self.stdout.write(f'Comparing {names[0]} (baseline) with {names[1]}, threshold {threshold:g}%')
+        styles = {'regressed': self.style.ERROR, 'improved': self.style.SUCCESS}
+        rows = compare_results(baseline, candidate, threshold)
+        for row in rows:
+            cells = []
+            for metric, (before, after, change) in row['metrics'].items():
+                if before is None or after is None:
+                    continue
+                cells.append(f'{metric} {before:g} -> {after:g} ({change:+.1f}%)')
+            line = f"{row['endpoint']:<50} {row['verdict']:<10} {'  '.join(cells)}"
+            self.stdout.write(styles.get(row['verdict'], str)(line))
+
+        regressed = sum(1 for row in rows if row['verdict'] == 'regressed')
+        improved = sum(1 for row in rows if row['verdict'] == 'improved')
+        self.stdout.write(f'{regressed} regressed, {improved} improved, {len(rows) - regressed - improved} other')
+        if regressed and fail_on_regression:
+            raise CommandError(f'{regressed} endpoints regressed')
@@ -0,0 +1,69 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from ecommerce.ids import uuid7
+import time
+import uuid
+
+
+class Command(BaseCommand):
+    help = 'Compare insert throughput and primary key index size for uuid4 and uuid7 keys'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000000, help='Rows to insert per key type')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per INSERT batch')
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ('postgresql', 'sqlite'):
+            raise CommandError(f'Unsupported database vendor: {connection.vendor}')
+
+        self.stdout.write(f"Inserting {options['rows']} rows per key type on {connection.vendor}...")
+        for name, generate in (('uuid4', uuid.uuid4), ('uuid7', uuid7)):
+            elapsed, index_bytes = self.run(generate, options['rows'], options['batch_size'])
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{name}: {options['rows'] / elapsed:,.0f} rows/s, "
+                    f"primary key index {index_bytes / 1024 / 1024:,.1f} MiB"
+                )
+            )
+
+    def run(self, generate, rows, batch_size):
+        """Insert rows into a scratch table and return (seconds, index size in bytes)"""
+        key_type = 'uuid' if connection.vendor == 'postgresql' else 'char(32)'
+        with connection.cursor() as cursor:
+            cursor.execute('DROP TABLE IF EXISTS benchmark_uuid_keys')
+            cursor.execute(
+                f'CREATE TABLE benchmark_uuid_keys (id {key_type} NOT NULL PRIMARY KEY, payload integer NOT NULL)'
+            )
+
+            started = time.perf_counter()
+            for offset in range(0, rows, batch_size):
+                count = min(batch_size, rows - offset)
+                values = [
+                    (str(key) if connection.vendor == 'postgresql' else key.hex, offset + i)
+                    for i, key in enumerate(generate() for _ in range(count))
+                ]
+                with transaction.atomic():
+                    cursor.executemany('INSERT INTO benchmark_uuid_keys (id, payload) VALUES (%s, %s)', values)
+            elapsed = time.perf_counter() - started
+
+            index_bytes = self.index_size(cursor)
+            cursor.execute('DROP TABLE benchmark_uuid_keys')
+
+        return elapsed, index_bytes
+
+    def index_size(self, cursor):
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                "SELECT pg_relation_size(indexrelid) FROM pg_index "
+                "WHERE indrelid = 'benchmark_uuid_keys'::regclass AND indisprimary"
+            )
+            return cursor.fetchone()[0]
+
+        # SQLite keeps the primary key in an autoindex; measure it with dbstat when available
+        try:
+            cursor.execute(
+                "SELECT SUM(pgsize) FROM dbstat WHERE name = 'sqlite_autoindex_benchmark_uuid_keys_1'"
+            )
+            return cursor.fetchone()[0] or 0
+        except Exception:
+            return 0
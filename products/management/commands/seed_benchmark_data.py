@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from ecommerce.benchmarks.datasets import SCALES, DatasetSeeder, flush, has_benchmark_data
+import time
+
+
+class Command(BaseCommand):
+    help = 'Seed a deterministic dataset of products, reviews, images, orders and carts for benchmark_api'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=SCALES, default='1k', help='Dataset size, by number of products')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed; the same seed gives the same rows')
+        parser.add_argument('--flush', action='store_true', help='Replace existing benchmark data')
+        parser.add_argument('--delete', action='store_true', help='Only delete existing benchmark data')
+        parser.add_argument('--noinput', '--no-input', action='store_false', dest='interactive',
+                            help='Do not prompt for confirmation')
+
+    def handle(self, *args, **options):
+        exists = has_benchmark_data()
+        if exists and not (options['flush'] or options['delete']):
+            raise CommandError('Benchmark data already exists; pass --flush to replace it')
+
+        database = connection.settings_dict['NAME']
+        if options['delete']:
+            action = f'delete all benchmark data from {database}'
+        else:
+            action = (f"add about {SCALES[options['scale']]['products']:,} benchmark products, "
+                      f"with users, reviews and orders, to {database}")
+        if options['interactive']:
+            answer = input(f'This will {action}. Only do this on a database set aside for benchmarking.\n'
+                           "Type 'yes' to continue: ")
+            if answer != 'yes':
+                raise CommandError('Cancelled')
+
+        started = time.perf_counter()
+        if exists:
+            flush(self.stdout.write)
+        if options['delete']:
+            self.stdout.write(self.style.SUCCESS('Deleted benchmark data'))
+            return
+
+        counts = DatasetSeeder(options['scale'], options['seed'], self.stdout.write).seed_all()
+        for label, count in counts.items():
+            self.stdout.write(f'{label}: {count:,}')
+        self.stdout.write(
+            self.style.SUCCESS(f"Seeded the {options['scale']} dataset in {time.perf_counter() - started:,.1f}s")
+        )
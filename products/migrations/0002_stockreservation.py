@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:42
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cart', '0002_cart_activity_indexes'),
+        ('products', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockReservation',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('quantity', models.PositiveIntegerField()),
+                ('expires_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('cart', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='cart.cart')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='products.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['product', 'expires_at'], name='products_st_product_db2e26_idx'), models.Index(fields=['expires_at'], name='products_st_expires_817182_idx')],
+                'unique_together': {('cart', 'product')},
+            },
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:46
+
+from django.db import migrations, models
+import ecommerce.ids
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_stockreservation'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='brand',
+            name='id',
+            field=models.UUIDField(default=ecommerce.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='category',
+            name='id',
+            field=models.UUIDField(default=ecommerce.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='id',
+            field=models.UUIDField(default=ecommerce.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='productimage',
+            name='id',
+            field=models.UUIDField(default=ecommerce.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='productreview',
+            name='id',
+            field=models.UUIDField(default=ecommerce.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='stockreservation',
+            name='id',
+            field=models.UUIDField(default=ecommerce.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='tag',
+            name='id',
+            field=models.UUIDField(default=ecommerce.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='wishlist',
+            name='id',
+            field=models.UUIDField(default=ecommerce.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+    ]
@@ -1,14 +1,17 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, F, Q, Sum, When
 from django.contrib.auth import get_user_model
+from django.utils import timezone
+from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator
-import uuid
+from ecommerce.ids import uuid7
 
 User = get_user_model()
 
 
 class Category(models.Model):
     """Product categories"""
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     name = models.CharField(max_length=100, unique=True)
     description = models.TextField(blank=True)
     image = models.ImageField(upload_to='categories/', blank=True, null=True)
@@ -26,7 +29,7 @@ class Category(models.Model):
 
 class Brand(models.Model):
     """Product brands"""
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     name = models.CharField(max_length=100, unique=True)
     description = models.TextField(blank=True)
     logo = models.ImageField(upload_to='brands/', blank=True, null=True)
@@ -40,7 +43,7 @@ class Brand(models.Model):
 
 class Tag(models.Model):
     """Product tags for filtering"""
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     name = models.CharField(max_length=50, unique=True)
     color = models.CharField(max_length=7, default='#007bff')  # Hex color code
     created_at = models.DateTimeField(auto_now_add=True)
@@ -58,7 +61,7 @@ class Product(models.Model):
         ('rejected', 'Rejected'),
     ]
     
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     title = models.CharField(max_length=200)
     description = models.TextField()
     price = models.DecimalField(max_digits=10, decimal_places=2, validators=[MinValueValidator(0)])
@@ -100,7 +103,6 @@ class Product(models.Model):
     @property
     def is_discount_active(self):
         """Check if discount is currently active"""
-        from django.utils import timezone
         now = timezone.now()
         return (self.discount_percentage > 0 and 
                 self.discount_start_date and 
@@ -110,7 +112,7 @@ class Product(models.Model):
 
 class ProductImage(models.Model):
     """Product images"""
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='images')
     image = models.ImageField(upload_to='products/')
     is_primary = models.BooleanField(default=False)
@@ -134,7 +136,7 @@ class ProductReview(models.Model):
         (5, '5 Stars'),
     ]
     
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='reviews')
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='reviews')
     rating = models.IntegerField(choices=RATING_CHOICES, validators=[MinValueValidator(1), MaxValueValidator(5)])
@@ -155,7 +157,7 @@ class ProductReview(models.Model):
 
 class Wishlist(models.Model):
     """User wishlist"""
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='wishlist')
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='wishlist_items')
     created_at = models.DateTimeField(auto_now_add=True)
@@ -168,6 +170,60 @@ class Wishlist(models.Model):
         return f"{self.user.first_name} - {self.product.title}"
 
 
-
-
-
+class StockReservation(models.Model):
+    """Short-lived hold on product stock while a cart is being checked out"""
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='reservations')
+    cart = models.ForeignKey('cart.Cart', on_delete=models.CASCADE, related_name='reservations')
+    quantity = models.PositiveIntegerField()
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        unique_together = ['cart', 'product']
+        indexes = [
+            models.Index(fields=['product', 'expires_at']),
+            models.Index(fields=['expires_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.quantity}x {self.product.title} held until {self.expires_at}"
+    
+    @classmethod
+    def reserved_quantities(cls, product_ids, exclude_carts=None):
+        """Return {product_id: quantity} held by active reservations, in one grouped aggregate"""
+        holds = cls.objects.filter(product_id__in=product_ids, expires_at__gt=timezone.now())
+        if exclude_carts is not None:
+            holds = holds.exclude(cart__in=exclude_carts)
+        return dict(
+            holds.values('product').annotate(total=Sum('quantity')).values_list('product', 'total')
+        )
+    
+    @classmethod
+    def commit(cls, carts, quantities):
+        """Turn the holds of the given carts into permanent stock decrements.
+        
+        ``quantities`` maps product ids to the number of units sold. Stock for
+        all products is decremented in one conditional ``UPDATE ... CASE``
+        that only matches rows with enough stock left; if any product is
+        short, nothing is changed and ValidationError is raised. The matching
+        holds are then released in one delete.
+        """
+        if not quantities:
+            return
+        
+        enough_stock = Q()
+        for pk, quantity in quantities.items():
+            enough_stock |= Q(pk=pk, stock_quantity__gte=quantity)
+        
+        with transaction.atomic():
+            updated = Product.objects.filter(enough_stock).update(
+                stock_quantity=Case(
+                    *[When(pk=pk, then=F('stock_quantity') - quantity) for pk, quantity in quantities.items()],
+                    default=F('stock_quantity'),
+                    output_field=models.PositiveIntegerField(),
+                )
+            )
+            if updated != len(quantities):
+                raise ValidationError("Not enough stock available for one or more products")
+            cls.objects.filter(cart__in=carts, product_id__in=quantities).delete()
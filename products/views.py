@@ -1,8 +1,9 @@
 from rest_framework import generics, status, permissions, filters
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import Q, Avg, Count
+from ecommerce.throttling import WishlistRateThrottle
 from .models import Category, Brand, Tag, Product, ProductImage, ProductReview, Wishlist
 from .serializers import (
     CategorySerializer, BrandSerializer, TagSerializer, ProductSerializer,
@@ -168,6 +169,7 @@ class WishlistDetailView(generics.DestroyAPIView):
 
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
+@throttle_classes([WishlistRateThrottle])
 def toggle_wishlist(request, product_id):
     """Toggle product in wishlist"""
     try:
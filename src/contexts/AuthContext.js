@@ -65,7 +65,13 @@ export const AuthProvider = ({ children }) => {
     }
   };
 
-  const logout = () => {
+  const logout = async () => {
+    const refresh = localStorage.getItem('refresh_token');
+    try {
+      await authAPI.logout(refresh ? { refresh } : {});
+    } catch (error) {
+      // The local session is cleared regardless
+    }
     localStorage.removeItem('access_token');
     localStorage.removeItem('refresh_token');
     setUser(null);
@@ -75,7 +81,8 @@ export const AuthProvider = ({ children }) => {
   const updateProfile = async (profileData) => {
     try {
       const res = await authAPI.updateProfile(profileData);
-      setUser(res.data);
+      const { address, birthdate, city, country, ...userFields } = res.data;
+      setUser((prev) => ({ ...prev, ...userFields, profile: { address, birthdate, city, country } }));
       toast.success('Profile updated successfully!');
       return { success: true };
     } catch (error) {
@@ -87,7 +94,11 @@ export const AuthProvider = ({ children }) => {
 
   const changePassword = async (passwordData) => {
     try {
-      await authAPI.changePassword(passwordData);
+      const response = await authAPI.changePassword(passwordData);
+      // Changing the password revokes the old tokens
+      const { tokens } = response.data;
+      localStorage.setItem('access_token', tokens.access);
+      localStorage.setItem('refresh_token', tokens.refresh);
       toast.success('Password changed successfully!');
       return { success: true };
     } catch (error) {
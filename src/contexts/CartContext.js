@@ -15,12 +15,14 @@ export const useCart = () => {
 
 export const CartProvider = ({ children }) => {
   const [cart, setCart] = useState(null);
+  const [cartCount, setCartCount] = useState(null);
   const [loading, setLoading] = useState(false);
   const { isAuthenticated } = useAuth();
 
   useEffect(() => {
     if (isAuthenticated) {
-      fetchCart();
+      // Only the badge count is needed on most pages; the cart page loads the full cart
+      fetchCartCount();
     } else {
       // For guest users, we'll use localStorage
       const savedCart = localStorage.getItem('guest_cart');
@@ -35,6 +37,7 @@ export const CartProvider = ({ children }) => {
       setLoading(true);
       const response = await cartAPI.getCart();
       setCart(response.data);
+      setCartCount(null);
     } catch (error) {
       console.error('Failed to fetch cart:', error);
     } finally {
@@ -42,6 +45,15 @@ export const CartProvider = ({ children }) => {
     }
   };
 
+  const fetchCartCount = async () => {
+    try {
+      const response = await cartAPI.getCartCount();
+      setCartCount(response.data);
+    } catch (error) {
+      console.error('Failed to fetch cart count:', error);
+    }
+  };
+
   const addToCart = async (productId, quantity = 1) => {
     try {
       if (isAuthenticated) {
@@ -52,11 +64,13 @@ export const CartProvider = ({ children }) => {
 
         // Backend may return either the created cart item or the full cart.
         // If the response already contains a full cart (items array), use it.
-        // Otherwise fetch the canonical cart representation.
+        // Otherwise refresh the badge count and drop the stale cart so the
+        // cart page reloads it.
         if (response.data && Array.isArray(response.data.items)) {
           setCart(response.data);
         } else {
-          await fetchCart();
+          setCart(null);
+          await fetchCartCount();
         }
 
         toast.success('Product added to cart!');
@@ -182,6 +196,7 @@ export const CartProvider = ({ children }) => {
   };
 
   const getCartItemCount = () => {
+    if (cartCount) return cartCount.quantity || 0;
     if (!cart) return 0;
     return cart.total_items || 0;
   };
@@ -199,6 +214,7 @@ export const CartProvider = ({ children }) => {
     removeFromCart,
     clearCart,
     fetchCart,
+    fetchCartCount,
     getCartItemCount,
     getCartTotal,
   };
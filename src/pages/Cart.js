@@ -1,11 +1,19 @@
-import React from 'react';
+import React, { useEffect } from 'react';
 import { useCart } from '../contexts/CartContext';
+import { useAuth } from '../contexts/AuthContext';
 import { Link, useNavigate } from 'react-router-dom';
 import LoadingSpinner from '../components/UI/LoadingSpinner';
 
 const Cart = () => {
-  const { cart, loading, updateCartItem, removeFromCart, clearCart, getCartTotal } = useCart();
+  const { cart, loading, updateCartItem, removeFromCart, clearCart, getCartTotal, fetchCart } = useCart();
   const navigate = useNavigate();
+  const { isAuthenticated } = useAuth();
+
+  useEffect(() => {
+    if (isAuthenticated) {
+      fetchCart();
+    }
+  }, [isAuthenticated]);
 
   if (loading) {
     return (
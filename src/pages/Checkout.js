@@ -1,12 +1,14 @@
-import React, { useState } from 'react';
+import React, { useState, useEffect } from 'react';
 import { useCart } from '../contexts/CartContext';
-import { ordersAPI } from '../utils/api';
+import { useAuth } from '../contexts/AuthContext';
+import { ordersAPI, cartAPI } from '../utils/api';
 import { useNavigate } from 'react-router-dom';
 import LoadingSpinner from '../components/UI/LoadingSpinner';
 
 const Checkout = () => {
-  const { cart, getCartTotal, clearCart } = useCart();
+  const { cart, getCartTotal, clearCart, fetchCart } = useCart();
   const navigate = useNavigate();
+  const { isAuthenticated } = useAuth();
   const [formData, setFormData] = useState({
     shipping_first_name: '',
     shipping_last_name: '',
@@ -20,6 +22,26 @@ const Checkout = () => {
   });
   const [isSubmitting, setIsSubmitting] = useState(false);
   const [order, setOrder] = useState(null);
+  // Reused when a submit gets no response, so retrying never creates a second order
+  const [idempotencyKey, setIdempotencyKey] = useState(() => crypto.randomUUID());
+
+  const hasItems = cart?.items?.length > 0;
+
+  useEffect(() => {
+    if (isAuthenticated && !cart) {
+      fetchCart();
+    }
+  }, [isAuthenticated]);
+
+  useEffect(() => {
+    // Hold stock for the cart while the user fills in the checkout form
+    if (hasItems) {
+      cartAPI.reserveCart().catch((err) => {
+        const details = err.response?.data?.error;
+        if (details) alert(details);
+      });
+    }
+  }, [hasItems]);
 
   if (!cart || cart.items?.length === 0) {
     return (
@@ -52,10 +74,15 @@ const Checkout = () => {
         total_amount: getCartTotal(),
       };
       // Simulate payment and create order
-      const res = await ordersAPI.createOrder(orderData);
+      const res = await ordersAPI.createOrder(orderData, idempotencyKey);
       setOrder(res.data);
       clearCart();
     } catch (err) {
+      // The server answered, so the next submit is a new attempt. Keep the key
+      // for network errors and timeouts, and for 409 while the first one is still running.
+      if (err.response && err.response.status !== 409) {
+        setIdempotencyKey(crypto.randomUUID());
+      }
       alert('Checkout failed');
     }
     setIsSubmitting(false);
@@ -75,7 +102,7 @@ const Checkout = () => {
             <ul>
               {order.items.map((item) => (
                 <li key={item.id}>
-                  {item.product.title} x {item.quantity} = ${item.total_price}
+                  {item.product_title} x {item.quantity} = ${item.total_price}
                 </li>
               ))}
             </ul>
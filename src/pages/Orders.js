@@ -101,7 +101,7 @@ const Orders = () => {
                     <ul className="ml-6 list-disc">
                       {orderDetails.items.map((item) => (
                         <li key={item.id}>
-                          {item.product.title} x {item.quantity} = ${item.total_price}
+                          {item.product_title} x {item.quantity} = ${item.total_price}
                         </li>
                       ))}
                     </ul>
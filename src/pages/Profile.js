@@ -24,10 +24,10 @@ const Profile = () => {
         first_name: user.first_name || '',
         last_name: user.last_name || '',
         mobile_phone: user.mobile_phone || '',
-        birthdate: user.birthdate || '',
-        city: user.city || '',
-        country: user.country || '',
-        address: user.address || '',
+        birthdate: user.profile?.birthdate || '',
+        city: user.profile?.city || '',
+        country: user.profile?.country || '',
+        address: user.profile?.address || '',
         profile_picture: null,
       });
       setPreview(user.profile_picture || null);
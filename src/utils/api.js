@@ -40,8 +40,12 @@ api.interceptors.response.use(
             refresh: refreshToken,
           });
 
-          const { access } = response.data;
+          const { access, refresh } = response.data;
           localStorage.setItem('access_token', access);
+          // Refresh tokens are rotated; the old one is now revoked
+          if (refresh) {
+            localStorage.setItem('refresh_token', refresh);
+          }
 
           // Retry the original request
           originalRequest.headers.Authorization = `Bearer ${access}`;
@@ -63,10 +67,11 @@ api.interceptors.response.use(
 export const authAPI = {
   register: (data) => api.post('/auth/register/', data),
   login: (data) => api.post('/auth/login/', data),
+  logout: (data) => api.post('/auth/logout/', data),
   verifyEmail: (token) => api.post(`/auth/verify-email/${token}/`),
   passwordResetRequest: (data) => api.post('/auth/password-reset-request/', data),
   passwordResetConfirm: (data) => api.post('/auth/password-reset-confirm/', data),
-  getUserInfo: () => api.get('/auth/user-info/'),
+  getUserInfo: () => api.get('/auth/user-info/', { params: { include: 'profile' } }),
   updateProfile: (data) => api.put('/auth/profile/', data),
   changePassword: (data) => api.post('/auth/change-password/', data),
 };
@@ -94,8 +99,11 @@ export const cartAPI = {
   addToCart: (data) => api.post('/cart/add/', data),
   updateCartItem: (itemId, data) => api.put(`/cart/update/${itemId}/`, data),
   removeFromCart: (itemId) => api.delete(`/cart/remove/${itemId}/`),
+  batchUpdateCart: (operations) => api.post('/cart/batch/', { operations }),
+  reserveCart: () => api.post('/cart/reserve/'),
   clearCart: () => api.delete('/cart/clear/'),
   getCartSummary: () => api.get('/cart/summary/'),
+  getCartCount: () => api.get('/cart/count/'),
 };
 
 // Wishlist API
@@ -110,11 +118,15 @@ export const wishlistAPI = {
 export const ordersAPI = {
   getOrders: () => api.get('/orders/'),
   getOrder: (id) => api.get(`/orders/${id}/`),
-  createOrder: (data) => api.post('/orders/', data),
+  createOrder: (data, idempotencyKey) =>
+    api.post('/orders/', data, { headers: { 'Idempotency-Key': idempotencyKey } }),
   updateOrderStatus: (id, data) => api.put(`/orders/${id}/status/`, data),
+  getFulfilmentQueue: (params) => api.get('/orders/fulfilment/', { params }),
+  bulkUpdateOrderStatus: (data) => api.post('/orders/status/bulk/', data),
   getOrderStats: () => api.get('/orders/stats/'),
   getSellerStats: () => api.get('/orders/seller-stats/'),
   getAdminStats: () => api.get('/orders/admin-stats/'),
+  getSalesAnalytics: (params) => api.get('/orders/analytics/', { params }),
   getShippingAddresses: () => api.get('/orders/shipping-addresses/'),
   createShippingAddress: (data) => api.post('/orders/shipping-addresses/', data),
   updateShippingAddress: (id, data) => api.put(`/orders/shipping-addresses/${id}/`, data),